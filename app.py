@@ -1,95 +1,772 @@
-from flask import Flask, request, jsonify
-import tensorflow as tf
-import numpy as np
+from flask import Flask, request, jsonify, g
 from PIL import Image
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_accept_header
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hmac
+import math
 import io
 import os
+import tarfile
+import threading
+import time
 import warnings
+import zipfile
 
-# Suppress TensorFlow warnings
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
-warnings.filterwarnings('ignore', category=UserWarning)
-warnings.filterwarnings('ignore', category=FutureWarning)
-tf.get_logger().setLevel('ERROR')
+from inference import InferenceEngine, PoolTimeoutError, PredictionError, PreprocessingError
+from inference.admission import PRIORITIES, REJECTION_REASONS, AdmissionController, AdmissionRejected
+from inference.config import env_bool, env_int, env_float
+from inference.memory import process_memory
+from inference.metrics import DIMENSION_BUCKETS, SIZE_BUCKETS, MetricsRegistry
+from inference.preprocessing import IMAGE_FORMATS, ImageTooLarge, UnsupportedImageFormat, warmup_codecs
+from inference.profiling import FORMATS as PROFILE_FORMATS, Profiler, ProfilingError
+from inference.registry import ModelLoadError, ModelLoadInProgress
+from inference.responses import DEFAULT_TOP_K, JSON_TYPE, response_types
+from inference.tensors import SUPPORTED_DTYPES, InvalidTensor
 
 app = Flask(__name__)
 
 # Load model dan labels saat aplikasi dimulai
-model_path = os.path.join(os.path.dirname(__file__), 'model', 'model_unquant.tflite')
+# MODEL_VARIANT: unquant (default), dynamic_int8, int8 atau float16
+# Varian terkuantisasi dibuat dengan tools/quantize_model.py
+MODEL_VARIANTS = {
+    'unquant': 'model_unquant.tflite',
+    'dynamic_int8': 'model_dynamic_int8.tflite',
+    'int8': 'model_int8.tflite',
+    'float16': 'model_float16.tflite',
+}
+model_variant = os.environ.get('MODEL_VARIANT', 'unquant').strip().lower()
+if model_variant not in MODEL_VARIANTS:
+    raise ValueError(f"Unknown MODEL_VARIANT {model_variant!r}, choose from: {', '.join(MODEL_VARIANTS)}")
+model_path = os.path.join(os.path.dirname(__file__), 'model', MODEL_VARIANTS[model_variant])
 labels_path = os.path.join(os.path.dirname(__file__), 'model', 'labels.txt')
 
-# Load TensorFlow Lite model
-interpreter = tf.lite.Interpreter(model_path=model_path)
-interpreter.allocate_tensors()
+# Inference engine (inference/engine.py): interpreter backend, interpreter pool,
+# micro-batching, preprocessing, TTA dan prediction cache, semuanya dari
+# environment variable (lihat README):
+# INTERPRETER_BACKEND: auto (default), tflite_runtime, ai_edge_litert, tensorflow
+# INTERPRETER_POOL_SIZE: jumlah interpreter independen (default: jumlah CPU)
+# INTERPRETER_NUM_THREADS: num_threads untuk setiap interpreter
+# INTERPRETER_XNNPACK: pakai delegate XNNPACK (default: aktif)
+# INTERPRETER_POOL_TIMEOUT: batas waktu tunggu interpreter (detik)
+# MICROBATCH_ENABLED / MICROBATCH_MAX_SIZE / MICROBATCH_MAX_WAIT_MS: gabungkan request /detect
+#   yang datang bersamaan
+# BATCH_MAX_SIZE: jumlah gambar maksimum per invoke() untuk /detect/batch dan TTA
+# PREPROCESS_RESAMPLE: filter resize (nearest, box, bilinear, hamming, bicubic, lanczos)
+# PREPROCESS_DRAFT: downscale JPEG saat decode
+# PREPROCESS_REDUCING_GAP: reducing_gap Pillow untuk gambar besar (0 = nonaktif)
+# MAX_IMAGE_PIXELS: width x height maksimum, dicek dari header gambar sebelum decode
+# TTA_ENABLED / TTA_TRANSFORMS / TTA_BAND / TTA_AGGREGATE / TTA_CROP_SCALE: test-time
+#   augmentation untuk prediksi di sekitar threshold (inference/tta.py)
+# PREDICTION_CACHE_SIZE / PREDICTION_CACHE_TTL / PREDICTION_CACHE_DIR / PREDICTION_CACHE_DISK_MAX_BYTES:
+#   cache berdasarkan hash bytes upload + fingerprint model (0 = nonaktif)
+# NEAR_DUPLICATE_CACHE_SIZE / NEAR_DUPLICATE_MAX_DISTANCE: cache berdasarkan perceptual hash
+#   input model untuk upload ulang yang dikompres ulang / di-resize (inference/near_duplicates.py)
+engine = InferenceEngine.from_env(model_path, labels_path, threshold=0.5)
+backend_name = engine.backend_name
+pool_size = engine.pool_size
+num_threads = engine.num_threads
+pool_timeout = engine.pool_timeout
+max_image_pixels = engine.max_pixels
+batch_max_size = engine.batch_max_size
+prediction_cache = engine.cache
+tta = engine.tta
+
+# Threshold untuk deteksi (misalnya 0.5 atau 50%)
+DETECTION_THRESHOLD = engine.threshold
+
+# Warm-up saat startup (lihat start_warmup dan /ready)
+# WARMUP_ENABLED: jalankan warm-up interpreter dan codec (default: aktif)
+# WARMUP_ITERATIONS: jumlah invoke() per ukuran batch per interpreter
+warmup_enabled = env_bool('WARMUP_ENABLED', True)
+
+# Model registry: versi aktif bisa diganti tanpa restart, versi sebelumnya disimpan untuk rollback
+# MODEL_WATCH_INTERVAL: cek perubahan file model/labels setiap N detik lalu muat ulang (0 = nonaktif)
+# ADMIN_TOKEN: aktifkan endpoint /admin/model/* (header Authorization: Bearer <token>)
+model_registry = engine.registry
+# Warm-up versi pertama dijalankan oleh start_warmup() di bawah
+engine.load(warmup=False)
+
+# Autotune pool_size x num_threads x XNNPACK (inference/autotune.py), hasilnya disimpan di profile
+# AUTOTUNE_ENABLED / AUTOTUNE_TARGET_P95_MS / AUTOTUNE_DURATION / AUTOTUNE_CLIENTS /
+# AUTOTUNE_XNNPACK / AUTOTUNE_PROFILE (lihat README)
+# Pada run.py --production autotune dijalankan oleh master dengan CPU satu worker
+if engine.autotune is not None:
+    engine.tune()
+    pool_size, num_threads = engine.pool_size, engine.num_threads
+model_watch_interval = env_float('MODEL_WATCH_INTERVAL', 0.0)
+if model_watch_interval > 0:
+    model_registry.watch(model_path, labels_path, model_watch_interval)
+admin_token = os.environ.get('ADMIN_TOKEN') or None
+
+# Format file yang diterima
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+# Input tensor mentah untuk /detect (lihat inference/tensors.py): body
+# application/octet-stream dengan header X-Tensor-Shape / X-Tensor-Dtype,
+# body application/x-npy, atau file .npy dengan key 'file'
+TENSOR_CONTENT_TYPES = {'application/octet-stream': 'raw', 'application/x-npy': 'npy'}
+TENSOR_EXTENSIONS = {'npy'}
+
+# Batas upload
+# MAX_CONTENT_LENGTH: ukuran body request maksimum dalam bytes, juga untuk /detect/batch
+#   (ditolak dengan 413 sebelum body dibaca jika Content-Length melewati batas)
+max_content_length = env_int('MAX_CONTENT_LENGTH', 32 * 1024 * 1024)
+app.config['MAX_CONTENT_LENGTH'] = max_content_length
+# Pillow sendiri menolak gambar di atas 2x MAX_IMAGE_PIXELS (DecompressionBombError) di semua jalur decode;
+# warning untuk 1x-2x tidak perlu karena gambar tersebut sudah ditolak oleh preprocess_image
+Image.MAX_IMAGE_PIXELS = max_image_pixels
+warnings.filterwarnings('ignore', category=Image.DecompressionBombWarning)
+
+# Konfigurasi /detect/batch
+# BATCH_MAX_FILES: jumlah gambar maksimum per request
+# BATCH_MAX_UNCOMPRESSED_BYTES: total ukuran asli semua member archive per request
+# DECODE_WORKERS: jumlah thread untuk decode gambar secara paralel
+batch_max_files = env_int('BATCH_MAX_FILES', 64)
+batch_max_uncompressed_bytes = env_int('BATCH_MAX_UNCOMPRESSED_BYTES', max_content_length)
+decode_workers = env_int('DECODE_WORKERS', os.cpu_count() or 1)
+def create_decode_executor():
+    return ThreadPoolExecutor(
+        max_workers=decode_workers,
+        thread_name_prefix='decode'
+    )
+
+decode_executor = create_decode_executor()
+
+# Admission control untuk /detect dan /detect/batch (inference/admission.py)
+# ADMISSION_ENABLED: aktifkan admission control (default: aktif)
+# ADMISSION_MAX_CONCURRENT: request yang boleh decode + inference bersamaan
+#   (default: 2 x INTERPRETER_POOL_SIZE, ditambah MICROBATCH_MAX_SIZE jika micro-batching aktif)
+# ADMISSION_MAX_QUEUE / ADMISSION_QUEUE_TIMEOUT: panjang antrean dan waktu tunggu maksimum (detik)
+# ADMISSION_BULK_QUEUE_SHARE: porsi antrean yang boleh dipakai request bulk
+# ADMISSION_RATE / ADMISSION_BURST: token bucket per client (request/detik, 0 = tanpa rate limit)
+# ADMISSION_TRUSTED_PROXIES: jumlah reverse proxy tepercaya di depan server; IP client untuk
+#   rate limit diambil dari X-Forwarded-For sebanyak itu dari kanan (default 0 = alamat socket)
+# ADMISSION_CLIENT_KEYS: "id:key,id:key"; X-Client-Id hanya dipakai sebagai identitas rate limit
+#   jika X-Client-Key cocok dengan key id tersebut
+# Header request: X-Priority (interactive / bulk), X-Request-Deadline (unix epoch detik)
+#   atau X-Request-Timeout-Ms, X-Client-Id + X-Client-Key
+admission_enabled = env_bool('ADMISSION_ENABLED', True)
+admission_trusted_proxies = env_int('ADMISSION_TRUSTED_PROXIES', 0)
+admission_client_keys = dict(
+    pair.strip().split(':', 1) for pair in os.environ.get('ADMISSION_CLIENT_KEYS', '').split(',') if ':' in pair
+)
+
+def create_admission():
+    """
+    AdmissionController untuk ukuran pool saat ini (dibuat ulang di worker setelah fork)
+    """
+    if not admission_enabled:
+        return None
+    default_concurrent = 2 * engine.pool_size + (engine.microbatch['max_batch_size'] if engine.microbatch else 0)
+    return AdmissionController(
+        max_concurrent=env_int('ADMISSION_MAX_CONCURRENT', default_concurrent),
+        max_queue=env_int('ADMISSION_MAX_QUEUE', 64),
+        queue_timeout=env_float('ADMISSION_QUEUE_TIMEOUT', 10.0),
+        rate=env_float('ADMISSION_RATE', 0.0),
+        burst=env_float('ADMISSION_BURST', 0.0) or None,
+        bulk_queue_share=env_float('ADMISSION_BULK_QUEUE_SHARE', 0.5)
+    )
+
+admission = create_admission()
+
+# Profiling on-demand untuk /detect dan /detect/batch (inference/profiling.py)
+# PROFILING_ENABLED: aktifkan endpoint /admin/profile/* (butuh ADMIN_TOKEN, default: nonaktif)
+# PROFILING_MAX_DURATION: durasi maksimum satu capture (detik)
+# Di luar capture window tidak ada overhead selain satu pengecekan per request
+profiling_enabled = env_bool('PROFILING_ENABLED')
+PROFILED_ENDPOINTS = ('detect_disease', 'detect_disease_batch')
+
+def create_profiler():
+    if not profiling_enabled:
+        return None
+    return Profiler(
+        root=os.path.dirname(os.path.abspath(__file__)),
+        max_duration=env_float('PROFILING_MAX_DURATION', 300.0),
+        op_profile_source=lambda: (
+            model_registry.active.model_path, model_registry.active.pool.interpreters[0],
+            engine.num_threads, engine.xnnpack
+        )
+    )
+
+profiler = engine.profiler = create_profiler()
 
-# Get input and output tensors
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+# Metrics format Prometheus di /metrics (per proses; pada mode prefork setiap
+# worker punya angka sendiri)
+# SERVER_TIMING_ENABLED: kirim header Server-Timing di setiap response
+#   (tanpa ini, header hanya dikirim jika request membawa X-Server-Timing: 1)
+server_timing_enabled = env_bool('SERVER_TIMING_ENABLED')
+STAGES = ('admission', 'read', 'decode', 'resize', 'normalize', 'near_duplicate', 'inference', 'batch_inference', 'tta', 'serialize')
 
-# Load labels
-with open(labels_path, 'r') as f:
-    labels = [line.strip().split(' ', 1)[1] for line in f.readlines()]
+metrics = MetricsRegistry(prefix='potato_')
+stage_seconds = metrics.histogram(
+    'stage_duration_seconds', 'Duration of each request processing stage', ['stage'])
+request_seconds = metrics.histogram(
+    'request_duration_seconds', 'End-to-end request duration', ['endpoint'])
+requests_total = metrics.counter(
+    'requests_total', 'Requests by endpoint and outcome', ['endpoint', 'outcome'])
+requests_in_flight = metrics.gauge(
+    'requests_in_flight', 'Requests currently being processed', ['endpoint'])
+upload_bytes = metrics.histogram(
+    'upload_size_bytes', 'Size of uploaded images', buckets=SIZE_BUCKETS)
+image_dimension = metrics.histogram(
+    'image_dimension_pixels', 'Original dimensions of uploaded images', ['axis'], buckets=DIMENSION_BUCKETS)
+metrics.gauge(
+    'interpreter_pool_interpreters', 'Interpreters in the pool by state', ['state'],
+    callback=lambda: {(state,): model_registry.active.pool.stats()[state] for state in ('size', 'in_use', 'available')})
+metrics.counter(
+    'interpreter_pool_checkouts_total', 'Interpreter checkouts from the pool',
+    callback=lambda: model_registry.active.pool.stats()['checkouts'])
+metrics.counter(
+    'interpreter_pool_timeouts_total', 'Interpreter checkouts that timed out',
+    callback=lambda: model_registry.active.pool.stats()['timeouts'])
+metrics.counter(
+    'interpreter_pool_wait_seconds_total', 'Total time spent waiting for an interpreter',
+    callback=lambda: model_registry.active.pool.stats()['wait_seconds_total'])
+metrics.gauge(
+    'interpreter_pool_utilization', 'Fraction of interpreter time spent busy',
+    callback=lambda: model_registry.active.pool.stats()['utilization'])
+metrics.counter(
+    'interpreter_pool_reallocations_total', 'Interpreter checkouts that had to resize and reallocate tensors',
+    callback=lambda: model_registry.active.pool.stats()['reallocations'])
 
-def preprocess_image(image_file):
+def batcher_queue_depth():
+    batcher = model_registry.active.batcher
+    return batcher.stats()['queue_depth'] if batcher is not None else 0
+
+metrics.gauge(
+    'microbatch_queue_depth', 'Images waiting in the micro-batching queue',
+    callback=batcher_queue_depth)
+
+def cache_events():
+    if prediction_cache is None:
+        return {}
+    stats = prediction_cache.stats()
+    return {(event,): stats[event] for event in ('hits', 'disk_hits', 'misses', 'evictions', 'disk_evictions', 'expirations', 'invalidations')}
+
+metrics.counter(
+    'prediction_cache_events_total', 'Prediction cache lookups and maintenance events', ['event'],
+    callback=cache_events)
+
+def near_duplicate_events():
+    if engine.near_duplicates is None:
+        return {}
+    stats = engine.near_duplicates.stats()
+    return {(event,): stats[event] for event in ('hits', 'exact_hits', 'misses', 'evictions', 'invalidations')}
+
+metrics.counter(
+    'near_duplicate_cache_events_total', 'Near-duplicate (perceptual hash) cache lookups and maintenance events', ['event'],
+    callback=near_duplicate_events)
+
+metrics.counter(
+    'tta_images_total', 'Images re-scored with test-time augmentation',
+    callback=lambda: tta.applied if tta is not None else 0)
+
+def admission_requests():
+    if admission is None:
+        return {}
+    stats = admission.stats()
+    counts = {('admitted', priority): count for priority, count in stats['admitted'].items()}
+    for reason in REJECTION_REASONS:
+        for priority, count in stats['rejected'][reason].items():
+            counts[(reason, priority)] = count
+    return counts
+
+metrics.counter(
+    'admission_requests_total', 'Requests admitted or rejected by admission control', ['outcome', 'priority'],
+    callback=admission_requests)
+metrics.gauge(
+    'admission_queue_depth', 'Requests waiting for an admission slot', ['priority'],
+    callback=lambda: {(priority,): depth for priority, depth in admission.stats()['queue_depth'].items()} if admission else {})
+
+def process_memory_bytes(field):
+    return lambda: process_memory().get(field, 0)
+
+metrics.gauge(
+    'process_resident_memory_bytes', 'Resident set size (RSS) of this worker',
+    callback=process_memory_bytes('rss_bytes'))
+metrics.gauge(
+    'process_proportional_memory_bytes', 'Proportional set size (PSS) of this worker, shared pages divided among processes',
+    callback=process_memory_bytes('pss_bytes'))
+
+def observe_trace(trace):
+    """
+    Masukkan durasi stage, ukuran upload dan dimensi gambar dari trace ke metrics
+    """
+    for stage in STAGES:
+        if stage in trace:
+            stage_seconds.labels(stage).observe(trace[stage])
+    if 'upload_bytes' in trace:
+        upload_bytes.observe(trace['upload_bytes'])
+    if 'image_size' in trace:
+        width, height = trace['image_size']
+        image_dimension.labels('width').observe(width)
+        image_dimension.labels('height').observe(height)
+
+def server_timing(trace, total):
     """
-    Preprocess image untuk model TensorFlow Lite
+    Nilai header Server-Timing (milidetik) dari trace satu request
     """
+    parts = [f'{stage};dur={trace[stage] * 1000:.3f}' for stage in STAGES if stage in trace]
+    if trace.get('cache_hit'):
+        parts.append('cache;desc="hit"')
+    elif 'near_duplicate_distance' in trace:
+        parts.append(f'cache;desc="near-duplicate, distance {trace["near_duplicate_distance"]}"')
+    parts.append(f'total;dur={total * 1000:.3f}')
+    return ', '.join(parts)
+
+warmup_seconds = metrics.gauge('warmup_duration_seconds', 'Duration of the last startup warm-up')
+metrics.gauge('ready', 'Whether startup warm-up has finished', callback=lambda: warmup_state['ready'])
+warmup_state = {'ready': False, 'duration_seconds': None, 'batch_sizes': [], 'codecs': {}, 'error': None}
+
+def run_warmup():
+    """
+    Warm-up versi model aktif dan codec gambar, lalu tandai service siap
+
+    Per ukuran batch semua interpreter dipinjam dari pool sekaligus, jadi aman
+    walaupun request sudah mulai masuk (lihat InferenceEngine.warmup).
+    Jika warm-up gagal, service tetap ditandai siap dan error-nya dilaporkan.
+    """
+    start = time.perf_counter()
+    model = model_registry.active
     try:
-        # Buka image dari file
-        image = Image.open(io.BytesIO(image_file.read()))
-        
-        # Convert ke RGB jika perlu
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize sesuai input model (biasanya 224x224 untuk model klasifikasi)
-        input_shape = input_details[0]['shape']
-        height, width = input_shape[1], input_shape[2]
-        image = image.resize((width, height))
-        
-        # Convert ke numpy array dan normalize
-        image_array = np.array(image, dtype=np.float32)
-        image_array = image_array / 255.0  # Normalize ke range [0, 1]
-        
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
-        
-        return image_array
+        engine.warmup(model)
+        warmup_state['batch_sizes'] = engine.warmup_batch_sizes(model)
+        warmup_state['codecs'] = warmup_codecs(IMAGE_FORMATS)
     except Exception as e:
-        raise ValueError(f"Error preprocessing image: {str(e)}")
+        warmup_state['error'] = f"{type(e).__name__}: {e}"
+
+    duration = time.perf_counter() - start
+    warmup_seconds.set(duration)
+    warmup_state['duration_seconds'] = round(duration, 4)
+    warmup_state['ready'] = True
+
+def start_warmup(background=True):
+    """
+    Mulai warm-up; /ready mengembalikan 503 sampai selesai
+    """
+    warmup_state.update(ready=False, duration_seconds=None, error=None)
+    if not warmup_enabled:
+        warmup_state['ready'] = True
+    elif background:
+        threading.Thread(target=run_warmup, name='warmup', daemon=True).start()
+    else:
+        run_warmup()
+
+start_warmup()
+
+def status_outcome(status_code):
+    """
+    Outcome untuk requests_total jika endpoint tidak menentukan sendiri
+    """
+    if status_code >= 500:
+        return 'server_error'
+    if status_code >= 400:
+        return 'client_error'
+    return 'ok'
+
+def init_worker(worker_pool_size=None, worker_num_threads=None):
+    """
+    Bangun ulang interpreter pool, scheduler dan executor di proses worker
+
+    Dipanggil oleh run.py setelah fork: interpreter dan thread milik proses
+    parent tidak aman dipakai di child. model_content dan labels setiap versi
+    di registry tetap dipakai bersama (mmap / copy-on-write).
+    """
+    global admission, decode_executor, pool_size, num_threads, warmup_enabled, model_watch_interval
+
+    engine.reinitialize(worker_pool_size, worker_num_threads)
+    pool_size, num_threads = engine.pool_size, engine.num_threads
+    decode_executor = create_decode_executor()
+    admission = create_admission()
+
+    # Master tidak menjalankan warm-up dan watcher model (lihat run.py), baca ulang konfigurasinya di sini
+    model_watch_interval = env_float('MODEL_WATCH_INTERVAL', 0.0)
+    if model_watch_interval > 0:
+        model_registry.watch(model_path, labels_path, model_watch_interval)
+    warmup_enabled = env_bool('WARMUP_ENABLED', True)
+    start_warmup()
+
+def preprocess_image(image_file, out=None, trace=None, model=None):
+    """
+    Preprocess image untuk model TensorFlow Lite (lihat InferenceEngine.preprocess)
+    Hasil ditulis ke out (shape input model) atau ke buffer per thread yang dipakai ulang
+    trace: dict opsional untuk durasi per stage (lihat observe_trace)
+    model: ModelVersion yang dipakai request ini (default: versi aktif)
+    """
+    return engine.preprocess(image_file, out=out, trace=trace, model=model)
+
+def preprocess_tensor(data, kind, shape=None, dtype=None, out=None, trace=None, model=None):
+    """
+    Ubah tensor mentah dari client ke input model (lihat InferenceEngine.preprocess_tensor)
+    """
+    return engine.preprocess_tensor(data, kind, shape, dtype, out=out, trace=trace, model=model)
+
+def predict_disease(image_array, trace=None, model=None):
+    """
+    Prediksi penyakit menggunakan model TensorFlow Lite (lihat InferenceEngine.infer)
+    Return: (predicted_class, confidence, predictions)
+    """
+    return engine.infer(image_array, trace=trace, model=model)
+
+def predict_batch(image_arrays, trace=None, model=None):
+    """
+    Prediksi banyak gambar sekaligus dengan batched invoke() (lihat InferenceEngine.infer_batch)
+    """
+    return engine.infer_batch(image_arrays, trace=trace, model=model)
+
+def build_detection_result(predicted_class, confidence, all_predictions, model=None, k=DEFAULT_TOP_K, full=False):
+    """
+    Susun response deteksi (format yang sama untuk /detect dan /detect/batch)
+    Setiap response membawa versi dan hash model yang menghasilkannya
+    k: jumlah top_predictions, full: sertakan vektor probabilitas lengkap
+    """
+    return engine.result((predicted_class, confidence, all_predictions), model).to_dict(k, full)
 
-def predict_disease(image_array):
+def encode_detection(result, options):
     """
-    Prediksi penyakit menggunakan model TensorFlow Lite
+    Serialisasi Result sesuai response_options
+    Return: bytes body
+    """
+    content_type, k, full = options
+    return result.encode(content_type, k=k, full=full)
+
+def response_options(accept=None, k=None, full=None, model=None):
+    """
+    Format response /detect dari header Accept dan query parameter k / full
+    Return: ((content_type, k, full), None), atau (None, (body, status)) jika tidak valid
+    """
+    model = model or model_registry.active
+    content_type = JSON_TYPE
+    if accept:
+        content_type = parse_accept_header(accept, MIMEAccept).best_match(response_types())
+    if content_type is None:
+        return None, ({
+            'error': 'Not acceptable',
+            'message': f'Accept header {accept!r} cannot be satisfied',
+            'supported_types': response_types()
+        }, 406)
+
+    if k is None or k == '':
+        k = DEFAULT_TOP_K
+    else:
+        try:
+            k = int(k)
+        except ValueError:
+            k = -1
+        if not 0 <= k <= len(model.labels):
+            return None, ({
+                'error': 'Invalid parameter',
+                'message': f'k must be an integer between 0 and {len(model.labels)}'
+            }, 400)
+
+    full = (full or '').strip().lower() in {'1', 'true', 'yes', 'on'}
+    return (content_type, k, full), None
+
+def image_rejection(error):
+    """
+    Body response terstruktur dan status code untuk gambar yang ditolak sebelum decode
+    (lihat InferenceEngine.image_rejection)
+    """
+    return engine.image_rejection(error)
+
+def tensor_rejection(error, model=None):
+    """
+    Body response dan status code untuk input tensor yang tidak cocok dengan model
+    """
+    model = model or model_registry.active
+    return {
+        'error': 'Invalid tensor',
+        'message': str(error),
+        'expected_shape': [int(d) for d in model.input_details[0]['shape']],
+        'supported_dtypes': list(SUPPORTED_DTYPES)
+    }, 400
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def archive_members(file):
+    """
+    (nama, ukuran asli, read) untuk setiap file di archive zip/tar, satu per satu
+    Archive dibaca langsung dari stream upload; isi member baru dibaca saat read() dipanggil
+    """
+    if file.filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(file.stream) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    # ZipExtFile berhenti di file_size, jadi header yang berbohong tidak bisa membaca lebih
+                    yield info.filename, info.file_size, functools.partial(archive.read, info)
+    else:
+        with tarfile.open(fileobj=file.stream, mode='r:*') as archive:
+            for info in archive:
+                if info.isfile():
+                    yield info.name, info.size, archive.extractfile(info).read
+
+def upload_entries(uploads):
+    """
+    (nama, stream) untuk setiap file upload dan setiap member archive, satu per satu
+
+    Member archive baru diekstrak saat iterasi sampai ke member itu. Ukuran asli
+    dicek sebelum dibaca: member di atas MAX_CONTENT_LENGTH dilewati, dan total
+    semua member dalam satu request dibatasi BATCH_MAX_UNCOMPRESSED_BYTES; setelah
+    habis, archive berikutnya tidak diekstrak lagi (proteksi zip bomb).
+    Error dikembalikan sebagai (nama, Exception) supaya bisa dilaporkan per file.
+    """
+    remaining = batch_max_uncompressed_bytes
+    for upload in uploads:
+        if not is_archive(upload.filename):
+            yield upload.filename, upload.stream
+            continue
+        try:
+            for name, size, read in archive_members(upload):
+                if size > max_content_length:
+                    yield name, ImageTooLarge(
+                        f'Archive member is {size} bytes uncompressed, maximum is {max_content_length} bytes')
+                    continue
+                if size > remaining:
+                    yield name, ImageTooLarge(
+                        f'Archive members exceed {batch_max_uncompressed_bytes} bytes uncompressed in total, '
+                        f'remaining members were not extracted')
+                    remaining = 0
+                    break
+                remaining -= size
+                yield name, io.BytesIO(read())
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            yield upload.filename, ValueError(f"Invalid archive: {str(e)}")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.trace = {}
+    requests_in_flight.labels(request.endpoint or 'unmatched').inc()
+    if profiler is not None and request.endpoint in PROFILED_ENDPOINTS:
+        g.profile = profiler.begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Catat outcome, durasi request dan stage; tambahkan Server-Timing jika diminta
+    """
+    total = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or 'unmatched'
+
+    # Outcome deteksi hanya berlaku untuk response sukses
+    outcome = g.get('outcome') if response.status_code < 400 else None
+    requests_total.labels(endpoint, outcome or status_outcome(response.status_code)).inc()
+    request_seconds.labels(endpoint).observe(total)
+    observe_trace(g.trace)
+
+    if server_timing_enabled or request.headers.get('X-Server-Timing') == '1':
+        response.headers['Server-Timing'] = server_timing(g.trace, total)
+    return response
+
+@app.teardown_request
+def finish_request(exc=None):
+    requests_in_flight.labels(request.endpoint or 'unmatched').dec()
+    if g.get('profile') is not None:
+        profiler.end_request(g.profile)
+
+def request_priority(value, default):
+    """
+    Kelas prioritas dari header X-Priority (default per endpoint)
+    """
+    priority = (value or default).strip().lower()
+    if priority not in PRIORITIES:
+        raise ValueError(f"X-Priority must be one of: {', '.join(PRIORITIES)}")
+    return priority
+
+def request_deadline(deadline=None, timeout_ms=None):
+    """
+    Deadline client sebagai waktu time.monotonic(), atau None
+
+    deadline: X-Request-Deadline, unix epoch dalam detik
+    timeout_ms: X-Request-Timeout-Ms, relatif terhadap saat request diterima
     """
     try:
-        # Set input tensor
-        interpreter.set_tensor(input_details[0]['index'], image_array)
-        
-        # Run inference
-        interpreter.invoke()
-        
-        # Get output
-        output_data = interpreter.get_tensor(output_details[0]['index'])
-        predictions = output_data[0]
-        
-        # Get predicted class dan confidence
-        predicted_class = np.argmax(predictions)
-        confidence = float(predictions[predicted_class])
-        
-        return predicted_class, confidence, predictions
-    except Exception as e:
-        raise ValueError(f"Error during prediction: {str(e)}")
+        if deadline:
+            return time.monotonic() + float(deadline) - time.time()
+        if timeout_ms:
+            return time.monotonic() + float(timeout_ms) / 1000.0
+    except ValueError:
+        raise ValueError('X-Request-Deadline / X-Request-Timeout-Ms must be numbers') from None
+    return None
+
+def client_id(remote_addr, forwarded_for=None, client=None, client_key=None):
+    """
+    Identitas client untuk rate limit
+
+    X-Client-Id hanya dipakai jika X-Client-Key cocok (ADMISSION_CLIENT_KEYS).
+    Selain itu alamat client: dari X-Forwarded-For hanya di belakang
+    ADMISSION_TRUSTED_PROXIES proxy (hop ke-N dari kanan, seperti ProxyFix),
+    karena header dari client sendiri bisa diganti setiap request.
+    """
+    if client and client_key:
+        expected = admission_client_keys.get(client)
+        if expected is not None and hmac.compare_digest(client_key.encode('utf-8'), expected.encode('utf-8')):
+            return f'client:{client}'
+    if admission_trusted_proxies > 0 and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',')]
+        if len(hops) >= admission_trusted_proxies and hops[-admission_trusted_proxies]:
+            return hops[-admission_trusted_proxies]
+    return remote_addr
+
+def admission_rejection(error):
+    """
+    (body, status, headers) untuk request yang ditolak admission control
+    """
+    body = {
+        'error': error.error,
+        'message': str(error),
+        'reason': error.reason,
+    }
+    headers = {}
+    if error.retry_after is not None:
+        body['retry_after'] = round(error.retry_after, 3)
+        headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+    return body, error.status, headers
+
+def admitted(default_priority):
+    """
+    Jalankan view setelah mendapat slot dari admission control
+
+    Request menunggu slot sebelum body-nya di-parse dan di-decode. /health,
+    /ready dan /metrics tidak memakai ini, jadi tidak pernah mengantre di
+    belakang inference.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = admission
+            if controller is None:
+                return view(*args, **kwargs)
+            try:
+                priority = request_priority(request.headers.get('X-Priority'), default_priority)
+                deadline = request_deadline(request.headers.get('X-Request-Deadline'),
+                                            request.headers.get('X-Request-Timeout-Ms'))
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid request header',
+                    'message': str(e)
+                }), 400
+            start = time.perf_counter()
+            try:
+                client = client_id(request.remote_addr, request.headers.get('X-Forwarded-For'),
+                                   request.headers.get('X-Client-Id'), request.headers.get('X-Client-Key'))
+                ticket = controller.wait(controller.enter(client, priority, deadline))
+            except AdmissionRejected as e:
+                body, status, headers = admission_rejection(e)
+                return jsonify(body), status, headers
+            finally:
+                g.trace['admission'] = time.perf_counter() - start
+            g.admission = (controller, ticket)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release(ticket)
+        return wrapper
+    return decorator
+
+def deadline_rejection():
+    """
+    Response 504 jika deadline client sudah lewat, dicek tepat sebelum decode; selain itu None
+    """
+    if 'admission' not in g:
+        return None
+    controller, ticket = g.admission
+    try:
+        controller.check_deadline(ticket)
+    except AdmissionRejected as e:
+        body, status, headers = admission_rejection(e)
+        return jsonify(body), status, headers
+    return None
+
+def detection_response(result):
+    """
+    Response hasil deteksi dalam format yang dinegosiasikan (g.response_options),
+    dengan durasi serialisasi dan outcome tercatat
+    """
+    start = time.perf_counter()
+    response = app.response_class(encode_detection(result, g.response_options), mimetype=g.response_options[0])
+    response.vary.add('Accept')
+    g.trace['serialize'] = time.perf_counter() - start
+    g.outcome = 'detected' if result.detected else 'not_detected'
+    return response
+
+def predict_response(predict, rejection):
+    """
+    Jalankan predict() milik engine dan ubah error-nya ke response JSON
+    rejection(error) -> (body, status) untuk input yang ditolak sebelum inference
+    """
+    expired = deadline_rejection()
+    if expired is not None:
+        return expired
+    try:
+        result = predict()
+    except (ImageTooLarge, UnsupportedImageFormat, InvalidTensor) as e:
+        body, status = rejection(e)
+        return jsonify(body), status
+    except PreprocessingError as e:
+        return jsonify({
+            'error': 'Image preprocessing failed',
+            'message': str(e)
+        }), 400
+    except PoolTimeoutError as e:
+        return jsonify({
+            'error': 'Server busy',
+            'message': str(e)
+        }), 503
+    except PredictionError as e:
+        return jsonify({
+            'error': 'Prediction failed',
+            'message': str(e)
+        }), 500
+
+    return detection_response(result)
+
+def detect_tensor(kind, file=None):
+    """
+    /detect untuk input tensor mentah: langsung ke interpreter tanpa Pillow
+    Body request (atau file .npy) dibaca sekali; array input adalah view ke bytes tersebut
+    """
+    model = model_registry.active
+    shape = request.headers.get('X-Tensor-Shape')
+    dtype = request.headers.get('X-Tensor-Dtype')
+    data = file.read() if file is not None else request.get_data(cache=False)
+    return predict_response(
+        lambda: engine.predict_tensor(data, kind, shape, dtype, trace=g.trace, model=model),
+        lambda e: tensor_rejection(e, model)
+    )
 
 @app.route('/detect', methods=['POST'])
+@admitted('interactive')
 def detect_disease():
     """
     API endpoint untuk deteksi penyakit kentang
-    Input: file gambar melalui form-data dengan key 'file'
-    Output: JSON dengan label dan persentase confidence
+    Input: file gambar melalui form-data dengan key 'file', atau tensor mentah
+        (application/octet-stream / application/x-npy / file .npy) dengan shape input model
+    Output: JSON dengan label dan persentase confidence; header Accept bisa memilih
+        MessagePack atau layout biner (inference/responses.py), query parameter
+        k = jumlah top_predictions dan full=1 = vektor probabilitas lengkap
     """
     try:
+        options, rejection = response_options(request.headers.get('Accept'), request.args.get('k'), request.args.get('full'))
+        if rejection is not None:
+            body, status = rejection
+            return jsonify(body), status
+        g.response_options = options
+
+        # Tensor mentah di body request, dari client yang sudah resize sendiri
+        tensor_kind = TENSOR_CONTENT_TYPES.get(request.mimetype)
+        if tensor_kind is not None:
+            return detect_tensor(tensor_kind)
+
         # Check apakah ada file dalam request
         if 'file' not in request.files:
             return jsonify({
@@ -106,95 +783,193 @@ def detect_disease():
                 'message': 'Please select a file to upload'
             }), 400
         
-        # Check file extension
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
-        file_extension = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
+        if file_extension(file.filename) in TENSOR_EXTENSIONS:
+            return detect_tensor('npy', file)
         
-        if file_extension not in allowed_extensions:
+        # Check file extension
+        if file_extension(file.filename) not in ALLOWED_EXTENSIONS:
             return jsonify({
                 'error': 'Invalid file type',
-                'message': f'Allowed file types: {", ".join(allowed_extensions)}'
+                'message': f'Allowed file types: {", ".join(ALLOWED_EXTENSIONS)}'
             }), 400
         
-        # Preprocess image
-        try:
-            image_array = preprocess_image(file)
-        except ValueError as e:
+        # Versi model untuk seluruh request ini, swap di tengah jalan tidak berpengaruh
+        model = model_registry.active
+
+        # Hash dihitung per chunk langsung dari stream upload, lalu stream yang
+        # sama di-decode; isi file tidak pernah disalin utuh ke bytes
+        return predict_response(
+            lambda: engine.predict(file.stream, trace=g.trace, model=model),
+            image_rejection
+        )
+
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+@app.route('/detect/batch', methods=['POST'])
+@admitted('bulk')
+def detect_disease_batch():
+    """
+    API endpoint untuk deteksi banyak gambar dalam satu request
+    Input: beberapa file dengan key 'file' (multipart), atau archive zip/tar
+    Output: JSON dengan array hasil per file, format sama seperti /detect
+    """
+    try:
+        uploads = [f for f in request.files.getlist('file') if f.filename != '']
+        if not uploads:
             return jsonify({
-                'error': 'Image preprocessing failed',
-                'message': str(e)
+                'error': 'No file provided',
+                'message': 'Please upload image files or an archive with key "file"'
             }), 400
         
-        # Predict
-        try:
-            predicted_class, confidence, all_predictions = predict_disease(image_array)
-        except ValueError as e:
-            return jsonify({
-                'error': 'Prediction failed',
-                'message': str(e)
-            }), 500
-        
-        # Set threshold untuk deteksi (misalnya 0.5 atau 50%)
-        threshold = 0.5
-        
-        if confidence < threshold:
-            return jsonify({
-                'detected': False,
-                'message': 'Penyakit tidak terdeteksi',
-                'confidence': f"{confidence * 100:.2f}%"
-            })
-        
-        # Return hasil prediksi
-        label = labels[predicted_class]
-        percentage = f"{confidence * 100:.2f}%"
+        filenames = []
+        results = []
+        model = model_registry.active
+        input_details = model.input_details
         
-        # Get top 3 predictions untuk informasi tambahan
-        top_3_indices = np.argsort(all_predictions)[-3:][::-1]
-        top_3_predictions = []
+        def decode(filename, stream):
+            if isinstance(stream, Exception):
+                raise stream
+            if file_extension(filename) not in ALLOWED_EXTENSIONS:
+                raise ValueError(f'Invalid file type, allowed file types: {", ".join(ALLOWED_EXTENSIONS)}')
+            # Setiap file punya buffer sendiri karena thread decode dipakai ulang
+            out = np.empty(tuple(input_details[0]['shape']), dtype=input_details[0]['dtype'])
+            # Trace per file (decode berjalan paralel), dicatat langsung ke metrics
+            trace = {'upload_bytes': stream.seek(0, io.SEEK_END)}
+            stream.seek(0)
+            image_array = preprocess_image(stream, out=out, trace=trace, model=model)
+            observe_trace(trace)
+            return image_array
         
-        for idx in top_3_indices:
-            top_3_predictions.append({
-                'label': labels[idx],
-                'confidence': f"{all_predictions[idx] * 100:.2f}%"
-            })
-        
-        return jsonify({
-            'detected': True,
-            'label': label,
-            'percentage': percentage,
-            'confidence': confidence,
-            'top_predictions': top_3_predictions
+        # Error per file tidak menggagalkan batch
+        decoded = []
+        def collect(i, future):
+            try:
+                decoded.append((i, future.result()))
+            except (ImageTooLarge, UnsupportedImageFormat) as e:
+                results[i] = {'filename': filenames[i], **image_rejection(e)[0]}
+            except ValueError as e:
+                results[i] = {
+                    'filename': filenames[i],
+                    'error': 'Image preprocessing failed',
+                    'message': str(e)
+                }
+
+        def abandon(response):
+            for _, future in in_flight:
+                future.cancel()
+            return response
+
+        # Entry diproses satu per satu: cek cache, lalu decode secara paralel. Paling banyak
+        # DECODE_WORKERS entry menunggu decode, jadi member archive yang sudah diekstrak di
+        # memori tidak bertambah dengan jumlah member
+        cache_keys = {}
+        in_flight = deque()
+        for filename, stream in upload_entries(uploads):
+            if len(filenames) >= batch_max_files:
+                return abandon((jsonify({
+                    'error': 'Too many files',
+                    'message': f'Maximum {batch_max_files} images per request'
+                }), 413))
+            i = len(filenames)
+            filenames.append(filename)
+            results.append(None)
+
+            if prediction_cache is not None and not isinstance(stream, Exception):
+                cache_keys[i] = engine.source_key(stream)
+                cached = engine.lookup(cache_keys[i], model)
+                if cached is not None:
+                    results[i] = {'filename': filename, **cached.to_dict()}
+                    continue
+
+            expired = deadline_rejection()
+            if expired is not None:
+                return abandon(expired)
+            if len(in_flight) >= decode_workers:
+                collect(*in_flight.popleft())
+            in_flight.append((i, decode_executor.submit(decode, filename, stream)))
+        while in_flight:
+            collect(*in_flight.popleft())
+
+        # Predict semua gambar yang berhasil di-decode sebagai batch
+        if decoded:
+            try:
+                predictions = predict_batch([image_array for _, image_array in decoded], trace=g.trace, model=model)
+            except PoolTimeoutError as e:
+                return jsonify({
+                    'error': 'Server busy',
+                    'message': str(e)
+                }), 503
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Prediction failed',
+                    'message': str(e)
+                }), 500
+
+            for (i, _), prediction in zip(decoded, predictions):
+                result = engine.result(prediction, model)
+                engine.remember(cache_keys.get(i), result)
+                results[i] = {'filename': filenames[i], **result.to_dict()}
+
+        start = time.perf_counter()
+        response = jsonify({
+            'count': len(results),
+            'results': results
         })
+        g.trace['serialize'] = time.perf_counter() - start
+        return response
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         return jsonify({
             'error': 'Internal server error',
             'message': str(e)
         }), 500
 
-@app.route('/health', methods=['GET'])
-def health_check():
+def health_payload():
     """
-    Health check endpoint
+    Isi response /health (dipakai juga oleh asgi_app.py)
     """
-    return jsonify({
+    model = model_registry.active
+    return {
         'status': 'healthy',
         'message': 'Potato disease detection API is running',
+        'ready': warmup_state['ready'],
         'model_loaded': os.path.exists(model_path),
-        'labels_loaded': os.path.exists(labels_path)
-    })
+        'model_variant': model_variant,
+        'model_version': model.version,
+        'model_hash': model.fingerprint,
+        'labels_loaded': os.path.exists(labels_path),
+        **engine.stats(),
+        'admission': admission.stats() if admission is not None else {'enabled': False},
+        'profiling': profiler.status() if profiler is not None else {'enabled': False}
+    }
 
-@app.route('/', methods=['GET'])
-def home():
+def ready_payload():
     """
-    Home endpoint dengan informasi API
+    Isi response /ready dan status code-nya (dipakai juga oleh asgi_app.py)
     """
-    return jsonify({
+    return {'ready': warmup_state['ready'], 'warmup': warmup_state}, 200 if warmup_state['ready'] else 503
+
+def api_info_payload():
+    """
+    Isi response / (dipakai juga oleh asgi_app.py)
+    """
+    return {
         'message': 'Potato Disease Detection API',
         'version': '1.0.0',
         'endpoints': {
             '/detect': 'POST - Upload image for disease detection',
+            '/detect/batch': 'POST - Upload multiple images or a zip/tar archive',
             '/health': 'GET - Health check',
+            '/ready': 'GET - Readiness check (503 until warm-up finishes)',
+            '/metrics': 'GET - Prometheus metrics',
             '/': 'GET - API information'
         },
         'usage': {
@@ -202,10 +977,281 @@ def home():
             'method': 'POST',
             'content_type': 'multipart/form-data',
             'file_key': 'file',
-            'supported_formats': ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp']
+            'supported_formats': ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'],
+            'tensor_input': {
+                'content_types': list(TENSOR_CONTENT_TYPES),
+                'headers': ['X-Tensor-Shape', 'X-Tensor-Dtype'],
+                'shape': [int(d) for d in model_registry.active.input_details[0]['shape']],
+                'dtypes': list(SUPPORTED_DTYPES)
+            },
+            'response_types': response_types(),
+            'query_parameters': {
+                'k': f'Number of top_predictions (default {DEFAULT_TOP_K})',
+                'full': '1 to include the full probability vector'
+            }
         }
+    }
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """
+    Health check endpoint
+    """
+    return jsonify(health_payload())
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness endpoint: 200 setelah warm-up selesai, 503 sebelumnya
+    """
+    payload, status = ready_payload()
+    return jsonify(payload), status
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Metrics dalam format teks Prometheus
+    """
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """
+    Body request melebihi MAX_CONTENT_LENGTH
+    """
+    return jsonify({
+        'error': 'File too large',
+        'message': f'Maximum request size is {max_content_length} bytes',
+        'max_bytes': max_content_length
+    }), 413
+
+def admin_denied():
+    """
+    None jika request membawa ADMIN_TOKEN yang benar, selain itu response error
+    Endpoint admin tidak ada (404) jika ADMIN_TOKEN tidak di-set
+    """
+    if admin_token is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Admin endpoints are disabled, set ADMIN_TOKEN to enable them'
+        }), 404
+
+    supplied = request.headers.get('Authorization', '')
+    supplied = supplied[len('Bearer '):] if supplied.startswith('Bearer ') else request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), admin_token.encode('utf-8')):
+        return jsonify({
+            'error': 'Forbidden',
+            'message': 'Invalid admin token'
+        }), 403
+    return None
+
+def model_file(name, default):
+    """
+    Path file di direktori model/ (nama relatif), tidak boleh keluar dari direktori itu
+    """
+    if not name:
+        return default
+    model_dir = os.path.realpath(os.path.dirname(model_path))
+    path = os.path.realpath(os.path.join(model_dir, name))
+    if os.path.commonpath([model_dir, path]) != model_dir:
+        raise ValueError(f'{name} is outside the model directory')
+    return path
+
+@app.route('/admin/model', methods=['GET'])
+def admin_model_info():
+    """
+    Versi model aktif, versi sebelumnya dan statistik reload
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    return jsonify(model_registry.stats())
+
+@app.route('/admin/model/reload', methods=['POST'])
+def admin_model_reload():
+    """
+    Muat model baru (default: file model dan labels saat ini) lalu swap
+    Body JSON opsional: {"model": "nama.tflite", "labels": "labels.txt", "version": "...", "force": false}
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+
+    body = request.get_json(silent=True) or {}
+    try:
+        new_model_path = model_file(body.get('model'), model_path)
+        new_labels_path = model_file(body.get('labels'), labels_path)
+    except ValueError as e:
+        return jsonify({
+            'error': 'Invalid model path',
+            'message': str(e)
+        }), 400
+
+    previous = model_registry.active
+    try:
+        model = model_registry.load(
+            new_model_path, new_labels_path,
+            version=body.get('version'), force=bool(body.get('force'))
+        )
+    except ModelLoadInProgress as e:
+        return jsonify({
+            'error': 'Reload in progress',
+            'message': str(e)
+        }), 409
+    except ModelLoadError as e:
+        return jsonify({
+            'error': 'Model load failed',
+            'message': str(e)
+        }), 500
+
+    return jsonify({
+        'swapped': model is not previous,
+        'active': model.info(),
+        'previous': model_registry.previous.info() if model_registry.previous is not None else None
     })
 
+@app.route('/admin/memory', methods=['GET'])
+def admin_memory():
+    """
+    RSS / PSS worker ini dan mapping file model (membaca /proc/self/smaps, tidak untuk di-poll sering)
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    return jsonify(engine.memory_stats())
+
+@app.route('/admin/model/rollback', methods=['POST'])
+def admin_model_rollback():
+    """
+    Kembali ke versi model sebelumnya (tanpa memuat ulang)
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+
+    try:
+        model = model_registry.rollback()
+    except ModelLoadError as e:
+        return jsonify({
+            'error': 'Rollback failed',
+            'message': str(e)
+        }), 409
+
+    return jsonify({
+        'active': model.info(),
+        'previous': model_registry.previous.info()
+    })
+
+def profiling_denied():
+    """
+    Seperti admin_denied(), ditambah 404 jika PROFILING_ENABLED tidak di-set
+    """
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    if profiler is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Profiling is disabled, set PROFILING_ENABLED=1 to enable it'
+        }), 404
+    return None
+
+def profile_download(capture, fmt):
+    """
+    Response file hasil capture dalam format fmt (default: collapsed / pstats sesuai mode)
+    """
+    try:
+        body, content_type, filename = profiler.export(capture, fmt or PROFILE_FORMATS[capture.mode][0])
+    except ProfilingError as e:
+        return jsonify({
+            'error': 'Invalid profile request',
+            'message': str(e)
+        }), 400
+    return body, 200, {
+        'Content-Type': content_type,
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    }
+
+@app.route('/admin/profile', methods=['GET'])
+def admin_profile_status():
+    """
+    Status capture yang berjalan dan capture terakhir
+    """
+    denied = profiling_denied()
+    if denied is not None:
+        return denied
+    return jsonify(profiler.status())
+
+@app.route('/admin/profile/start', methods=['POST'])
+def admin_profile_start():
+    """
+    Mulai capture window
+    Body JSON opsional: {"mode": "sampling" | "cprofile", "sample_rate": 0.1, "duration": 60,
+    "interval_ms": 5, "threads": "requests" | "all", "tracemalloc_frames": 0, "op_profile": false}
+    """
+    denied = profiling_denied()
+    if denied is not None:
+        return denied
+
+    body = request.get_json(silent=True) or {}
+    try:
+        capture = profiler.start(
+            mode=str(body.get('mode', 'sampling')),
+            sample_rate=float(body.get('sample_rate', 0.1)),
+            duration=float(body.get('duration', 60.0)),
+            interval_ms=float(body.get('interval_ms', 5.0)),
+            threads=str(body.get('threads', 'requests')),
+            tracemalloc_frames=int(body.get('tracemalloc_frames', 0)),
+            op_profile=bool(body.get('op_profile', False))
+        )
+    except (TypeError, ValueError) as e:
+        # Termasuk ProfilingError (turunan ValueError)
+        return jsonify({
+            'error': 'Invalid profile request',
+            'message': str(e)
+        }), 400
+    return jsonify(capture), 202
+
+@app.route('/admin/profile/stop', methods=['POST'])
+def admin_profile_stop():
+    """
+    Hentikan capture dan kirim hasilnya
+    Query: format=collapsed|speedscope|json (sampling) atau pstats|text|json (cprofile)
+    """
+    denied = profiling_denied()
+    if denied is not None:
+        return denied
+    try:
+        capture = profiler.stop()
+    except ProfilingError as e:
+        return jsonify({
+            'error': 'No profile',
+            'message': str(e)
+        }), 404
+    return profile_download(capture, request.args.get('format'))
+
+@app.route('/admin/profile/download', methods=['GET'])
+def admin_profile_download():
+    """
+    Hasil capture terakhir yang sudah selesai (format seperti /admin/profile/stop)
+    """
+    denied = profiling_denied()
+    if denied is not None:
+        return denied
+    if profiler.last is None:
+        return jsonify({
+            'error': 'No profile',
+            'message': 'No capture has finished yet'
+        }), 404
+    return profile_download(profiler.last, request.args.get('format'))
+
+@app.route('/', methods=['GET'])
+def home():
+    """
+    Home endpoint dengan informasi API
+    """
+    return jsonify(api_info_payload())
+
 if __name__ == '__main__':
     # Check apakah model dan labels file ada
     if not os.path.exists(model_path):
@@ -217,9 +1263,15 @@ if __name__ == '__main__':
         exit(1)
     
     print("Potato Disease Detection API Starting...")
-    print(f"Model loaded from: {model_path}")
+    print(f"Model loaded from: {model_path} (variant: {model_variant})")
+    print(f"Interpreter backend: {backend_name}")
     print(f"Labels loaded from: {labels_path}")
-    print(f"Available diseases: {', '.join(labels)}")
+    print(f"Model version: {model_registry.active.version} ({model_registry.active.fingerprint})")
+    print(f"Available diseases: {', '.join(model_registry.active.labels)}")
+    print(f"Interpreter pool: {pool_size} interpreter(s) x {num_threads} thread(s)")
+    batcher = model_registry.active.batcher
+    if batcher is not None:
+        print(f"Micro-batching: max {batcher.max_batch_size} images / {batcher.max_wait * 1000:.1f} ms")
     
     # Railway.com uses PORT environment variable
     port = int(os.environ.get('PORT', 8000))
@@ -0,0 +1,471 @@
+"""
+Async ASGI variant of Potato Disease Detection API
+
+Kontrak /detect (termasuk input tensor mentah), /health, /ready, /metrics dan /
+sama persis dengan app.py (Flask), tapi:
+- Body upload dibaca secara streaming (multipart di-parse incremental),
+  jadi upload lambat dari mobile tidak memblokir thread worker.
+- Decode dan inference dijalankan di executor terpisah yang ukurannya dibatasi.
+- Jika request yang sedang diproses melewati ASGI_MAX_IN_FLIGHT, request baru
+  langsung ditolak dengan 503 + Retry-After (backpressure), bukan ditumpuk.
+- Admission control yang sama dengan app.py (prioritas, rate limit per client,
+  deadline) ditunggu dengan await sebelum decode, tanpa memblokir event loop.
+
+Jalankan dengan:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import numpy as np
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+import app as api
+from inference.admission import AdmissionRejected
+from inference.config import env_int
+from inference.engine import tensor_cache_key
+from inference.pool import PoolTimeoutError
+from inference.preprocessing import ImageTooLarge, UnsupportedImageFormat
+from inference.tensors import InvalidTensor
+
+# Konfigurasi ASGI
+# ASGI_MAX_IN_FLIGHT: jumlah request /detect yang boleh diproses bersamaan
+# ASGI_RETRY_AFTER: nilai header Retry-After (detik) saat server penuh
+# ASGI_MAX_UPLOAD_BYTES: ukuran upload maksimum (default: MAX_CONTENT_LENGTH app.py)
+# ASGI_DECODE_WORKERS / ASGI_INFERENCE_WORKERS: ukuran executor
+max_in_flight = env_int('ASGI_MAX_IN_FLIGHT', 64)
+retry_after = env_int('ASGI_RETRY_AFTER', 1)
+max_upload_bytes = env_int('ASGI_MAX_UPLOAD_BYTES', api.max_content_length)
+
+decode_executor = ThreadPoolExecutor(
+    max_workers=env_int('ASGI_DECODE_WORKERS', os.cpu_count() or 1),
+    thread_name_prefix='asgi-decode'
+)
+inference_executor = ThreadPoolExecutor(
+    max_workers=env_int('ASGI_INFERENCE_WORKERS', api.engine.pool_size),
+    thread_name_prefix='asgi-inference'
+)
+
+in_flight = 0
+rejected = 0
+
+# Nama endpoint sama dengan endpoint Flask supaya label metrics konsisten
+ENDPOINTS = {
+    '/detect': 'detect_disease',
+    '/health': 'health_check',
+    '/ready': 'readiness_check',
+    '/metrics': 'metrics_endpoint',
+    '/': 'home',
+}
+
+api.metrics.gauge('asgi_in_flight', 'Requests being processed by the ASGI app', callback=lambda: in_flight)
+api.metrics.counter('asgi_rejected_total', 'Requests rejected by ASGI backpressure', callback=lambda: rejected)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def send_json(send, body, status=200, headers=None):
+    # Format sama dengan jsonify Flask (sort_keys, compact, newline di akhir)
+    payload = (json.dumps(body, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+    response_headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode('latin-1')),
+    ]
+    for name, value in (headers or {}).items():
+        response_headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def send_bytes(send, payload, content_type, status=200, headers=()):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', content_type.encode('latin-1')),
+        (b'content-length', str(len(payload)).encode('latin-1')),
+        *headers,
+    ]})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def send_text(send, text, content_type, status=200):
+    await send_bytes(send, text.encode('utf-8'), content_type, status)
+
+
+def instrument(scope, send, endpoint, trace):
+    """
+    Bungkus send: catat metrics saat response dimulai dan tambahkan
+    Server-Timing jika diminta (sama seperti after_request di app.py)
+    """
+    start = time.perf_counter()
+    wants_timing = api.server_timing_enabled or dict(scope['headers']).get(b'x-server-timing') == b'1'
+
+    async def send_instrumented(message):
+        if message['type'] == 'http.response.start':
+            total = time.perf_counter() - start
+            status = message['status']
+            outcome = trace.get('outcome') if status < 400 else None
+            api.requests_total.labels(endpoint, outcome or api.status_outcome(status)).inc()
+            api.request_seconds.labels(endpoint).observe(total)
+            api.observe_trace(trace)
+            if wants_timing:
+                timing = api.server_timing(trace, total).encode('latin-1')
+                message = {**message, 'headers': [*message['headers'], (b'server-timing', timing)]}
+        await send(message)
+
+    return send_instrumented
+
+
+async def read_upload(scope, receive):
+    """
+    Baca body multipart secara streaming dan ambil part dengan key 'file'
+
+    Return: (filename, bytes) atau (None, None) jika tidak ada part 'file'
+    """
+    headers = dict(scope['headers'])
+    content_type, options = parse_options_header(headers.get(b'content-type', b'').decode('latin-1'))
+    boundary = options.get('boundary')
+    if content_type != 'multipart/form-data' or not boundary:
+        return None, None
+
+    decoder = MultipartDecoder(boundary.encode('latin-1'), max_form_memory_size=max_upload_bytes)
+    filename = None
+    data = bytearray()
+    capturing = False
+    done = False
+
+    while not done:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError('Client disconnected')
+        more_body = message.get('more_body', False)
+        decoder.receive_data(message.get('body', b''))
+        if not more_body:
+            decoder.receive_data(None)
+
+        event = decoder.next_event()
+        while not isinstance(event, NeedData):
+            if isinstance(event, File):
+                capturing = event.name == 'file' and filename is None
+                if capturing:
+                    filename = event.filename
+            elif isinstance(event, Data):
+                if capturing:
+                    data += event.data
+                    if len(data) > max_upload_bytes:
+                        raise UploadTooLarge()
+                    if not event.more_data:
+                        capturing = False
+            elif isinstance(event, Epilogue):
+                done = True
+                break
+            event = decoder.next_event()
+
+        if not more_body:
+            done = True
+
+    return filename, bytes(data) if filename is not None else None
+
+
+async def read_body(receive):
+    """
+    Baca body request mentah (input tensor) dengan batas max_upload_bytes
+    """
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError('Client disconnected')
+        body += message.get('body', b'')
+        if len(body) > max_upload_bytes:
+            raise UploadTooLarge()
+        if not message.get('more_body', False):
+            return bytes(body)
+
+
+def decode_upload(data, trace, model):
+    """
+    Dijalankan di decode executor: cek cache lalu preprocess
+    Return: (cache_key, cached_result, image_array)
+    """
+    # Upload hanya di-hash jika prediction cache aktif (sama seperti InferenceEngine.predict)
+    cache_key = api.engine.source_key(data, trace) if api.engine.cache is not None else None
+    trace['upload_bytes'] = len(data)
+    cached = api.engine.lookup(cache_key, model, trace)
+    if cached is not None:
+        return cache_key, cached, None
+    # Buffer sendiri per request karena array berpindah ke executor inference
+    input_detail = model.input_details[0]
+    out = np.empty(tuple(input_detail['shape']), dtype=input_detail['dtype'])
+    return cache_key, None, api.preprocess_image(data, out=out, trace=trace, model=model)
+
+
+def decode_tensor(data, kind, shape, dtype, trace, model):
+    """
+    Seperti decode_upload, untuk input tensor mentah (tanpa Pillow)
+    """
+    if api.engine.cache is not None:
+        start = time.perf_counter()
+        cache_key = tensor_cache_key(data, kind, shape, dtype)
+        trace['read'] = time.perf_counter() - start
+    else:
+        cache_key = None
+    trace['upload_bytes'] = len(data)
+    cached = api.engine.lookup(cache_key, model, trace)
+    if cached is not None:
+        return cache_key, cached, None
+    input_detail = model.input_details[0]
+    out = np.empty(tuple(input_detail['shape']), dtype=input_detail['dtype'])
+    return cache_key, None, api.preprocess_tensor(data, kind, shape, dtype, out=out, trace=trace, model=model)
+
+
+async def send_detection(send, result, options, trace):
+    """
+    Kirim Result dalam format yang dinegosiasikan (lihat api.response_options)
+    """
+    start = time.perf_counter()
+    payload = api.encode_detection(result, options)
+    trace['serialize'] = time.perf_counter() - start
+    trace['outcome'] = 'detected' if result.detected else 'not_detected'
+    await send_bytes(send, payload, options[0], headers=[(b'vary', b'Accept')])
+
+
+async def detect(scope, receive, send, trace):
+    global in_flight, rejected
+
+    # Backpressure: tolak sebelum membaca body jika server sudah penuh
+    if in_flight >= max_in_flight:
+        rejected += 1
+        await send_json(send, {
+            'error': 'Server busy',
+            'message': f'Too many requests in flight (limit {max_in_flight}), retry later'
+        }, 503, {'Retry-After': retry_after})
+        return
+
+    in_flight += 1
+    controller, ticket = None, None
+    try:
+        headers = dict(scope['headers'])
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        options, rejection = api.response_options(
+            headers.get(b'accept', b'').decode('latin-1') or None,
+            query.get('k', [None])[0],
+            query.get('full', [None])[0]
+        )
+        if rejection is not None:
+            await send_json(send, *rejection)
+            return
+
+        def header(name):
+            return headers.get(name, b'').decode('latin-1') or None
+
+        # Deadline dihitung saat request diterima, sebelum body dibaca
+        try:
+            priority = api.request_priority(header(b'x-priority'), 'interactive')
+            deadline = api.request_deadline(header(b'x-request-deadline'), header(b'x-request-timeout-ms'))
+        except ValueError as e:
+            await send_json(send, {
+                'error': 'Invalid request header',
+                'message': str(e)
+            }, 400)
+            return
+        content_type, _ = parse_options_header(headers.get(b'content-type', b'').decode('latin-1'))
+        tensor_kind = api.TENSOR_CONTENT_TYPES.get(content_type)
+        try:
+            # Tolak dari header Content-Length sebelum body dibaca
+            content_length = headers.get(b'content-length')
+            if content_length is not None and int(content_length) > max_upload_bytes:
+                raise UploadTooLarge()
+            if tensor_kind is not None:
+                filename, data = None, await read_body(receive)
+            else:
+                filename, data = await read_upload(scope, receive)
+        except UploadTooLarge:
+            await send_json(send, {
+                'error': 'File too large',
+                'message': f'Maximum upload size is {max_upload_bytes} bytes',
+                'max_bytes': max_upload_bytes
+            }, 413)
+            return
+        except ConnectionError:
+            return
+
+        # Check apakah ada file dalam request
+        if tensor_kind is None and filename is None:
+            await send_json(send, {
+                'error': 'No file provided',
+                'message': 'Please upload an image file with key "file"'
+            }, 400)
+            return
+
+        # Check apakah file kosong
+        if tensor_kind is None and filename == '':
+            await send_json(send, {
+                'error': 'No file selected',
+                'message': 'Please select a file to upload'
+            }, 400)
+            return
+
+        if tensor_kind is None and api.file_extension(filename) in api.TENSOR_EXTENSIONS:
+            tensor_kind = 'npy'
+
+        # Check file extension
+        if tensor_kind is None and api.file_extension(filename) not in api.ALLOWED_EXTENSIONS:
+            await send_json(send, {
+                'error': 'Invalid file type',
+                'message': f'Allowed file types: {", ".join(api.ALLOWED_EXTENSIONS)}'
+            }, 400)
+            return
+
+        # Admission control (lihat app.admitted): slot decode + inference, ditolak sebelum decode
+        controller = api.admission
+        if controller is not None:
+            start = time.perf_counter()
+            try:
+                client = api.client_id((scope.get('client') or (None,))[0], header(b'x-forwarded-for'),
+                                       header(b'x-client-id'), header(b'x-client-key'))
+                ticket = await controller.wait_async(controller.enter(client, priority, deadline))
+            except AdmissionRejected as e:
+                body, status, extra_headers = api.admission_rejection(e)
+                await send_json(send, body, status, extra_headers)
+                return
+            finally:
+                trace['admission'] = time.perf_counter() - start
+
+        # Deadline bisa lewat selama menunggu slot; dicek lagi tepat sebelum decode
+        if ticket is not None:
+            try:
+                controller.check_deadline(ticket)
+            except AdmissionRejected as e:
+                body, status, extra_headers = api.admission_rejection(e)
+                await send_json(send, body, status, extra_headers)
+                return
+
+        loop = asyncio.get_running_loop()
+        # Versi model untuk seluruh request ini (lihat model_registry di app.py)
+        model = api.model_registry.active
+
+        # Preprocess image atau tensor (di luar event loop)
+        try:
+            if tensor_kind is not None:
+                cache_key, cached, image_array = await loop.run_in_executor(
+                    decode_executor, decode_tensor, data, tensor_kind,
+                    headers.get(b'x-tensor-shape', b'').decode('latin-1') or None,
+                    headers.get(b'x-tensor-dtype', b'').decode('latin-1') or None,
+                    trace, model
+                )
+            else:
+                cache_key, cached, image_array = await loop.run_in_executor(
+                    decode_executor, decode_upload, data, trace, model
+                )
+        except (ImageTooLarge, UnsupportedImageFormat) as e:
+            body, status = api.image_rejection(e)
+            await send_json(send, body, status)
+            return
+        except InvalidTensor as e:
+            body, status = api.tensor_rejection(e, model)
+            await send_json(send, body, status)
+            return
+        except ValueError as e:
+            await send_json(send, {
+                'error': 'Image preprocessing failed',
+                'message': str(e)
+            }, 400)
+            return
+
+        if cached is not None:
+            await send_detection(send, cached, options, trace)
+            return
+
+        # Predict (di luar event loop)
+        try:
+            prediction = await loop.run_in_executor(
+                inference_executor, api.predict_disease, image_array, trace, model
+            )
+        except PoolTimeoutError as e:
+            await send_json(send, {
+                'error': 'Server busy',
+                'message': str(e)
+            }, 503, {'Retry-After': retry_after})
+            return
+        except ValueError as e:
+            await send_json(send, {
+                'error': 'Prediction failed',
+                'message': str(e)
+            }, 500)
+            return
+
+        result = api.engine.result(prediction, model)
+        api.engine.remember(cache_key, result)
+        await send_detection(send, result, options, trace)
+
+    except Exception as e:
+        await send_json(send, {
+            'error': 'Internal server error',
+            'message': str(e)
+        }, 500)
+    finally:
+        in_flight -= 1
+        if ticket is not None:
+            controller.release(ticket)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            decode_executor.shutdown(wait=False)
+            inference_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """
+    ASGI entry point
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    path = scope['path'].rstrip('/') or '/'
+    method = scope['method']
+    trace = {}
+    send = instrument(scope, send, ENDPOINTS.get(path, 'unmatched'), trace)
+
+    if path == '/detect' and method == 'POST':
+        await detect(scope, receive, send, trace)
+    elif path == '/health' and method == 'GET':
+        await send_json(send, api.health_payload())
+    elif path == '/ready' and method == 'GET':
+        payload, status = api.ready_payload()
+        await send_json(send, payload, status)
+    elif path == '/metrics' and method == 'GET':
+        await send_text(send, api.metrics.render(), 'text/plain; version=0.0.4; charset=utf-8')
+    elif path == '/' and method == 'GET':
+        await send_json(send, api.api_info_payload())
+    elif path in ENDPOINTS:
+        await send_json(send, {
+            'error': 'Method not allowed',
+            'message': f'{method} is not allowed for {path}'
+        }, 405)
+    else:
+        await send_json(send, {
+            'error': 'Not found',
+            'message': f'{path} does not exist'
+        }, 404)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get('PORT', 8000))
+    uvicorn.run('asgi_app:app', host='0.0.0.0', port=port)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark preprocessing: jalur lama (full decode + resize + float32 copy)
+vs inference.preprocessing (JPEG draft, reducing_gap, normalisasi in-place)
+
+Gambar uji dibuat secara sintetis dalam ukuran besar (default 4032x3024,
+seperti foto ponsel 12 MP) untuk format JPEG, PNG dan WEBP. Selain waktu,
+script ini mengecek parity output model antara kedua jalur.
+
+Usage:
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --size 4032x3024 --iterations 10 --output bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inference.backends import load_backend  # noqa: E402
+from inference.preprocessing import preprocess_into, resample_filter  # noqa: E402
+from inference.stats import percentile  # noqa: E402
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'model', 'model_unquant.tflite')
+
+
+def legacy_preprocess(data, width, height):
+    """
+    Salinan preprocess_image sebelum modul inference.preprocessing
+    """
+    image = Image.open(io.BytesIO(data))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.resize((width, height))
+    image_array = np.array(image, dtype=np.float32)
+    image_array = image_array / 255.0
+    return np.expand_dims(image_array, axis=0)
+
+
+def synthetic_image(width, height, seed=0):
+    """
+    Gambar sintetis dengan gradien + noise supaya codec tidak terlalu mudah mengompres
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        (x * 255 // max(width - 1, 1)),
+        (y * 255 // max(height - 1, 1)),
+        ((x + y) * 255 // max(width + height - 2, 1)),
+    ], axis=-1).astype(np.int16)
+    noise = rng.integers(-24, 24, size=base.shape, dtype=np.int16)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), 'RGB')
+
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    options = {'quality': 90} if fmt in ('JPEG', 'WEBP') else {}
+    image.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def time_it(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+    }
+
+
+def load_interpreter(model_path):
+    _, Interpreter = load_backend(os.environ.get('INTERPRETER_BACKEND'))
+    interpreter = Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def run_model(interpreter, image_array):
+    interpreter.set_tensor(interpreter.get_input_details()[0]['index'], image_array)
+    interpreter.invoke()
+    return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])[0].copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark legacy vs fast preprocessing')
+    parser.add_argument('--size', default='4032x3024', help='Ukuran gambar uji WxH')
+    parser.add_argument('--input-size', default=None, help='Ukuran input model WxH (default: dari model)')
+    parser.add_argument('--formats', default='JPEG,PNG,WEBP')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--resample', default='bicubic')
+    parser.add_argument('--reducing-gap', type=float, default=3.0)
+    parser.add_argument('--no-draft', action='store_true')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--no-model', action='store_true', help='Lewati cek parity output model')
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help='Selisih probabilitas maksimum yang diterima untuk parity model')
+    parser.add_argument('--output', help='Tulis hasil sebagai JSON ke file ini')
+    args = parser.parse_args()
+
+    interpreter = None if args.no_model else load_interpreter(args.model)
+    if args.input_size:
+        width, height = (int(v) for v in args.input_size.lower().split('x'))
+    elif interpreter is not None:
+        shape = interpreter.get_input_details()[0]['shape']
+        height, width = int(shape[1]), int(shape[2])
+    else:
+        width, height = 224, 224
+
+    image_width, image_height = (int(v) for v in args.size.lower().split('x'))
+    source = synthetic_image(image_width, image_height)
+    resample = resample_filter(args.resample)
+    reducing_gap = args.reducing_gap or None
+    out = np.empty((1, height, width, 3), dtype=np.float32)
+
+    report = {
+        'image_size': [image_width, image_height],
+        'input_size': [width, height],
+        'resample': args.resample,
+        'draft': not args.no_draft,
+        'reducing_gap': reducing_gap,
+        'iterations': args.iterations,
+        'results': {},
+    }
+    failed = False
+
+    for fmt in args.formats.upper().split(','):
+        data = encode(source, fmt)
+
+        def fast():
+            return preprocess_into(io.BytesIO(data), out[0], resample=resample,
+                                   draft=not args.no_draft, reducing_gap=reducing_gap)
+
+        legacy_timing = time_it(lambda: legacy_preprocess(data, width, height), args.iterations)
+        fast_timing = time_it(fast, args.iterations)
+
+        legacy_array = legacy_preprocess(data, width, height)
+        fast()
+        result = {
+            'bytes': len(data),
+            'legacy': legacy_timing,
+            'fast': fast_timing,
+            'speedup': round(legacy_timing['mean_ms'] / fast_timing['mean_ms'], 2),
+            'pixel_max_abs_diff': float(np.max(np.abs(legacy_array - out))),
+            'pixel_mean_abs_diff': float(np.mean(np.abs(legacy_array - out))),
+        }
+
+        if interpreter is not None:
+            legacy_output = run_model(interpreter, legacy_array)
+            fast_output = run_model(interpreter, out)
+            max_diff = float(np.max(np.abs(legacy_output - fast_output)))
+            result['model_max_abs_diff'] = max_diff
+            result['model_bit_exact'] = bool(np.array_equal(legacy_output, fast_output))
+            result['top1_match'] = bool(np.argmax(legacy_output) == np.argmax(fast_output))
+            result['parity_ok'] = max_diff <= args.tolerance and result['top1_match']
+            failed = failed or not result['parity_ok']
+
+        report['results'][fmt] = result
+        print(f"{fmt:5s} {len(data) / 1e6:6.2f} MB  legacy {legacy_timing['mean_ms']:8.2f} ms  "
+              f"fast {fast_timing['mean_ms']:8.2f} ms  x{result['speedup']:.2f}"
+              + (f"  model diff {result['model_max_abs_diff']:.5f}" if interpreter is not None else ''))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if failed:
+        print(f"Model parity check failed (tolerance {args.tolerance})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark startup per interpreter backend
+
+Setiap backend diukur di proses Python baru (supaya import tidak ter-cache):
+    - import_s: waktu import modul interpreter
+    - load_s: waktu membuat interpreter + allocate_tensors()
+    - first_prediction_s: waktu invoke() pertama
+    - total_s: dari awal proses sampai prediksi pertama selesai
+    - peak_rss_mb: peak RSS proses (ru_maxrss)
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --backends tflite_runtime,tensorflow --repeat 3 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MODEL_PATH = os.path.join(ROOT, 'model', 'model_unquant.tflite')
+sys.path.insert(0, ROOT)
+
+
+def peak_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def child(backend, model_path):
+    """
+    Dijalankan di subprocess: ukur satu backend lalu print JSON
+    """
+    process_start = time.perf_counter()
+
+    import numpy as np
+    from inference.backends import load_backend
+
+    start = time.perf_counter()
+    name, Interpreter = load_backend(backend)
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    interpreter = Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+    load_s = time.perf_counter() - start
+
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    start = time.perf_counter()
+    interpreter.set_tensor(input_detail['index'], np.zeros(input_detail['shape'], dtype=input_detail['dtype']))
+    interpreter.invoke()
+    interpreter.get_tensor(output_detail['index'])
+    first_prediction_s = time.perf_counter() - start
+
+    print(json.dumps({
+        'backend': name,
+        'import_s': round(import_s, 4),
+        'load_s': round(load_s, 4),
+        'first_prediction_s': round(first_prediction_s, 4),
+        'total_s': round(time.perf_counter() - process_start, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }))
+
+
+def measure(backend, model_path):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, __file__, '--child', backend, '--model', model_path],
+        capture_output=True, text=True
+    )
+    wall_s = time.perf_counter() - start
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ['unknown error'])[-1]
+        return {'backend': backend, 'error': error}
+    record = json.loads(result.stdout.strip().splitlines()[-1])
+    record['process_wall_s'] = round(wall_s, 4)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup time and memory benchmark per interpreter backend')
+    parser.add_argument('--backends', default='tflite_runtime,ai_edge_litert,tensorflow')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Tulis hasil sebagai JSON ke file ini')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.model)
+        return
+
+    report = {'model': os.path.basename(args.model), 'repeat': args.repeat, 'results': []}
+    for backend in args.backends.split(','):
+        runs = [measure(backend.strip(), args.model) for _ in range(args.repeat)]
+        ok = [run for run in runs if 'error' not in run]
+        if not ok:
+            print(f"{backend:15s} unavailable: {runs[0]['error']}")
+            report['results'].append(runs[0])
+            continue
+
+        # Median dari setiap metrik
+        summary = {'backend': backend, 'runs': len(ok)}
+        for key in ('import_s', 'load_s', 'first_prediction_s', 'total_s', 'process_wall_s', 'peak_rss_mb'):
+            values = sorted(run[key] for run in ok)
+            summary[key] = values[len(values) // 2]
+        report['results'].append(summary)
+        print(f"{backend:15s} import {summary['import_s']:7.3f}s  first prediction {summary['total_s']:7.3f}s  "
+              f"peak RSS {summary['peak_rss_mb']:8.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Bandingkan dua hasil benchmarks/loadtest.py (misalnya main vs branch)
+
+Setiap level (workload, concurrency) dibandingkan pada RPS dan latency
+p95/p99; microbenchmark dibandingkan pada mean. Exit code 1 jika ada
+regresi lebih besar dari --tolerance, jadi bisa dipakai sebelum deploy.
+
+Usage:
+    python benchmarks/compare_loadtest.py baseline.json candidate.json
+    python benchmarks/compare_loadtest.py baseline.json candidate.json --tolerance 0.05 --output diff.json
+"""
+
+import argparse
+import json
+import sys
+
+
+def change(baseline, candidate):
+    return (candidate - baseline) / baseline if baseline else 0.0
+
+
+def compare(baseline, candidate, tolerance):
+    """
+    Return list baris perbandingan; 'regression' True jika melewati tolerance
+    """
+    rows = []
+
+    def add(name, metric, old, new, higher_is_better):
+        delta = change(old, new)
+        regression = (-delta if higher_is_better else delta) > tolerance
+        rows.append({
+            'name': name, 'metric': metric, 'baseline': old, 'candidate': new,
+            'change': round(delta, 4), 'regression': regression,
+        })
+
+    for workload, old in baseline.get('workloads', {}).items():
+        new = candidate.get('workloads', {}).get(workload)
+        if new is None:
+            continue
+        new_levels = {level['concurrency']: level for level in new['levels']}
+        for old_level in old['levels']:
+            new_level = new_levels.get(old_level['concurrency'])
+            if new_level is None:
+                continue
+            name = f"{workload} c={old_level['concurrency']}"
+            add(name, 'rps', old_level['rps'], new_level['rps'], True)
+            for q in ('p95', 'p99'):
+                add(name, f'{q}_ms', old_level['latency_ms'][q], new_level['latency_ms'][q], False)
+
+    old_micro, new_micro = baseline.get('micro') or {}, candidate.get('micro') or {}
+    for key, old in (old_micro.get('preprocess_image') or {}).items():
+        new = (new_micro.get('preprocess_image') or {}).get(key)
+        if new is not None:
+            add(f'preprocess_image {key}', 'mean_ms', old['mean_ms'], new['mean_ms'], False)
+    if old_micro.get('predict_disease') and new_micro.get('predict_disease'):
+        add('predict_disease', 'mean_ms', old_micro['predict_disease']['mean_ms'],
+            new_micro['predict_disease']['mean_ms'], False)
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two loadtest.py result files')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Perubahan relatif maksimum sebelum dianggap regresi (default: 0.10)')
+    parser.add_argument('--output', help='Tulis perbandingan sebagai JSON ke file ini')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.tolerance)
+    for row in rows:
+        marker = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['name']:36s} {row['metric']:8s} {row['baseline']:10.2f} -> {row['candidate']:10.2f} "
+              f"({row['change'] * 100:+6.1f}%) {marker}")
+
+    regressions = [row for row in rows if row['regression']]
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'tolerance': args.tolerance, 'rows': rows, 'regressions': len(regressions)}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance * 100:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
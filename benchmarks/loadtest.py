@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Load test dan microbenchmark untuk /detect
+
+Workload berasal dari salah satu:
+    - trace JSONL (--trace): satu request per baris. Baris dengan key 'path'
+      memakai file gambar tersebut, baris dengan 'width'/'height' (dan
+      opsional 'format') dibuat sintetis, baris lain (misalnya requests.jsonl
+      di root repo) dipetakan secara deterministik ke salah satu --sizes/--formats.
+    - campuran sintetis (default): setiap kombinasi --sizes x --formats
+      diukur sebagai workload tersendiri.
+
+Target:
+    - inprocess (default): app.app.test_client() di proses ini, tanpa network
+    - http: server yang sudah berjalan di --url (python run.py --production, uvicorn, ...)
+
+Untuk setiap workload dan level --concurrency dilaporkan RPS, latency
+p50/p95/p99/max, jumlah status/error, CPU time + utilization dan RSS.
+Mode inprocess mengukur proses ini sendiri, mode http mengukur --server-pid
+(jika diberikan, dibaca dari /proc).
+
+Secara default beberapa byte acak ditambahkan di akhir setiap upload supaya
+prediction cache tidak pernah hit (gunakan --allow-cache untuk menonaktifkan).
+
+Usage:
+    python benchmarks/loadtest.py --concurrency 1,4,16 --requests 200 --output loadtest.json
+    python benchmarks/loadtest.py --trace requests.jsonl --concurrency 1,8
+    python benchmarks/loadtest.py --target http --url http://127.0.0.1:8000 --server-pid 1234
+    python benchmarks/loadtest.py --micro-only --output micro.json
+
+Bandingkan dua hasil dengan benchmarks/compare_loadtest.py.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from bench_preprocess import encode, synthetic_image, time_it  # noqa: E402
+from inference.stats import percentile  # noqa: E402
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'BMP': 'bmp', 'GIF': 'gif'}
+
+
+def parse_size(value):
+    width, height = (int(v) for v in value.lower().split('x'))
+    return width, height
+
+
+class ImageFactory:
+    """
+    Encode gambar sintetis sekali per (ukuran, format) lalu dipakai ulang
+    """
+
+    def __init__(self):
+        self._encoded = {}
+
+    def get(self, size, fmt):
+        key = (size, fmt)
+        if key not in self._encoded:
+            self._encoded[key] = encode(synthetic_image(*size, seed=zlib.crc32(repr(key).encode())), fmt)
+        return self._encoded[key]
+
+
+def load_trace(path, sizes, formats, factory):
+    """
+    Baca trace JSONL menjadi list (filename, bytes)
+    """
+    requests = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'path' in record:
+                image_path = os.path.join(os.path.dirname(os.path.abspath(path)), record['path'])
+                with open(image_path, 'rb') as image:
+                    requests.append((os.path.basename(image_path), image.read()))
+                continue
+            # Baris tanpa gambar: pilih ukuran dan format dari hash isi baris
+            digest = zlib.crc32(line.encode('utf-8'))
+            if 'width' in record and 'height' in record:
+                size = (int(record['width']), int(record['height']))
+            else:
+                size = sizes[digest % len(sizes)]
+            fmt = record.get('format', formats[(digest // len(sizes)) % len(formats)]).upper()
+            requests.append((f'trace.{EXTENSIONS[fmt]}', factory.get(size, fmt)))
+    if not requests:
+        raise ValueError(f'Trace {path} has no requests')
+    return requests
+
+
+def multipart_body(filename, data, boundary):
+    head = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode('utf-8')
+    return head + data + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+
+class InProcessTarget:
+    name = 'inprocess'
+
+    def __init__(self, allow_cache):
+        if not allow_cache:
+            os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+        import app as api
+        self.api = api
+        self._local = threading.local()
+
+    def post(self, filename, data):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.api.app.test_client()
+        response = client.post('/detect', data={'file': (io.BytesIO(data), filename)})
+        return response.status_code
+
+    def resources(self):
+        return process_resources(os.getpid())
+
+
+class HttpTarget:
+    name = 'http'
+
+    def __init__(self, url, server_pid=None, timeout=60.0):
+        self.url = url.rstrip('/') + '/detect'
+        self.server_pid = server_pid
+        self.timeout = timeout
+
+    def post(self, filename, data):
+        boundary = uuid.uuid4().hex
+        request = urllib.request.Request(
+            self.url,
+            data=multipart_body(filename, data, boundary),
+            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0
+
+    def resources(self):
+        return process_resources(self.server_pid) if self.server_pid else None
+
+
+def process_resources(pid):
+    """
+    CPU time (user + system, termasuk child yang sudah selesai) dan RSS dari /proc
+    """
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/status') as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+    except (OSError, StopIteration):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    # Field 14-17 (utime, stime, cutime, cstime), index dimulai setelah nama proses
+    cpu_seconds = sum(int(v) for v in fields[11:15]) / ticks
+    return {'cpu_seconds': cpu_seconds, 'rss_mb': rss_kb / 1024}
+
+
+def run_level(target, workload, concurrency, total, unique):
+    """
+    Kirim total request dengan concurrency worker, return ringkasan level ini
+    """
+    latencies = [None] * total
+    statuses = [None] * total
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            filename, data = workload[i % len(workload)]
+            if unique:
+                # Byte tambahan di akhir file diabaikan decoder tapi mengubah hash cache
+                data = data + os.urandom(8)
+            start = time.perf_counter()
+            statuses[i] = target.post(filename, data)
+            latencies[i] = time.perf_counter() - start
+
+    before = target.resources()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - start
+    after = target.resources()
+
+    samples = sorted(latencies)
+    status_counts = Counter(statuses)
+    result = {
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': sum(count for status, count in status_counts.items() if status != 200),
+        'status_counts': {str(status): count for status, count in sorted(status_counts.items())},
+        'wall_s': round(wall, 4),
+        'rps': round(total / wall, 2),
+        'latency_ms': {
+            'mean': round(sum(samples) / len(samples) * 1000, 3),
+            'p50': round(percentile(samples, 50) * 1000, 3),
+            'p95': round(percentile(samples, 95) * 1000, 3),
+            'p99': round(percentile(samples, 99) * 1000, 3),
+            'max': round(samples[-1] * 1000, 3),
+        },
+    }
+    if before is not None and after is not None:
+        cpu = after['cpu_seconds'] - before['cpu_seconds']
+        result['cpu_seconds'] = round(cpu, 3)
+        result['cpu_utilization'] = round(cpu / wall, 3)
+        result['rss_mb'] = round(after['rss_mb'], 1)
+    return result
+
+
+def microbenchmarks(sizes, formats, iterations, factory):
+    """
+    preprocess_image dan predict_disease secara terpisah, tanpa HTTP
+    """
+    os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+    import app as api
+
+    report = {'preprocess_image': {}, 'predict_disease': None}
+    image_array = None
+    for size in sizes:
+        for fmt in formats:
+            data = factory.get(size, fmt)
+            key = f'{size[0]}x{size[1]}/{fmt}'
+            report['preprocess_image'][key] = {
+                'bytes': len(data),
+                **time_it(lambda: api.preprocess_image(io.BytesIO(data)), iterations),
+            }
+            image_array = api.preprocess_image(io.BytesIO(data)).copy()
+            print(f"preprocess_image {key:18s} mean {report['preprocess_image'][key]['mean_ms']:8.2f} ms  "
+                  f"p95 {report['preprocess_image'][key]['p95_ms']:8.2f} ms")
+
+    api.predict_disease(image_array)
+    report['predict_disease'] = time_it(lambda: api.predict_disease(image_array), iterations)
+    print(f"predict_disease  mean {report['predict_disease']['mean_ms']:8.2f} ms  "
+          f"p95 {report['predict_disease']['p95_ms']:8.2f} ms")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test and microbenchmarks for /detect')
+    parser.add_argument('--target', choices=('inprocess', 'http'), default='inprocess')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--server-pid', type=int, help='PID server untuk CPU/RSS pada --target http')
+    parser.add_argument('--trace', help='File trace JSONL yang di-replay')
+    parser.add_argument('--sizes', default='640x480,1600x1200,4032x3024', help='Ukuran gambar sintetis WxH')
+    parser.add_argument('--formats', default='JPEG,PNG')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=100, help='Jumlah request per level')
+    parser.add_argument('--warmup', type=int, default=5, help='Request pemanasan sebelum setiap workload')
+    parser.add_argument('--allow-cache', action='store_true', help='Jangan buat setiap upload unik')
+    parser.add_argument('--micro-iterations', type=int, default=20)
+    parser.add_argument('--no-micro', action='store_true', help='Lewati microbenchmark')
+    parser.add_argument('--micro-only', action='store_true', help='Hanya microbenchmark')
+    parser.add_argument('--output', help='Tulis hasil sebagai JSON ke file ini')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    formats = [fmt.strip().upper() for fmt in args.formats.split(',')]
+    levels = [int(level) for level in args.concurrency.split(',')]
+    factory = ImageFactory()
+
+    report = {
+        'target': args.target,
+        'url': args.url if args.target == 'http' else None,
+        'trace': args.trace,
+        'requests_per_level': args.requests,
+        'unique_uploads': not args.allow_cache,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'env': {key: value for key, value in os.environ.items()
+                    if key.startswith(('INTERPRETER_', 'MICROBATCH_', 'PREPROCESS_', 'PREDICTION_CACHE_', 'MODEL_'))},
+        },
+        'workloads': {},
+    }
+
+    if not args.micro_only:
+        if args.trace:
+            workloads = {'trace': load_trace(args.trace, sizes, formats, factory)}
+        else:
+            workloads = {
+                f'{size[0]}x{size[1]}/{fmt}': [(f'synthetic.{EXTENSIONS[fmt]}', factory.get(size, fmt))]
+                for size in sizes for fmt in formats
+            }
+
+        if args.target == 'http':
+            target = HttpTarget(args.url, args.server_pid)
+        else:
+            target = InProcessTarget(args.allow_cache)
+
+        for name, workload in workloads.items():
+            if args.warmup:
+                run_level(target, workload, 1, args.warmup, not args.allow_cache)
+            results = []
+            for concurrency in levels:
+                result = run_level(target, workload, concurrency, args.requests, not args.allow_cache)
+                results.append(result)
+                print(f"{name:18s} c={concurrency:<3d} {result['rps']:8.2f} req/s  "
+                      f"p50 {result['latency_ms']['p50']:8.2f} ms  p95 {result['latency_ms']['p95']:8.2f} ms  "
+                      f"p99 {result['latency_ms']['p99']:8.2f} ms  errors {result['errors']}"
+                      + (f"  cpu {result['cpu_utilization']:.2f}  rss {result['rss_mb']:.0f} MB"
+                         if 'cpu_utilization' in result else ''))
+            report['workloads'][name] = {
+                'requests_in_trace': len(workload),
+                'bytes_avg': round(sum(len(data) for _, data in workload) / len(workload)),
+                'levels': results,
+            }
+
+    if not args.no_micro:
+        report['micro'] = microbenchmarks(sizes, formats, args.micro_iterations, factory)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
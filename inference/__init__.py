@@ -0,0 +1,13 @@
+"""
+Shared inference components for Potato Disease Detection API
+Dipakai bersama oleh app.py, flask_app.py dan streamlit_app.py
+"""
+
+from .batching import MicroBatcher
+from .engine import InferenceEngine, PredictionError, PreprocessingError, Result
+from .pool import InterpreterPool, PoolTimeoutError
+
+__all__ = [
+    'InferenceEngine', 'InterpreterPool', 'MicroBatcher', 'PoolTimeoutError',
+    'PredictionError', 'PreprocessingError', 'Result',
+]
@@ -0,0 +1,374 @@
+"""
+Admission control: batas kerja bersamaan, antrean prioritas dan load shedding
+
+Tanpa admission, lonjakan trafik membuat semua request mengantre di
+interpreter pool dan latency semua client memburuk bersamaan. Di sini setiap
+request /detect harus mendapat slot sebelum body di-decode:
+
+- max_concurrent request boleh decode + inference bersamaan, sisanya menunggu
+  di antrean terbatas (max_queue). Antrean dipisah per kelas prioritas
+  (PRIORITIES, urut dari paling penting); slot kosong selalu diberikan ke
+  kelas tertinggi dulu, FIFO di dalam kelas.
+- Jika antrean penuh, request prioritas tinggi menggeser request menunggu
+  dengan prioritas terendah yang paling baru (shed). Kelas bulk hanya boleh
+  memakai sebagian antrean (bulk_queue_share).
+- Token bucket per client (rate request/detik, burst) sebelum masuk antrean.
+- Deadline dari client: request yang deadline-nya sudah lewat dibuang sebelum
+  decode, baik saat datang maupun saat giliran slotnya tiba.
+
+Ticket bisa ditunggu secara blocking (thread Flask) maupun dengan await
+(asgi_app.py); keduanya memakai antrean dan lock yang sama.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+PRIORITIES = ('interactive', 'bulk')
+
+REJECTION_REASONS = ('rate_limited', 'queue_full', 'shed', 'queue_timeout', 'deadline')
+
+
+class AdmissionRejected(Exception):
+    """
+    Request ditolak oleh admission control (status / error untuk response JSON)
+    """
+
+    status = 503
+    error = 'Server busy'
+    reason = 'queue_full'
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimited(AdmissionRejected):
+    status = 429
+    error = 'Rate limit exceeded'
+    reason = 'rate_limited'
+
+
+class QueueFull(AdmissionRejected):
+    pass
+
+
+class Shed(AdmissionRejected):
+    reason = 'shed'
+
+
+class QueueTimeout(AdmissionRejected):
+    reason = 'queue_timeout'
+
+
+class DeadlineExceeded(AdmissionRejected):
+    status = 504
+    error = 'Deadline exceeded'
+    reason = 'deadline'
+
+
+class TokenBucket:
+    """
+    rate token per detik, maksimum burst token
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, now, cost=1.0):
+        """
+        Return 0 jika token cukup (dan diambil), selain itu detik sampai token cukup
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class Ticket:
+    """
+    Satu request di admission: menunggu, lalu admitted atau ditolak
+    """
+
+    __slots__ = ('priority', 'deadline', 'enqueued_at', 'state', 'error', '_notify')
+
+    def __init__(self, priority, deadline, now):
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = now
+        self.state = 'waiting'
+        self.error = None
+        self._notify = None
+
+    @property
+    def admitted(self):
+        return self.state == 'admitted'
+
+
+class AdmissionController:
+    """
+    max_concurrent: request yang boleh decode + inference bersamaan
+    max_queue: request menunggu maksimum (semua kelas)
+    queue_timeout: detik maksimum menunggu slot (selain deadline client)
+    rate / burst: token bucket per client, rate 0 = tanpa rate limit
+    bulk_queue_share: porsi max_queue yang boleh dipakai kelas selain kelas tertinggi
+    max_clients: jumlah token bucket yang disimpan (LRU)
+    """
+
+    def __init__(self, max_concurrent, max_queue=64, queue_timeout=10.0, rate=0.0, burst=None,
+                 bulk_queue_share=0.5, max_clients=10000):
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be >= 1, got {max_concurrent}")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.bulk_queue_limit = max(1, int(max_queue * bulk_queue_share)) if max_queue > 0 else 0
+        self.max_clients = max_clients
+
+        self._lock = threading.Lock()
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._buckets = OrderedDict()
+        self.in_flight = 0
+
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {(reason, priority): 0 for reason in REJECTION_REASONS for priority in PRIORITIES}
+        self.queued = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _waiting(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _reject(self, ticket, error):
+        ticket.state = 'rejected'
+        ticket.error = error
+        self.rejected[(error.reason, ticket.priority)] += 1
+
+    def _grant(self, ticket, now):
+        ticket.state = 'admitted'
+        self.in_flight += 1
+        self.admitted[ticket.priority] += 1
+        waited = now - ticket.enqueued_at
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def _wake(self, ticket):
+        if ticket._notify is not None:
+            ticket._notify()
+
+    def _dispatch(self, now):
+        """
+        Berikan slot kosong ke request menunggu dengan prioritas tertinggi (dipanggil dengan lock)
+        """
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self.in_flight < self.max_concurrent:
+                ticket = queue.popleft()
+                if ticket.deadline is not None and now >= ticket.deadline:
+                    self._reject(ticket, DeadlineExceeded('Request deadline passed while queued'))
+                else:
+                    self._grant(ticket, now)
+                self._wake(ticket)
+
+    def enter(self, client, priority=PRIORITIES[0], deadline=None):
+        """
+        Daftarkan request; raise AdmissionRejected jika langsung ditolak
+
+        client: identitas untuk rate limit (None = tanpa rate limit)
+        deadline: waktu time.monotonic() setelah client tidak lagi menunggu jawaban
+        Return: Ticket yang sudah admitted atau masih menunggu (lihat wait / wait_async)
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority {priority!r}, choose from: {', '.join(PRIORITIES)}")
+        now = time.monotonic()
+        ticket = Ticket(priority, deadline, now)
+        with self._lock:
+            if deadline is not None and now >= deadline:
+                error = DeadlineExceeded('Request deadline already passed')
+                self._reject(ticket, error)
+                raise error
+
+            if self.rate > 0 and client is not None:
+                bucket = self._buckets.get(client)
+                if bucket is None:
+                    bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+                    if len(self._buckets) > self.max_clients:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(client)
+                retry_after = bucket.take(now)
+                if retry_after:
+                    error = RateLimited(f'Rate limit of {self.rate:g} requests/s exceeded', retry_after)
+                    self._reject(ticket, error)
+                    raise error
+
+            if self.in_flight < self.max_concurrent and not self._waiting():
+                self._grant(ticket, now)
+                return ticket
+
+            rank = PRIORITIES.index(priority)
+            if rank > 0 and sum(len(self._queues[p]) for p in PRIORITIES[1:]) >= self.bulk_queue_limit:
+                error = QueueFull(f'Queue for {priority} requests is full, retry later', self.queue_timeout)
+                self._reject(ticket, error)
+                raise error
+            if self._waiting() >= self.max_queue:
+                # Geser request menunggu dengan prioritas lebih rendah yang paling baru
+                victim = None
+                for lower in reversed(PRIORITIES[rank + 1:]):
+                    if self._queues[lower]:
+                        victim = self._queues[lower].pop()
+                        break
+                if victim is None:
+                    error = QueueFull(f'Too many queued requests (limit {self.max_queue}), retry later',
+                                      self.queue_timeout)
+                    self._reject(ticket, error)
+                    raise error
+                self._reject(victim, Shed(f'Dropped in favour of a {priority} request, retry later', self.queue_timeout))
+                self._wake(victim)
+
+            self._queues[priority].append(ticket)
+            self.queued += 1
+            return ticket
+
+    def _timeout(self, ticket):
+        now = time.monotonic()
+        limits = [self.queue_timeout + ticket.enqueued_at - now]
+        if ticket.deadline is not None:
+            limits.append(ticket.deadline - now)
+        return max(0.0, min(limits))
+
+    def _abandon(self, ticket):
+        """
+        Keluarkan ticket yang waktu tunggunya habis dari antrean; raise error-nya
+        """
+        with self._lock:
+            if ticket.state == 'waiting':
+                self._queues[ticket.priority].remove(ticket)
+                if ticket.deadline is not None and time.monotonic() >= ticket.deadline:
+                    error = DeadlineExceeded('Request deadline passed while queued')
+                else:
+                    error = QueueTimeout(f'No capacity after {self.queue_timeout:g}s in queue, retry later',
+                                         self.queue_timeout)
+                self._reject(ticket, error)
+        if ticket.state == 'rejected':
+            raise ticket.error
+
+    def wait(self, ticket):
+        """
+        Tunggu sampai ticket admitted (blocking); raise AdmissionRejected jika tidak
+        """
+        if ticket.state == 'waiting':
+            event = threading.Event()
+            with self._lock:
+                ticket._notify = event.set
+                pending = ticket.state == 'waiting'
+            if pending:
+                event.wait(self._timeout(ticket))
+        self._abandon(ticket)
+        return ticket
+
+    async def wait_async(self, ticket):
+        """
+        Seperti wait(), untuk event loop asyncio
+        """
+        if ticket.state == 'waiting':
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+            def notify():
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+            with self._lock:
+                ticket._notify = notify
+                pending = ticket.state == 'waiting'
+            if pending:
+                try:
+                    await asyncio.wait_for(future, self._timeout(ticket))
+                except asyncio.TimeoutError:
+                    pass
+                except BaseException:
+                    # Task dibatalkan (client disconnect): jangan tinggalkan ticket di antrean
+                    self.cancel(ticket)
+                    raise
+        self._abandon(ticket)
+        return ticket
+
+    def cancel(self, ticket):
+        """
+        Pemanggil berhenti menunggu: keluarkan ticket dari antrean, atau
+        kembalikan slotnya jika sudah terlanjur admitted
+        """
+        with self._lock:
+            if ticket.state == 'waiting':
+                self._queues[ticket.priority].remove(ticket)
+                ticket.state = 'cancelled'
+                return
+        self.release(ticket)
+
+    def release(self, ticket):
+        """
+        Kembalikan slot ticket yang admitted dan berikan ke request berikutnya
+        """
+        if not ticket.admitted:
+            return
+        with self._lock:
+            ticket.state = 'released'
+            self.in_flight -= 1
+            self._dispatch(time.monotonic())
+
+    def check_deadline(self, ticket):
+        """
+        Raise DeadlineExceeded jika deadline ticket sudah lewat (dipanggil tepat sebelum decode)
+        """
+        if ticket.deadline is not None and time.monotonic() >= ticket.deadline:
+            error = DeadlineExceeded('Request deadline passed before decode')
+            with self._lock:
+                self.rejected[(error.reason, ticket.priority)] += 1
+            raise error
+
+    @contextmanager
+    def admit(self, client, priority=PRIORITIES[0], deadline=None):
+        """
+        with admission.admit(client, 'bulk', deadline):
+            ...  # decode + inference
+        """
+        ticket = self.wait(self.enter(client, priority, deadline))
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        with self._lock:
+            admitted = sum(self.admitted.values())
+            return {
+                'enabled': True,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'bulk_queue_limit': self.bulk_queue_limit,
+                'queue_timeout': self.queue_timeout,
+                'rate': self.rate,
+                'burst': self.burst,
+                'in_flight': self.in_flight,
+                'queue_depth': {priority: len(queue) for priority, queue in self._queues.items()},
+                'clients': len(self._buckets),
+                'admitted': dict(self.admitted),
+                'queued': self.queued,
+                'rejected': {
+                    reason: {priority: self.rejected[(reason, priority)] for priority in PRIORITIES}
+                    for reason in REJECTION_REASONS
+                },
+                'wait_seconds_avg': round(self.wait_seconds_total / admitted, 6) if admitted else 0.0,
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
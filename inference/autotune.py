@@ -0,0 +1,256 @@
+"""
+Autotuner jumlah interpreter x num_threads x XNNPACK
+
+Thread Flask, thread internal TFLite dan XNNPACK berebut core yang sama;
+konfigurasi yang terlalu banyak thread membuat p99 naik turun mengikuti
+beban. Autotuner membenchmark model yang sudah dimuat untuk setiap kombinasi
+pool_size x num_threads (total thread <= jumlah CPU, tanpa oversubscribe)
+dengan XNNPACK aktif / nonaktif, di CPU yang benar-benar dipakai proses ini.
+
+Setiap kombinasi dijalankan sebagai closed loop dengan `clients` thread yang
+meminjam interpreter dari pool lalu invoke() batch 1, jadi latency termasuk
+waktu tunggu pool. Dipilih kombinasi dengan throughput tertinggi yang p95-nya
+<= target; jika tidak ada, kombinasi dengan p95 terendah.
+
+Hasil disimpan di file profile (JSON) dengan key fingerprint model, backend,
+CPU dan parameter tuning, jadi restart berikutnya langsung memakai hasil yang
+sama tanpa benchmark ulang.
+"""
+
+import gc
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from .batching import invoke_batch
+from .cache import content_hash
+from .config import env_bool, env_float, env_int
+from .pool import InterpreterPool
+
+
+def settings_from_env():
+    """
+    Konfigurasi autotuner dari environment (lihat README), None jika AUTOTUNE_ENABLED mati
+    """
+    if not env_bool('AUTOTUNE_ENABLED'):
+        return None
+    return {
+        'target_p95_ms': env_float('AUTOTUNE_TARGET_P95_MS', 100.0),
+        'duration': env_float('AUTOTUNE_DURATION', 1.5),
+        'clients': env_int('AUTOTUNE_CLIENTS', 0) or None,
+        'profile_path': os.environ.get('AUTOTUNE_PROFILE') or None,
+        'xnnpack_options': (True, False) if env_bool('AUTOTUNE_XNNPACK', True) else (True,),
+    }
+
+
+def cpu_model():
+    """
+    Nama CPU dari /proc/cpuinfo (fallback: platform.processor())
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def available_cpus():
+    """
+    Jumlah CPU yang boleh dipakai proses ini (affinity), bukan jumlah CPU host
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def thread_counts(cpus):
+    """
+    1, 2, 4, ... sampai cpus, ditambah cpus sendiri
+    """
+    counts = set()
+    count = 1
+    while count <= cpus:
+        counts.add(count)
+        count *= 2
+    counts.add(cpus)
+    return sorted(counts)
+
+
+def candidate_configs(cpus, xnnpack_options=(True, False)):
+    """
+    Semua (pool_size, num_threads, xnnpack) dengan pool_size * num_threads <= cpus
+    """
+    return [
+        {'pool_size': pool_size, 'num_threads': num_threads, 'xnnpack': xnnpack}
+        for xnnpack in xnnpack_options
+        for pool_size in thread_counts(cpus)
+        for num_threads in thread_counts(cpus)
+        if pool_size * num_threads <= cpus
+    ]
+
+
+def benchmark(factory, config, input_detail, output_index, clients, duration, warmup=3):
+    """
+    Throughput dan latency satu konfigurasi
+
+    factory(num_threads, xnnpack) -> interpreter baru
+    """
+    pool = InterpreterPool(lambda: factory(config['num_threads'], config['xnnpack']), size=config['pool_size'])
+    rng = np.random.default_rng(0)
+    shape = (1, *input_detail['shape'][1:])
+    if np.issubdtype(input_detail['dtype'], np.integer):
+        dummy = rng.integers(0, 128, size=shape).astype(input_detail['dtype'])
+    else:
+        dummy = rng.random(shape, dtype=np.float32).astype(input_detail['dtype'])
+    for interpreter in pool.interpreters:
+        for _ in range(warmup):
+            invoke_batch(interpreter, input_detail['index'], output_index, dummy)
+
+    latencies = [[] for _ in range(clients)]
+    start_event = threading.Event()
+    deadline = [0.0]
+
+    def client(samples):
+        start_event.wait()
+        while time.perf_counter() < deadline[0]:
+            begin = time.perf_counter()
+            with pool.acquire() as interpreter:
+                invoke_batch(interpreter, input_detail['index'], output_index, dummy)
+            samples.append(time.perf_counter() - begin)
+
+    threads = [threading.Thread(target=client, args=(samples,), daemon=True) for samples in latencies]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    deadline[0] = started + duration
+    start_event.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # Lepas interpreter (dan thread pool XNNPACK-nya) sebelum konfigurasi berikutnya
+    del pool
+    gc.collect()
+
+    samples = np.concatenate([np.asarray(s) for s in latencies if s]) * 1000
+    if not len(samples):
+        return {**config, 'requests': 0, 'throughput': 0.0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        **config,
+        'requests': int(len(samples)),
+        'throughput': round(len(samples) / elapsed, 2),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+    }
+
+
+def select(results, target_p95_ms):
+    """
+    Throughput tertinggi dengan p95 <= target, atau p95 terendah jika tidak ada yang memenuhi
+    """
+    measured = [result for result in results if result['requests']]
+    if not measured:
+        raise RuntimeError('Autotune produced no measurements')
+    within = [result for result in measured if result['p95_ms'] <= target_p95_ms]
+    if within:
+        return max(within, key=lambda result: (result['throughput'], -result['p95_ms'])), True
+    return min(measured, key=lambda result: result['p95_ms']), False
+
+
+def profile_key(fingerprint, backend, cpus, target_p95_ms, clients, xnnpack_options):
+    """
+    Key profile: hasil hanya dipakai ulang di model, backend, CPU dan parameter yang sama
+    """
+    identity = {
+        'model': fingerprint,
+        'backend': backend,
+        'cpus': cpus,
+        'cpu_model': cpu_model(),
+        'machine': platform.machine(),
+        'target_p95_ms': target_p95_ms,
+        'clients': clients,
+        'xnnpack_options': list(xnnpack_options),
+    }
+    return content_hash(json.dumps(identity, sort_keys=True).encode('utf-8')), identity
+
+
+def load_profile(path, key):
+    try:
+        with open(path) as f:
+            return json.load(f).get('profiles', {}).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def save_profile(path, key, entry):
+    """
+    Tambahkan entry ke file profile (tulis ke file sementara lalu rename)
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data.setdefault('profiles', {})[key] = entry
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.autotune-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def autotune(factory, input_detail, output_index, fingerprint, backend, cpus=None, target_p95_ms=100.0,
+             duration=1.5, clients=None, profile_path=None, xnnpack_options=(True, False), log=print):
+    """
+    Pilih pool_size / num_threads / xnnpack untuk model ini, dari profile jika ada
+
+    cpus: jumlah CPU yang tersedia untuk satu proses (default: affinity proses ini)
+    clients: jumlah request bersamaan saat benchmark (default: cpus)
+    Return: entry profile; 'config' berisi konfigurasi terpilih dan 'source'
+        'profile' atau 'benchmark'
+    """
+    cpus = cpus or available_cpus()
+    clients = clients or cpus
+    key, identity = profile_key(fingerprint, backend, cpus, target_p95_ms, clients, xnnpack_options)
+    if profile_path:
+        entry = load_profile(profile_path, key)
+        if entry is not None:
+            return {**entry, 'source': 'profile'}
+
+    results = []
+    start = time.perf_counter()
+    for config in candidate_configs(cpus, xnnpack_options):
+        result = benchmark(factory, config, input_detail, output_index, clients, duration)
+        log(f"⏱️ Autotune {config['pool_size']} x {config['num_threads']} thread(s), "
+            f"xnnpack={config['xnnpack']}: {result['throughput']:.1f} req/s, p95 {result['p95_ms']} ms")
+        results.append(result)
+    chosen, met_target = select(results, target_p95_ms)
+    entry = {
+        'config': {name: chosen[name] for name in ('pool_size', 'num_threads', 'xnnpack')},
+        'met_target': met_target,
+        'identity': identity,
+        'results': results,
+        'tuned_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'tuning_seconds': round(time.perf_counter() - start, 2),
+    }
+    if profile_path:
+        try:
+            save_profile(profile_path, key, entry)
+        except OSError as e:
+            log(f"⚠️ Could not save autotune profile {profile_path}: {e}")
+    return {**entry, 'source': 'benchmark'}
@@ -0,0 +1,73 @@
+"""
+Pluggable interpreter backend untuk TensorFlow Lite
+
+Urutan prioritas (INTERPRETER_BACKEND=auto):
+    1. tflite_runtime  - paket tflite-runtime, hanya interpreter (kecil, start cepat)
+    2. ai_edge_litert  - paket ai-edge-litert, penerus tflite-runtime
+    3. tensorflow      - tf.lite dari TensorFlow penuh, di-import hanya jika perlu
+"""
+
+import os
+import sys
+import warnings
+
+BACKENDS = ('tflite_runtime', 'ai_edge_litert', 'tensorflow')
+
+
+def _import_interpreter(name):
+    if name == 'tflite_runtime':
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+
+    if name == 'ai_edge_litert':
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+
+    if name == 'tensorflow':
+        # Suppress TensorFlow warnings sebelum import
+        os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+        os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+        warnings.filterwarnings('ignore', category=UserWarning)
+        warnings.filterwarnings('ignore', category=FutureWarning)
+        import tensorflow as tf
+        tf.get_logger().setLevel('ERROR')
+        return tf.lite.Interpreter
+
+    raise ValueError(f"Unknown interpreter backend {name!r}, choose from: auto, {', '.join(BACKENDS)}")
+
+
+def load_backend(name=None):
+    """
+    Cari backend interpreter yang tersedia
+
+    name: 'auto'/None untuk urutan prioritas, atau salah satu dari BACKENDS
+    Return: (nama backend, class Interpreter)
+    """
+    name = (name or 'auto').strip().lower()
+    candidates = BACKENDS if name == 'auto' else (name,)
+
+    errors = []
+    for candidate in candidates:
+        try:
+            return candidate, _import_interpreter(candidate)
+        except ImportError as e:
+            errors.append(f"{candidate}: {e}")
+
+    raise ImportError(
+        "No TensorFlow Lite interpreter backend available "
+        f"(install tflite-runtime, ai-edge-litert or tensorflow): {'; '.join(errors)}"
+    )
+
+
+def delegate_options(interpreter_class, xnnpack=True):
+    """
+    Keyword argument Interpreter untuk menyalakan / mematikan delegate default (XNNPACK)
+
+    Return None jika backend tidak bisa mematikan XNNPACK (tidak punya OpResolverType).
+    """
+    if xnnpack:
+        return {}
+    resolver = getattr(sys.modules.get(interpreter_class.__module__), 'OpResolverType', None)
+    if resolver is None:
+        return None
+    return {'experimental_op_resolver_type': resolver.BUILTIN_WITHOUT_DEFAULT_DELEGATES}
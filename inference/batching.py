@@ -0,0 +1,232 @@
+"""
+Dynamic micro-batching untuk inference TFLite
+
+Request /detect yang datang bersamaan dikumpulkan (sampai max_batch_size
+gambar atau max_wait_ms) lalu dijalankan dengan satu invoke(). Setiap
+pemanggil menerima baris output miliknya sendiri.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .pool import PoolTimeoutError
+from .quantization import dequantize_output
+from .stats import LatencyWindow
+
+
+def batch_buckets(max_batch_size):
+    """
+    Ukuran batch yang dipakai untuk resize input tensor (1, 2, 4, ..., max)
+
+    Batch di-padding ke bucket terdekat supaya pool cukup menyimpan satu
+    interpreter per bucket, bukan per ukuran batch yang berbeda.
+    """
+    buckets = []
+    size = 1
+    while size < max_batch_size:
+        buckets.append(size)
+        size *= 2
+    buckets.append(max_batch_size)
+    return buckets
+
+
+def bucket_for(batch_size, buckets):
+    for bucket in buckets:
+        if batch_size <= bucket:
+            return bucket
+    return batch_size
+
+
+def invoke_batch(interpreter, input_index, output_index, batch):
+    """
+    Jalankan satu invoke() untuk seluruh batch
+
+    Input tensor di-resize (dan di-allocate ulang) hanya jika ukuran batch
+    berbeda dengan ukuran yang sedang dipakai interpreter. Interpreter dari
+    InterpreterPool.acquire(batch_size=...) sudah berukuran batch.
+    """
+    batch_size = batch.shape[0]
+    current_size = None
+    for detail in interpreter.get_input_details():
+        if detail['index'] == input_index:
+            current_size = detail['shape'][0]
+            break
+
+    if current_size != batch_size:
+        interpreter.resize_tensor_input(input_index, [batch_size, *batch.shape[1:]])
+        interpreter.allocate_tensors()
+
+    interpreter.set_tensor(input_index, batch)
+    interpreter.invoke()
+    return interpreter.get_tensor(output_index)
+
+
+class _PendingRequest:
+    __slots__ = ('array', 'enqueued_at', 'event', 'result', 'error', 'cancelled')
+
+    def __init__(self, array):
+        self.array = array
+        self.enqueued_at = time.perf_counter()
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        # Pemanggil sudah berhenti menunggu (timeout); tidak perlu di-invoke lagi
+        self.cancelled = False
+
+
+class MicroBatcher:
+    """
+    Scheduler yang menggabungkan request inference bersamaan menjadi batch
+
+    pool: InterpreterPool sumber interpreter
+    input_detail / output_detail: entry dari get_input_details()/get_output_details()
+    max_batch_size: jumlah gambar maksimum per invoke()
+    max_wait_ms: waktu tunggu maksimum sejak request pertama masuk antrean
+    workers: jumlah thread scheduler (default: ukuran pool)
+    """
+
+    def __init__(self, pool, input_detail, output_detail, max_batch_size=16,
+                 max_wait_ms=5.0, workers=None):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+
+        self.pool = pool
+        self.input_index = input_detail['index']
+        self.output_index = output_detail['index']
+        self.output_detail = output_detail
+        self.input_shape = tuple(input_detail['shape'][1:])
+        self.input_dtype = input_detail['dtype']
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.buckets = batch_buckets(max_batch_size)
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = {}
+        self._queue_latency = LatencyWindow()
+        self._invoke_latency = LatencyWindow()
+        self.cancelled = 0
+
+        self._pid = os.getpid()
+        self._threads = []
+        for i in range(workers or pool.size):
+            thread = threading.Thread(target=self._worker, name=f'microbatch-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, image_array, timeout=None):
+        """
+        Kirim satu gambar (shape [H, W, C]) dan tunggu baris output-nya
+        """
+        request = _PendingRequest(image_array)
+        self._queue.put(request)
+        if not request.event.wait(timeout):
+            request.cancelled = True
+            raise PoolTimeoutError(f"Batch scheduler did not respond after {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def close(self):
+        """
+        Hentikan thread scheduler setelah request yang sudah mengantre selesai
+        """
+        if os.getpid() != self._pid:
+            # Proses hasil fork: thread scheduler hanya ada di parent
+            return
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Sentinel shutdown dikembalikan untuk worker ini sendiri
+                self._queue.put(None)
+                break
+            if self._skip(request):
+                continue
+            batch.append(request)
+        return batch
+
+    def _skip(self, request):
+        if request.cancelled:
+            with self._lock:
+                self.cancelled += 1
+        return request.cancelled
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            if self._skip(first):
+                continue
+            batch = self._collect(first)
+            self._run(batch)
+
+    def _run(self, batch):
+        # Request yang timeout selama batch dikumpulkan tidak ikut di-invoke
+        batch = [request for request in batch if not self._skip(request)]
+        if not batch:
+            return
+        started = time.perf_counter()
+        for request in batch:
+            self._queue_latency.observe(started - request.enqueued_at)
+
+        try:
+            # Padding ke ukuran bucket, baris sisa dibiarkan nol
+            bucket = bucket_for(len(batch), self.buckets)
+            inputs = np.zeros((bucket, *self.input_shape), dtype=self.input_dtype)
+            for i, request in enumerate(batch):
+                inputs[i] = request.array
+
+            with self.pool.acquire(batch_size=bucket) as interpreter:
+                outputs = invoke_batch(interpreter, self.input_index, self.output_index, inputs)
+            outputs = dequantize_output(outputs[:len(batch)], self.output_detail)
+
+            for i, request in enumerate(batch):
+                request.result = outputs[i]
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            self._invoke_latency.observe(time.perf_counter() - started)
+            with self._lock:
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            for request in batch:
+                request.event.set()
+
+    def stats(self):
+        """
+        Histogram ukuran batch dan metrik latency antrean
+        """
+        with self._lock:
+            histogram = dict(sorted(self._batch_sizes.items()))
+        batches = sum(histogram.values())
+        images = sum(size * count for size, count in histogram.items())
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'queue_depth': self._queue.qsize(),
+            'batches': batches,
+            'images': images,
+            'cancelled': self.cancelled,
+            'avg_batch_size': round(images / batches, 3) if batches else 0.0,
+            'batch_size_histogram': {str(size): count for size, count in histogram.items()},
+            'queue_latency_seconds': self._queue_latency.snapshot(),
+            'invoke_latency_seconds': self._invoke_latency.snapshot(),
+        }
@@ -0,0 +1,263 @@
+"""
+Content-hash prediction cache
+
+Hasil prediksi disimpan berdasarkan hash bytes upload mentah ditambah
+fingerprint model (hash model .tflite dan labels.txt). Cache memori memakai
+LRU eviction dengan TTL opsional; layer disk opsional (dengan batas ukuran)
+membuat cache tetap ada setelah restart.
+
+Entry beberapa versi model bisa ada bersamaan: saat hot reload request lama
+masih selesai dengan versi sebelumnya, dan rollback kembali ke versi itu.
+Entry versi lama tidak dihapus saat versi berganti, tapi tergeser oleh LRU /
+TTL; discard() dipanggil saat registry benar-benar membuang versi tersebut.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_hash(data):
+    """
+    Hash cepat dari bytes upload
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def stream_content_hash(stream, chunk_size=64 * 1024):
+    """
+    content_hash dari file-like object, dibaca per chunk tanpa menyalin
+    seluruh isinya ke memori. Stream dikembalikan ke posisi awal.
+
+    Return: (hash, ukuran dalam bytes)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    start = stream.tell()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(start)
+    return digest.hexdigest(), size
+
+
+def file_fingerprint(*paths):
+    """
+    Fingerprint dari isi beberapa file (model dan labels)
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    """
+    LRU cache untuk hasil (predicted_class, confidence, predictions)
+
+    max_entries: jumlah entry maksimum di memori
+    ttl: umur maksimum entry dalam detik (None = tanpa batas)
+    disk_dir: direktori layer disk (None = hanya memori), boleh dipakai bersama worker prefork
+    disk_max_bytes: ukuran maksimum layer disk; file paling lama dihapus jika terlewati
+    """
+
+    # Ukuran disk dihitung ulang dari direktori setiap N tulis (worker lain ikut menulis)
+    DISK_SCAN_INTERVAL = 256
+    # Setelah prune, ukuran disk dipangkas sampai porsi ini dari disk_max_bytes
+    DISK_PRUNE_TARGET = 0.9
+
+    def __init__(self, max_entries=1024, ttl=None, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._disk_bytes = 0
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.disk_evictions = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def _expired(self, created_at):
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _disk_path(self, fingerprint, key):
+        return os.path.join(self.disk_dir, fingerprint, key[:2], f'{key}.json')
+
+    def get(self, key, fingerprint):
+        with self._lock:
+            entry = self._entries.get((fingerprint, key))
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._entries.move_to_end((fingerprint, key))
+                    self.hits += 1
+                    return value
+                del self._entries[(fingerprint, key)]
+                self.expirations += 1
+
+        value = self._disk_get(key, fingerprint) if self.disk_dir else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store((fingerprint, key), value[1], created_at=value[0])
+            return value[1]
+
+    def put(self, key, fingerprint, value):
+        created_at = time.time()
+        with self._lock:
+            self._store((fingerprint, key), value, created_at)
+        if self.disk_dir:
+            self._disk_put(key, fingerprint, value, created_at)
+
+    def _store(self, entry_key, value, created_at):
+        self._entries[entry_key] = (created_at, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, fingerprint):
+        """
+        Hapus semua entry satu versi model (memori dan disk), setelah versi itu dibuang registry
+        """
+        with self._lock:
+            stale = [entry_key for entry_key in self._entries if entry_key[0] == fingerprint]
+            for entry_key in stale:
+                del self._entries[entry_key]
+            self.invalidations += 1
+        if self.disk_dir:
+            shutil.rmtree(os.path.join(self.disk_dir, fingerprint), ignore_errors=True)
+
+    def _disk_get(self, key, fingerprint):
+        path = self._disk_path(fingerprint, key)
+        try:
+            with open(path, 'r') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(record['created_at']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        predictions = np.asarray(record['predictions'], dtype=np.float32)
+        return record['created_at'], (record['predicted_class'], record['confidence'], predictions)
+
+    def _disk_put(self, key, fingerprint, value, created_at):
+        predicted_class, confidence, predictions = value
+        path = self._disk_path(fingerprint, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Tulis ke file sementara lalu rename supaya atomic
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'created_at': created_at,
+                    'predicted_class': int(predicted_class),
+                    'confidence': float(confidence),
+                    'predictions': [float(p) for p in predictions]
+                }, f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except OSError:
+            # Layer disk bersifat best-effort
+            return
+        with self._lock:
+            self._disk_bytes += size
+            self._disk_writes += 1
+            rescan = self._disk_writes % self.DISK_SCAN_INTERVAL == 0
+            over = self._disk_bytes > self.disk_max_bytes
+        if over or rescan:
+            self._disk_prune()
+
+    def _disk_files(self):
+        """
+        (path, ukuran, mtime) semua entry di layer disk
+        """
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _disk_prune(self):
+        """
+        Hitung ulang ukuran layer disk dan hapus file paling lama jika melebihi disk_max_bytes
+        """
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            files = self._disk_files()
+            total = sum(size for _, size, _ in files)
+            evicted = 0
+            if total > self.disk_max_bytes:
+                target = self.disk_max_bytes * self.DISK_PRUNE_TARGET
+                for path, size, _ in sorted(files, key=lambda item: item[2]):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    evicted += 1
+            with self._lock:
+                self._disk_bytes = total
+                self.disk_evictions += evicted
+        finally:
+            self._prune_lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'disk_enabled': bool(self.disk_dir),
+                'disk_bytes': self._disk_bytes if self.disk_dir else 0,
+                'disk_max_bytes': self.disk_max_bytes if self.disk_dir else None,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
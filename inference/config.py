@@ -0,0 +1,41 @@
+"""
+Helper untuk membaca konfigurasi dari environment variables
+"""
+
+import os
+
+
+def env_int(name, default):
+    """
+    Baca integer dari environment, pakai default jika kosong
+    """
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got {value!r}")
+
+
+def env_float(name, default):
+    """
+    Baca float dari environment, pakai default jika kosong
+    """
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be a number, got {value!r}")
+
+
+def env_bool(name, default=False):
+    """
+    Baca boolean dari environment (1/true/yes/on)
+    """
+    value = os.environ.get(name, '').strip().lower()
+    if not value:
+        return default
+    return value in {'1', 'true', 'yes', 'on'}
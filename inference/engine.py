@@ -0,0 +1,767 @@
+"""
+Inference engine: satu implementasi model -> prediksi untuk semua front end
+
+InferenceEngine memegang siklus hidup interpreter (ModelRegistry, pool,
+micro-batcher, warm-up), buffer preprocessing, inference batch/TTA, prediction
+cache dan threshold. app.py (dan asgi_app.py lewat app.py), flask_app.py dan
+streamlit_app.py hanya adapter HTTP/UI di atasnya, jadi perubahan pooling,
+caching atau batching cukup dibuat di sini.
+
+    engine = InferenceEngine.from_env(model_path, labels_path)
+    engine.load()
+    result = engine.predict(open('daun.jpg', 'rb').read())
+    result.label, result.confidence, result.detected, result.top(3)
+"""
+
+import io
+import os
+import time
+from contextlib import ExitStack, nullcontext
+
+import numpy as np
+from PIL import Image
+
+from .autotune import autotune, settings_from_env
+from .backends import delegate_options, load_backend
+from .batching import MicroBatcher, batch_buckets, bucket_for, invoke_batch
+from .cache import PredictionCache, content_hash, stream_content_hash
+from .config import env_bool, env_float, env_int
+from .memory import MappedModel, interpreter_source, load_model_content, model_buffer, model_memory, process_memory
+from .near_duplicates import NearDuplicateCache
+from .pool import InterpreterPool, PoolTimeoutError
+from .preprocessing import (
+    IMAGE_FORMATS, ImageTooLarge, UnsupportedImageFormat, image_into, input_buffer, preprocess_into, resample_filter
+)
+from .quantization import dequantize_output
+from .registry import ModelRegistry, ModelVersion
+from .responses import DEFAULT_TOP_K, JSON_TYPE, top_k
+from .tensors import InvalidTensor, model_input, npy_tensor, parse_dtype, parse_shape, raw_tensor
+from .tta import TestTimeAugmentation
+
+
+class PreprocessingError(ValueError):
+    """
+    Input tidak bisa di-decode / diubah ke input model (error dari client)
+    """
+
+
+class PredictionError(ValueError):
+    """
+    Inference gagal (error di server)
+    """
+
+
+def read_labels(path):
+    with open(path, 'r') as f:
+        return [line.strip().split(' ', 1)[1] for line in f.readlines()]
+
+
+def tensor_cache_key(data, kind, shape=None, dtype=None):
+    """
+    Key cache untuk input tensor: bytes yang sama dengan shape/dtype berbeda adalah input berbeda
+    """
+    return content_hash(f'{kind}:{shape}:{dtype}:{content_hash(data)}'.encode('utf-8'))
+
+
+class Result:
+    """
+    Hasil prediksi satu gambar dari satu versi model
+    """
+
+    __slots__ = ('predicted_class', 'confidence', 'predictions', 'model', 'threshold', 'cached')
+
+    def __init__(self, predicted_class, confidence, predictions, model, threshold, cached=False):
+        self.predicted_class = int(predicted_class)
+        self.confidence = float(confidence)
+        self.predictions = predictions
+        self.model = model
+        self.threshold = threshold
+        self.cached = cached
+
+    @property
+    def label(self):
+        return self.model.labels[self.predicted_class]
+
+    @property
+    def detected(self):
+        return self.confidence >= self.threshold
+
+    @property
+    def prediction(self):
+        """
+        (predicted_class, confidence, predictions), bentuk yang disimpan di prediction cache
+        """
+        return self.predicted_class, self.confidence, self.predictions
+
+    def top(self, k=DEFAULT_TOP_K):
+        """
+        k prediksi teratas sebagai list (label, skor), urut menurun
+        """
+        return [(self.model.labels[i], float(self.predictions[i])) for i in top_k(self.predictions, k)]
+
+    def to_dict(self, k=DEFAULT_TOP_K, full=False):
+        """
+        Response deteksi sebagai dict (format /detect)
+        """
+        return self.model.responses.result(*self.prediction, self.threshold, k, full)
+
+    def encode(self, content_type=JSON_TYPE, k=DEFAULT_TOP_K, full=False):
+        """
+        Response deteksi sebagai bytes (lihat inference/responses.py)
+        """
+        return self.model.responses.encode(content_type, *self.prediction, self.threshold, k=k, full=full)
+
+
+class InferenceEngine:
+    """
+    interpreter_class: class Interpreter dari load_backend
+    pool_size / num_threads / pool_timeout: konfigurasi InterpreterPool
+    microbatch: None, atau dict max_batch_size / max_wait_ms untuk MicroBatcher
+    batch_max_size: jumlah gambar maksimum per invoke() untuk predict batch dan TTA
+    threshold: confidence minimum agar penyakit dianggap terdeteksi
+    resample / draft / reducing_gap / max_pixels / formats: lihat preprocess_into
+    tta: TestTimeAugmentation opsional untuk prediksi yang ragu
+    cache: PredictionCache opsional (key = hash bytes input + fingerprint model)
+    near_duplicates: NearDuplicateCache opsional (key = perceptual hash input model)
+    model_mmap: bangun interpreter dari file model yang di-mmap (lihat inference/memory.py)
+    xnnpack: pakai delegate default (XNNPACK); False hanya jika backend mendukung OpResolverType
+    autotune: None, atau dict argumen inference/autotune.py untuk tune()
+    """
+
+    def __init__(self, model_path, labels_path, interpreter_class, backend_name=None, pool_size=1, num_threads=1,
+                 pool_timeout=30.0, microbatch=None, batch_max_size=16, threshold=0.5,
+                 resample=Image.Resampling.BICUBIC, draft=True, reducing_gap=None, max_pixels=None,
+                 formats=IMAGE_FORMATS, tta=None, cache=None, near_duplicates=None, warmup_iterations=1,
+                 model_mmap=True, xnnpack=True, autotune=None):
+        self.model_path = model_path
+        self.labels_path = labels_path
+        self.interpreter_class = interpreter_class
+        self.backend_name = backend_name
+        self.pool_size = pool_size
+        self.num_threads = num_threads
+        self.pool_timeout = pool_timeout
+        self.microbatch = microbatch
+        self.batch_max_size = batch_max_size
+        self.threshold = threshold
+        self.resample = resample
+        self.draft = draft
+        self.reducing_gap = reducing_gap
+        self.max_pixels = max_pixels
+        self.formats = formats
+        self.tta = tta
+        self.cache = cache
+        self.near_duplicates = near_duplicates
+        self.warmup_iterations = warmup_iterations
+        self.model_mmap = model_mmap
+        self.xnnpack = xnnpack
+        self.autotune = autotune
+        self.tuning = None
+        self.profiler = None
+        self.registry = ModelRegistry(self.load_version, warmup=self.warmup, on_retire=self.retired)
+
+    @classmethod
+    def from_env(cls, model_path, labels_path, **overrides):
+        """
+        Engine dengan konfigurasi dari environment variable (lihat README)
+        overrides: argumen __init__ yang menimpa nilai dari environment
+        """
+        backend_name, interpreter_class = load_backend(os.environ.get('INTERPRETER_BACKEND'))
+        config = {
+            'interpreter_class': interpreter_class,
+            'backend_name': backend_name,
+            'pool_size': env_int('INTERPRETER_POOL_SIZE', os.cpu_count() or 1),
+            'num_threads': env_int('INTERPRETER_NUM_THREADS', 1),
+            'pool_timeout': env_float('INTERPRETER_POOL_TIMEOUT', 30.0),
+            'microbatch': None,
+            'batch_max_size': env_int('BATCH_MAX_SIZE', 16),
+            'resample': resample_filter(os.environ.get('PREPROCESS_RESAMPLE', 'bicubic')),
+            'draft': env_bool('PREPROCESS_DRAFT', True),
+            'reducing_gap': env_float('PREPROCESS_REDUCING_GAP', 3.0) or None,
+            'max_pixels': env_int('MAX_IMAGE_PIXELS', 50_000_000),
+            'tta': None,
+            'cache': None,
+            'near_duplicates': None,
+            'warmup_iterations': env_int('WARMUP_ITERATIONS', 1),
+            'model_mmap': env_bool('MODEL_MMAP', True),
+            'xnnpack': env_bool('INTERPRETER_XNNPACK', True),
+            'autotune': settings_from_env(),
+        }
+        if env_bool('MICROBATCH_ENABLED'):
+            config['microbatch'] = {
+                'max_batch_size': env_int('MICROBATCH_MAX_SIZE', 16),
+                'max_wait_ms': env_float('MICROBATCH_MAX_WAIT_MS', 5.0),
+            }
+        if env_bool('TTA_ENABLED'):
+            config['tta'] = TestTimeAugmentation(
+                [name.strip() for name in os.environ.get('TTA_TRANSFORMS', 'hflip,rot90,rot270,crop_center').split(',') if name.strip()],
+                band=tuple(float(v) for v in os.environ.get('TTA_BAND', '0.35,0.65').split(',')),
+                aggregate=os.environ.get('TTA_AGGREGATE', 'mean').strip().lower(),
+                crop_scale=env_float('TTA_CROP_SCALE', 0.875)
+            )
+        if env_int('PREDICTION_CACHE_SIZE', 1024) > 0:
+            config['cache'] = PredictionCache(
+                max_entries=env_int('PREDICTION_CACHE_SIZE', 1024),
+                ttl=env_float('PREDICTION_CACHE_TTL', 0.0) or None,
+                disk_dir=os.environ.get('PREDICTION_CACHE_DIR') or None,
+                disk_max_bytes=env_int('PREDICTION_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024)
+            )
+        if env_int('NEAR_DUPLICATE_CACHE_SIZE', 0) > 0:
+            config['near_duplicates'] = NearDuplicateCache(
+                max_entries=env_int('NEAR_DUPLICATE_CACHE_SIZE', 0),
+                max_distance=env_int('NEAR_DUPLICATE_MAX_DISTANCE', 6)
+            )
+        config.update(overrides)
+        return cls(model_path, labels_path, **config)
+
+    # Siklus hidup model dan interpreter
+
+    @property
+    def model(self):
+        """
+        Versi model aktif; ambil sekali per request supaya swap tidak berpengaruh di tengah jalan
+        """
+        return self.registry.active
+
+    def load(self, warmup=True):
+        """
+        Muat model_path / labels_path sebagai versi aktif
+        """
+        return self.registry.load(self.model_path, self.labels_path, warmup=warmup)
+
+    def create_interpreter(self, model_content, num_threads=None, xnnpack=None):
+        """
+        Interpreter baru (belum allocate_tensors) untuk model_content
+        """
+        options = delegate_options(self.interpreter_class, self.xnnpack if xnnpack is None else xnnpack)
+        if options is None:
+            raise ValueError(f"Interpreter backend {self.backend_name} cannot disable XNNPACK")
+        return self.interpreter_class(
+            **interpreter_source(model_content),
+            num_threads=num_threads or self.num_threads,
+            **options
+        )
+
+    def create_pool(self, model_content):
+        return InterpreterPool(lambda: self.create_interpreter(model_content), size=self.pool_size)
+
+    def create_batcher(self, pool):
+        if self.microbatch is None:
+            return None
+        return MicroBatcher(pool, pool.get_input_details()[0], pool.get_output_details()[0], **self.microbatch)
+
+    def attach_runtime(self, model):
+        """
+        Bangun interpreter pool dan scheduler untuk satu versi model
+        """
+        pool = self.create_pool(model.model_content)
+        model.attach(pool, self.create_batcher(pool))
+
+    def load_version(self, model_path, labels_path, version, fingerprint):
+        """
+        Loader untuk ModelRegistry: baca model dan labels lalu bangun pool-nya
+
+        Dengan model_mmap file model dipetakan read-only dan semua interpreter
+        (juga di worker prefork) memakai halaman page cache yang sama. Jika mmap
+        tidak tersedia atau backend gagal membuka model dari path, model dibaca
+        sekali ke memori dan dibagi copy-on-write ke worker.
+        """
+        content = load_model_content(model_path, self.model_mmap)
+        model = ModelVersion(version, model_path, labels_path, content, read_labels(labels_path), fingerprint)
+        try:
+            self.attach_runtime(model)
+        except Exception as e:
+            if not isinstance(content, MappedModel):
+                raise
+            print(f"⚠️ Loading mmapped model failed, reading into memory: {e}")
+            content.close()
+            model.model_content = load_model_content(model_path, use_mmap=False)
+            self.attach_runtime(model)
+        return model
+
+    def reinitialize(self, pool_size=None, num_threads=None):
+        """
+        Bangun ulang runtime semua versi di registry, misalnya di proses worker setelah fork
+        (interpreter dan thread milik proses parent tidak aman dipakai di child)
+        """
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if num_threads is not None:
+            self.num_threads = num_threads
+        for model in self.registry.versions():
+            self.attach_runtime(model)
+
+    def tune(self, cpus=None, apply=True, log=print):
+        """
+        Pilih pool_size / num_threads / xnnpack dengan autotuner (inference/autotune.py)
+
+        cpus: jumlah CPU untuk proses ini (default: affinity proses saat ini)
+        apply: bangun ulang runtime dengan konfigurasi terpilih; False untuk
+            master prefork yang hanya menyimpan hasilnya untuk worker
+        Return: entry profile, atau None jika autotune tidak dikonfigurasi
+        """
+        if self.autotune is None:
+            return None
+        settings = dict(self.autotune)
+        if settings.get('profile_path') is None:
+            settings['profile_path'] = os.path.join(os.path.dirname(self.model_path), 'autotune_profile.json')
+        if delegate_options(self.interpreter_class, xnnpack=False) is None:
+            settings['xnnpack_options'] = (True,)
+
+        model = self.model
+        self.tuning = autotune(
+            lambda threads, xnnpack: self.create_interpreter(model.model_content, threads, xnnpack),
+            model.input_details[0], model.output_details[0]['index'], model.fingerprint, self.backend_name,
+            cpus=cpus, log=log, **settings
+        )
+        config = self.tuning['config']
+        self.xnnpack = config['xnnpack']
+        if apply:
+            self.reinitialize(config['pool_size'], config['num_threads'])
+        else:
+            self.pool_size, self.num_threads = config['pool_size'], config['num_threads']
+        return self.tuning
+
+    def tuning_stats(self):
+        if self.tuning is None:
+            return {'enabled': False, 'xnnpack': self.xnnpack}
+        return {
+            'enabled': True,
+            'source': self.tuning['source'],
+            'xnnpack': self.xnnpack,
+            **{name: self.tuning[name] for name in ('config', 'met_target', 'tuned_at', 'tuning_seconds')},
+            'target_p95_ms': self.tuning['identity']['target_p95_ms'],
+            'cpus': self.tuning['identity']['cpus'],
+        }
+
+    def warmup_batch_sizes(self, model):
+        """
+        Semua ukuran batch yang dipakai saat serving, dari besar ke kecil
+        """
+        sizes = {1, *batch_buckets(self.batch_max_size)}
+        if model.batcher is not None:
+            sizes.update(model.batcher.buckets)
+        return sorted(sizes, reverse=True)
+
+    def warmup(self, model):
+        """
+        Jalankan invoke() dengan input kosong di setiap ukuran batch yang dipakai
+
+        Pembuatan interpreter per ukuran batch di setiap anggota pool,
+        inisialisasi kernel (XNNPACK packing weights) dan page fault pada buffer
+        model terjadi di sini, bukan di request pertama. Per ukuran batch semua
+        anggota pool dipinjam sekaligus, jadi aman walaupun versi ini sudah
+        melayani request (request tersebut menunggu).
+        """
+        # Sentuh setiap halaman buffer model
+        np.frombuffer(model_buffer(model.model_content), dtype=np.uint8)[::4096].sum()
+
+        detail = model.input_details[0]
+        output_index = model.output_details[0]['index']
+        for size in self.warmup_batch_sizes(model):
+            dummy = np.zeros((size, *detail['shape'][1:]), dtype=detail['dtype'])
+            with ExitStack() as stack:
+                for _ in range(model.pool.size):
+                    interpreter = stack.enter_context(model.pool.acquire(timeout=self.pool_timeout, batch_size=size))
+                    for _ in range(self.warmup_iterations):
+                        invoke_batch(interpreter, detail['index'], output_index, dummy)
+
+    # Preprocessing
+
+    def allocations(self, label):
+        """
+        Context manager tracemalloc dari profiler (inference/profiling.py) jika aktif
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.allocations(label)
+
+    def preprocess(self, source, out=None, trace=None, model=None):
+        """
+        Ubah source ke input model [1, H, W, C]
+
+        source: bytes, stream file, PIL Image atau np.ndarray (lihat model_input)
+        out: buffer tujuan (default: buffer per thread yang dipakai ulang)
+        trace: dict opsional untuk durasi per stage (decode, resize, normalize)
+        model: ModelVersion yang dipakai (default: versi aktif)
+        """
+        with self.allocations('preprocess'):
+            return self._preprocess(source, out, trace, model)
+
+    def _preprocess(self, source, out, trace, model):
+        try:
+            model = model or self.model
+            input_detail = model.input_details[0]
+            if isinstance(source, np.ndarray):
+                if out is None and source.dtype == np.uint8:
+                    out = input_buffer(input_detail['shape'], input_detail['dtype'])
+                return model_input(source, input_detail, quantization=model.input_quantization, out=out)
+
+            if out is None:
+                out = input_buffer(input_detail['shape'], input_detail['dtype'])
+            if isinstance(source, Image.Image):
+                image_into(source, out[0], resample=self.resample, reducing_gap=self.reducing_gap,
+                           quantization=model.input_quantization)
+                return out
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                source = io.BytesIO(source)
+            # Decode (JPEG di-downscale saat decode), resize dan normalize ke [0, 1]
+            preprocess_into(
+                source,
+                out[0],
+                resample=self.resample,
+                draft=self.draft,
+                reducing_gap=self.reducing_gap,
+                quantization=model.input_quantization,
+                trace=trace,
+                max_pixels=self.max_pixels,
+                formats=self.formats
+            )
+            return out
+        except (ImageTooLarge, UnsupportedImageFormat, InvalidTensor):
+            raise
+        except Exception as e:
+            raise PreprocessingError(f"Error preprocessing image: {str(e)}")
+
+    def preprocess_tensor(self, data, kind, shape=None, dtype=None, out=None, trace=None, model=None):
+        """
+        Ubah tensor mentah dari client ke input model, tanpa decode dan resize
+        kind: 'raw' (shape/dtype dari header, default shape input model dan uint8) atau 'npy'
+        out: buffer tujuan untuk tensor uint8 (default: buffer per thread)
+        """
+        model = model or self.model
+        input_detail = model.input_details[0]
+        start = time.perf_counter()
+        with self.allocations('preprocess'):
+            if kind == 'npy':
+                array = npy_tensor(data)
+            else:
+                array = raw_tensor(
+                    data,
+                    parse_shape(shape) if shape else tuple(input_detail['shape']),
+                    parse_dtype(dtype or 'uint8')
+                )
+            image_array = self._preprocess(array, out, None, model)
+        if trace is not None:
+            trace['normalize'] = time.perf_counter() - start
+        return image_array
+
+    # Inference
+
+    def invoke_chunks(self, images, model):
+        """
+        Batched invoke() untuk banyak gambar [H, W, C], per chunk batch_max_size
+        Return: array prediksi (sudah di-dequantize) per gambar, urutan sama dengan input
+        """
+        input_details, output_details = model.input_details, model.output_details
+        buckets = batch_buckets(self.batch_max_size)
+        input_shape = tuple(input_details[0]['shape'][1:])
+        outputs = []
+
+        for start in range(0, len(images), self.batch_max_size):
+            chunk = images[start:start + self.batch_max_size]
+
+            # Padding ke ukuran bucket supaya pool cukup menyimpan satu interpreter per bucket
+            inputs = np.zeros((bucket_for(len(chunk), buckets), *input_shape), dtype=input_details[0]['dtype'])
+            for i, image in enumerate(chunk):
+                inputs[i] = image
+
+            with model.pool.acquire(timeout=self.pool_timeout, batch_size=len(inputs)) as interpreter:
+                output_data = invoke_batch(
+                    interpreter,
+                    input_details[0]['index'],
+                    output_details[0]['index'],
+                    inputs
+                )
+
+            outputs.extend(dequantize_output(output_data[:len(chunk)], output_details[0]))
+        return outputs
+
+    def apply_tta(self, image_arrays, results, trace=None, model=None):
+        """
+        Test-time augmentation untuk hasil yang confidence-nya di dalam band TTA
+        image_arrays: list array [1, H, W, C]; results: list (class, confidence, predictions) first pass
+        Augmentasi semua gambar yang ragu dijalankan bersama dalam batched invoke()
+        """
+        uncertain = [i for i, result in enumerate(results) if self.tta.applies(result[1])]
+        if not uncertain:
+            return results
+
+        start = time.perf_counter()
+        model = model or self.model
+        augmented = [self.tta.augment(image_arrays[i][0]) for i in uncertain]
+        outputs = self.invoke_chunks([image for batch in augmented for image in batch], model)
+
+        results = list(results)
+        count = len(self.tta.transforms)
+        for n, i in enumerate(uncertain):
+            results[i] = self.tta.aggregate(results[i][2], np.asarray(outputs[n * count:(n + 1) * count]))
+        if trace is not None:
+            trace['tta'] = time.perf_counter() - start
+        return results
+
+    def near_duplicate(self, image_array, model, trace=None):
+        """
+        Cari prediksi gambar yang mirip di near-duplicate cache
+        Return: (hash, prediction); prediction None jika tidak ada
+        """
+        key, prediction, distance = self.near_duplicates.lookup(image_array[0], model.fingerprint)
+        if trace is not None and prediction is not None:
+            trace['near_duplicate_distance'] = distance
+        return key, prediction
+
+    def infer(self, image_array, trace=None, model=None):
+        """
+        Inference satu input [1, H, W, C]
+        trace: dict opsional, diisi durasi 'near_duplicate', 'inference' (termasuk antre interpreter) dan 'tta'
+        Return: (predicted_class, confidence, predictions)
+        """
+        try:
+            start = time.perf_counter()
+            model = model or self.model
+            near_key = None
+            if self.near_duplicates is not None:
+                near_key, prediction = self.near_duplicate(image_array, model, trace)
+                now = time.perf_counter()
+                if trace is not None:
+                    trace['near_duplicate'] = now - start
+                if prediction is not None:
+                    return prediction
+                start = now
+            if model.batcher is not None:
+                # Serahkan ke scheduler, hasilnya baris output milik request ini
+                predictions = model.batcher.submit(image_array[0], timeout=self.pool_timeout)
+            else:
+                # Pinjam interpreter dari pool selama inference
+                with model.pool.acquire(timeout=self.pool_timeout, batch_size=len(image_array)) as interpreter:
+                    output_data = invoke_batch(
+                        interpreter,
+                        model.input_details[0]['index'],
+                        model.output_details[0]['index'],
+                        image_array
+                    )
+                predictions = dequantize_output(output_data[0], model.output_details[0])
+            if trace is not None:
+                trace['inference'] = time.perf_counter() - start
+
+            # Get predicted class dan confidence
+            predicted_class = np.argmax(predictions)
+            prediction = (predicted_class, float(predictions[predicted_class]), predictions)
+
+            if self.tta is not None and self.tta.applies(prediction[1]):
+                prediction = self.apply_tta([image_array], [prediction], trace, model)[0]
+            if near_key is not None:
+                self.near_duplicates.put(near_key, model.fingerprint, prediction)
+            return prediction
+        except PoolTimeoutError:
+            raise
+        except Exception as e:
+            raise PredictionError(f"Error during prediction: {str(e)}")
+
+    def infer_batch(self, image_arrays, trace=None, model=None):
+        """
+        Inference banyak input sekaligus dengan batched invoke()
+        image_arrays: list array dengan shape [1, H, W, C]
+        trace: dict opsional, diisi durasi 'near_duplicate', 'batch_inference' untuk semua chunk dan 'tta'
+        """
+        try:
+            start = time.perf_counter()
+            model = model or self.model
+            results = [None] * len(image_arrays)
+            near_keys = {}
+            pending = []
+            for i, image_array in enumerate(image_arrays):
+                if self.near_duplicates is not None:
+                    near_keys[i], results[i] = self.near_duplicate(image_array, model)
+                    if results[i] is not None:
+                        continue
+                pending.append(i)
+            if self.near_duplicates is not None:
+                now = time.perf_counter()
+                if trace is not None:
+                    trace['near_duplicate'] = now - start
+                start = now
+
+            fresh = []
+            for predictions in self.invoke_chunks([image_arrays[i][0] for i in pending], model):
+                predicted_class = np.argmax(predictions)
+                fresh.append((predicted_class, float(predictions[predicted_class]), predictions))
+
+            if trace is not None:
+                trace['batch_inference'] = time.perf_counter() - start
+            if self.tta is not None:
+                fresh = self.apply_tta([image_arrays[i] for i in pending], fresh, trace, model)
+            for i, prediction in zip(pending, fresh):
+                results[i] = prediction
+                if i in near_keys:
+                    self.near_duplicates.put(near_keys[i], model.fingerprint, prediction)
+            return results
+        except PoolTimeoutError:
+            raise
+        except Exception as e:
+            raise PredictionError(f"Error during prediction: {str(e)}")
+
+    def retired(self, model):
+        """
+        Versi dibuang registry: hapus entry cache-nya, kecuali fingerprint yang sama dimuat lagi
+        """
+        if model.fingerprint in {version.fingerprint for version in self.registry.versions()}:
+            return
+        if self.cache is not None:
+            self.cache.discard(model.fingerprint)
+        if self.near_duplicates is not None:
+            self.near_duplicates.discard(model.fingerprint)
+
+    # Prediction cache
+
+    def lookup(self, cache_key, model, trace=None):
+        """
+        Result dari prediction cache, atau None
+        """
+        if self.cache is None or cache_key is None:
+            return None
+        cached = self.cache.get(cache_key, model.fingerprint)
+        if cached is None:
+            return None
+        if trace is not None:
+            trace['cache_hit'] = True
+        return self.result(cached, model, cached=True)
+
+    def remember(self, cache_key, result):
+        if self.cache is not None and cache_key is not None:
+            self.cache.put(cache_key, result.model.fingerprint, result.prediction)
+
+    def source_key(self, source, trace=None):
+        """
+        Hash isi source (bytes atau stream seekable) untuk prediction cache
+        Stream di-hash per chunk lalu dikembalikan ke awal; None untuk Image/ndarray
+        """
+        start = time.perf_counter()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            cache_key, size = content_hash(source), len(source)
+        elif hasattr(source, 'read'):
+            cache_key, size = stream_content_hash(source)
+        else:
+            return None
+        if trace is not None:
+            trace['read'] = time.perf_counter() - start
+            trace['upload_bytes'] = size
+        return cache_key
+
+    # API tingkat tinggi
+
+    def image_rejection(self, error):
+        """
+        Body response dan status code untuk gambar yang ditolak sebelum decode
+        (ImageTooLarge: 413, UnsupportedImageFormat: 415), sama untuk semua front end
+        """
+        if isinstance(error, ImageTooLarge):
+            return {
+                'error': 'Image too large',
+                'message': str(error),
+                'max_pixels': self.max_pixels
+            }, 413
+        return {
+            'error': 'Unsupported media type',
+            'message': str(error),
+            'supported_formats': list(self.formats)
+        }, 415
+
+    def result(self, prediction, model=None, cached=False):
+        """
+        Result dari (predicted_class, confidence, predictions)
+        """
+        return Result(*prediction, model or self.model, self.threshold, cached=cached)
+
+    def predict(self, source, trace=None, model=None):
+        """
+        Prediksi satu gambar: cache, preprocess, inference (dan TTA)
+
+        source: bytes, stream file, PIL Image atau np.ndarray
+        Error: ImageTooLarge / UnsupportedImageFormat / InvalidTensor / PreprocessingError
+            untuk input yang ditolak, PoolTimeoutError dan PredictionError dari inference
+        """
+        model = model or self.model
+        cache_key = self.source_key(source, trace) if self.cache is not None else None
+        cached = self.lookup(cache_key, model, trace)
+        if cached is not None:
+            return cached
+        image_array = self.preprocess(source, trace=trace, model=model)
+        result = self.result(self.infer(image_array, trace=trace, model=model), model)
+        self.remember(cache_key, result)
+        return result
+
+    def predict_tensor(self, data, kind, shape=None, dtype=None, trace=None, model=None):
+        """
+        Seperti predict untuk tensor mentah (lihat preprocess_tensor)
+        """
+        model = model or self.model
+        start = time.perf_counter()
+        cache_key = tensor_cache_key(data, kind, shape, dtype)
+        if trace is not None:
+            trace['read'] = time.perf_counter() - start
+            trace['upload_bytes'] = len(data)
+        cached = self.lookup(cache_key, model, trace)
+        if cached is not None:
+            return cached
+        image_array = self.preprocess_tensor(data, kind, shape, dtype, trace=trace, model=model)
+        result = self.result(self.infer(image_array, trace=trace, model=model), model)
+        self.remember(cache_key, result)
+        return result
+
+    def predict_batch(self, sources, trace=None, model=None, return_exceptions=False):
+        """
+        Prediksi banyak gambar dengan batched invoke(); hanya yang belum ada di cache yang di-decode
+        return_exceptions: error preprocessing per gambar dikembalikan di posisinya
+            (bukan menggagalkan seluruh batch); error inference tetap di-raise
+        """
+        model = model or self.model
+        input_detail = model.input_details[0]
+        results = [None] * len(sources)
+        cache_keys = {}
+        pending = []
+        for i, source in enumerate(sources):
+            cache_keys[i] = self.source_key(source) if self.cache is not None else None
+            results[i] = self.lookup(cache_keys[i], model)
+            if results[i] is not None:
+                continue
+            # Setiap gambar punya buffer sendiri, buffer per thread akan tertimpa
+            out = np.empty(tuple(input_detail['shape']), dtype=input_detail['dtype'])
+            try:
+                pending.append((i, self.preprocess(source, out=out, model=model)))
+            except ValueError as e:
+                if not return_exceptions:
+                    raise
+                results[i] = e
+
+        if pending:
+            predictions = self.infer_batch([image_array for _, image_array in pending], trace=trace, model=model)
+            for (i, _), prediction in zip(pending, predictions):
+                results[i] = self.result(prediction, model)
+                self.remember(cache_keys[i], results[i])
+        return results
+
+    def stats(self):
+        model = self.model
+        return {
+            'interpreter_backend': self.backend_name,
+            'model_registry': self.registry.stats(),
+            'interpreter_pool': model.pool.stats(),
+            'batching': model.batcher.stats() if model.batcher is not None else {'enabled': False},
+            'prediction_cache': self.cache.stats() if self.cache is not None else {'enabled': False},
+            'near_duplicate_cache': (
+                self.near_duplicates.stats() if self.near_duplicates is not None else {'enabled': False}
+            ),
+            'tta': self.tta.stats() if self.tta is not None else {'enabled': False},
+            'autotune': self.tuning_stats(),
+        }
+
+    def memory_stats(self, model=None):
+        """
+        RSS / PSS proses ini dan memori file model (lihat inference/memory.py)
+
+        Membaca seluruh /proc/self/smaps, jadi tidak dipakai di /health (lihat /admin/memory)
+        """
+        return {
+            'process': process_memory(),
+            'model': model_memory((model or self.model).model_content),
+        }
@@ -0,0 +1,196 @@
+"""
+Model yang dipetakan ke memori (mmap) dan akuntansi memori proses
+
+Interpreter TFLite yang dibuat dari model_content=bytes memegang buffer di
+heap proses: satu salinan per proses, dan di mode prefork hanya dibagi
+copy-on-write selama halamannya tidak tersentuh. Dengan MappedModel file
+model dibuka sekali, dipetakan read-only, dan setiap interpreter dibangun
+dari path /proc/self/fd/<fd> yang menunjuk ke inode yang sama. Loader file
+TFLite mem-mmap file itu sendiri, jadi semua interpreter di semua worker
+memakai halaman page cache yang sama (Shared_Clean) dan kernel bisa
+membuangnya saat memori sempit tanpa swap.
+
+Path fd dipakai (bukan path asli) supaya worker yang di-fork belakangan
+tetap membaca versi yang sama walaupun file di model/ sudah diganti lewat
+rename. Menimpa isi file yang sama di tempat (in-place) tetap tidak aman:
+halaman yang dipetakan ikut berubah.
+
+process_memory() dan mapping_memory() membaca /proc/self/smaps_rollup dan
+/proc/self/smaps. RSS menghitung penuh setiap halaman yang dipakai bersama,
+PSS membaginya dengan jumlah proses yang memetakannya, jadi jumlah PSS semua
+worker adalah memori fisik yang sebenarnya terpakai.
+"""
+
+import mmap
+import os
+import resource
+import sys
+
+SMAPS_ROLLUP = '/proc/self/smaps_rollup'
+SMAPS = '/proc/self/smaps'
+STATUS = '/proc/self/status'
+FD_DIR = '/proc/self/fd'
+
+# Field smaps_rollup (kB) yang dilaporkan, sebagai <nama>_bytes
+ROLLUP_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Pss_Anon': 'pss_anon',
+    'Pss_File': 'pss_file',
+    'Shared_Clean': 'shared_clean',
+    'Shared_Dirty': 'shared_dirty',
+    'Private_Clean': 'private_clean',
+    'Private_Dirty': 'private_dirty',
+    'Swap': 'swap',
+}
+
+
+class MappedModel:
+    """
+    File model yang dipetakan read-only; fd-nya tetap terbuka selama versi dipakai
+
+    Raise OSError / ValueError jika mmap tidak didukung (misalnya tanpa /proc
+    atau file kosong); pemanggil kembali ke bytes (lihat load_model_content).
+    """
+
+    def __init__(self, path):
+        if not os.path.isdir(FD_DIR):
+            raise OSError(f'{FD_DIR} is not available')
+        self._file = open(path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(self._file.fileno())
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        self.size = stat.st_size
+        self.inode = stat.st_ino
+
+    @property
+    def path(self):
+        """
+        Path yang selalu membuka inode yang sama, juga di proses hasil fork
+        """
+        return os.path.join(FD_DIR, str(self._file.fileno()))
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        try:
+            self.buffer.close()
+        except BufferError:
+            # Masih ada view numpy yang aktif; mapping dilepas saat di-GC
+            pass
+        self._file.close()
+
+
+def load_model_content(path, use_mmap=True):
+    """
+    MappedModel jika use_mmap dan mmap tersedia, selain itu isi file sebagai bytes
+    """
+    if use_mmap:
+        try:
+            return MappedModel(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ mmap model failed, reading into memory: {e}", file=sys.stderr)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def interpreter_source(model_content):
+    """
+    Keyword argument Interpreter untuk model_content (MappedModel atau bytes)
+    """
+    if isinstance(model_content, MappedModel):
+        return {'model_path': model_content.path}
+    return {'model_content': model_content}
+
+
+def model_buffer(model_content):
+    """
+    Buffer yang bisa dibaca np.frombuffer, untuk menyentuh halaman saat warm-up
+    """
+    if isinstance(model_content, MappedModel):
+        return model_content.buffer
+    return model_content
+
+
+def read_kb_fields(path):
+    """
+    Baris '<Field>: <n> kB' dari file /proc sebagai {Field: bytes}
+    """
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return fields
+
+
+def process_memory():
+    """
+    RSS, PSS dan rinciannya untuk proses ini dalam bytes
+
+    Fallback: VmRSS dari /proc/self/status, lalu peak RSS dari getrusage
+    (tanpa PSS) di sistem tanpa smaps_rollup.
+    """
+    try:
+        fields = read_kb_fields(SMAPS_ROLLUP)
+        return {
+            'source': 'smaps_rollup',
+            **{f'{name}_bytes': fields[field] for field, name in ROLLUP_FIELDS.items() if field in fields},
+        }
+    except OSError:
+        pass
+    try:
+        fields = read_kb_fields(STATUS)
+        if 'VmRSS' in fields:
+            return {'source': 'status', 'rss_bytes': fields['VmRSS']}
+    except OSError:
+        pass
+    # ru_maxrss dalam kB di Linux, bytes di macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'source': 'getrusage', 'max_rss_bytes': max_rss if sys.platform == 'darwin' else max_rss * 1024}
+
+
+def mapping_memory(inode):
+    """
+    RSS / PSS semua mapping file dengan inode tertentu di proses ini
+
+    Satu mapping per interpreter (loader TFLite) ditambah satu milik MappedModel.
+    None jika /proc/self/smaps tidak tersedia.
+    """
+    totals = {'mappings': 0, 'rss_bytes': 0, 'pss_bytes': 0, 'shared_bytes': 0, 'private_bytes': 0}
+    fields = {'Rss:': 'rss_bytes', 'Pss:': 'pss_bytes',
+              'Shared_Clean:': 'shared_bytes', 'Shared_Dirty:': 'shared_bytes',
+              'Private_Clean:': 'private_bytes', 'Private_Dirty:': 'private_bytes'}
+    target = str(inode)
+    current = False
+    try:
+        with open(SMAPS) as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                key = parts[0]
+                if key.endswith(':'):
+                    if current and key in fields:
+                        totals[fields[key]] += int(parts[1]) * 1024
+                elif len(parts) >= 5:
+                    # Header mapping: address perms offset dev inode [path]
+                    current = parts[4] == target
+                    totals['mappings'] += current
+    except OSError:
+        return None
+    return totals
+
+
+def model_memory(model_content):
+    """
+    Ringkasan memori model untuk /admin/memory
+    """
+    if isinstance(model_content, MappedModel):
+        return {'loading': 'mmap', 'size_bytes': model_content.size, **(mapping_memory(model_content.inode) or {})}
+    return {'loading': 'bytes', 'size_bytes': len(model_content)}
@@ -0,0 +1,257 @@
+"""
+Metrik ringan dengan output format teks Prometheus
+
+Tanpa dependensi tambahan: Counter, Gauge dan Histogram (bucket tetap,
+observe() hanya bisect + increment). Histogram juga bisa memperkirakan
+p50/p95/p99 dari bucket, sama seperti histogram_quantile() di Prometheus.
+"""
+
+import bisect
+import threading
+
+# Bucket default untuk latency (detik)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075,
+    0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)
+# Bucket untuk ukuran upload (bytes)
+SIZE_BUCKETS = (
+    16 * 1024, 64 * 1024, 256 * 1024, 512 * 1024,
+    1024 ** 2, 2 * 1024 ** 2, 4 * 1024 ** 2, 8 * 1024 ** 2, 16 * 1024 ** 2, 32 * 1024 ** 2,
+)
+# Bucket untuk dimensi gambar (pixel, sisi terpanjang)
+DIMENSION_BUCKETS = (64, 128, 224, 256, 512, 1024, 1600, 2048, 3000, 4096, 6000, 8192)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _format_value(value):
+    value = float(value)
+    if value == float('inf'):
+        return '+Inf'
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.extend(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """
+    Basis metrik: child per kombinasi label, atau callback yang dibaca saat
+    render (mengembalikan angka, atau dict {tuple nilai label: angka}) untuk
+    metrik yang sumbernya sudah ada, misalnya InterpreterPool.stats()
+    """
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=(), callback=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self):
+        lines = self.header()
+        if self.callback is not None:
+            value = self.callback()
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            for key, item in sorted(items, key=lambda kv: tuple(str(v) for v in kv[0])):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(float(item))}')
+            return lines
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}']
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def _render_child(self, key, child):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}']
+
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """
+        Perkiraan quantile dengan interpolasi linear di dalam bucket
+        """
+        with self.lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i >= len(self.bounds):
+                    # Bucket +Inf: pakai batas atas terakhir
+                    return self.bounds[-1]
+                upper = self.bounds[i]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        with child.lock:
+            counts = list(child.counts)
+            total, observed_sum = child.count, child.sum
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(observed_sum)}')
+        lines.append(f'{self.name}_count{labels} {total}')
+        return lines
+
+    def render_quantiles(self):
+        """
+        Gauge {name}_quantile dengan label quantile (p50/p95/p99)
+        """
+        name = f'{self.name}_quantile'
+        lines = [f'# HELP {name} Estimated quantiles of {self.name}', f'# TYPE {name} gauge']
+        for key, child in sorted(self._children.items()):
+            for q in QUANTILES:
+                labels = _format_labels(self.labelnames, key, [('quantile', q)])
+                lines.append(f'{name}{labels} {_format_value(child.quantile(q))}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Kumpulan metrik yang di-render bersama di /metrics
+    """
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=(), callback=None):
+        return self._register(Counter(self.prefix + name, help_text, labelnames, callback))
+
+    def gauge(self, name, help_text, labelnames=(), callback=None):
+        return self._register(Gauge(self.prefix + name, help_text, labelnames, callback))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self.prefix + name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+            if isinstance(metric, Histogram):
+                lines.extend(metric.render_quantiles())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,223 @@
+"""
+Near-duplicate prediction cache berdasarkan perceptual hash (pHash)
+
+Daun yang sama sering di-upload ulang setelah dikompres ulang oleh aplikasi
+chat, di-resize atau sedikit di-crop; bytes-nya berbeda jadi tidak kena
+content-hash cache. pHash 64 bit dihitung dari tensor input yang sudah
+di-preprocess (tanpa decode ulang): grayscale, rata-rata blok ke 32x32, DCT
+2D, lalu 8x8 koefisien frekuensi rendah dibandingkan dengan median-nya. Dua
+gambar dianggap duplikat jika jarak Hamming hash-nya <= max_distance.
+
+Index memakai multi-index hashing: 64 bit dibagi menjadi max_distance + 1
+segmen. Menurut pigeonhole, dua hash dengan jarak <= max_distance pasti sama
+persis di minimal satu segmen, jadi kandidat cukup diambil dari tabel per
+segmen lalu jaraknya dicek satu per satu. Jumlah entry dibatasi dengan LRU.
+
+Entry dan tabel segmen diberi key fingerprint model, jadi versi lama dan
+baru bisa dipakai bergantian saat hot reload / rollback tanpa saling
+menghapus; entry versi yang dibuang registry dihapus dengan discard().
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+HASH_BITS = 64
+HASH_SIZE = 8
+SAMPLE_SIZE = 32
+
+
+def dct_matrix(n):
+    """
+    Matriks DCT-II ortonormal n x n: dct(x) = M @ x
+    """
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * math.sqrt(2.0 / n)
+    matrix[0] /= math.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+DCT = dct_matrix(SAMPLE_SIZE)
+
+
+def block_sum(array, size, axis):
+    """
+    Jumlah array per blok di sepanjang axis, menjadi size blok
+    """
+    length = array.shape[axis]
+    if length % size == 0:
+        # Blok sama besar: cukup reshape, jauh lebih cepat dari reduceat
+        shape = array.shape[:axis] + (size, length // size) + array.shape[axis + 1:]
+        return array.reshape(shape).sum(axis=axis + 1)
+    return np.add.reduceat(array, (np.arange(size) * length) // size, axis=axis)
+
+
+def block_mean(gray, size):
+    """
+    Downscale array 2D ke size x size dengan rata-rata area (nearest jika lebih kecil dari size)
+    """
+    height, width = gray.shape
+    if height < size or width < size:
+        rows = (np.arange(size) * height) // size
+        cols = (np.arange(size) * width) // size
+        return gray[rows[:, None], cols[None, :]]
+    counts = np.diff((np.arange(size + 1) * height) // size)[:, None] * np.diff((np.arange(size + 1) * width) // size)[None, :]
+    return block_sum(block_sum(gray, size, axis=0), size, axis=1) / counts
+
+
+def perceptual_hash(image):
+    """
+    pHash 64 bit dari input model [H, W, C]
+
+    Input float ([0, 1]) maupun integer terkuantisasi bisa dipakai langsung:
+    quantization adalah transformasi affine dengan scale positif, dan bit hash
+    hanya bergantung pada urutan koefisien AC terhadap median-nya (hasilnya
+    bisa berbeda 1-2 bit karena pembulatan, tapi satu cache hanya berisi input
+    dari satu model).
+    """
+    # Jumlah channel (bukan rata-rata) cukup, skala tidak mengubah hash
+    gray = image.astype(np.float32, copy=False) @ np.ones(image.shape[2], dtype=np.float32)
+    coefficients = DCT @ block_mean(gray, SAMPLE_SIZE).astype(np.float32) @ DCT.T
+    low = coefficients[:HASH_SIZE, :HASH_SIZE].ravel()
+    # Median tanpa koefisien DC (kecerahan rata-rata)
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class NearDuplicateCache:
+    """
+    LRU cache (predicted_class, confidence, predictions) dengan lookup jarak Hamming
+
+    max_entries: jumlah hash maksimum di index
+    max_distance: jarak Hamming maksimum (bit dari 64) yang dianggap gambar yang sama
+    """
+
+    def __init__(self, max_entries=4096, max_distance=6):
+        if not 0 <= max_distance < HASH_BITS // 2:
+            raise ValueError(f"max_distance must be between 0 and {HASH_BITS // 2 - 1}, got {max_distance}")
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        # (shift, mask) untuk setiap segmen, panjang segmen berbeda paling banyak 1 bit
+        count = max_distance + 1
+        bounds = [HASH_BITS * i // count for i in range(count + 1)]
+        self._segments = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        # (fingerprint, segmen) -> set hash, satu tabel per segmen
+        self._tables = [{} for _ in self._segments]
+        # (fingerprint, hash) -> prediksi, urutan LRU
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.candidates = 0
+        self.hash_seconds = 0.0
+        self.lookup_seconds = 0.0
+        self.hit_distances = [0] * (max_distance + 1)
+
+    def _keys(self, value):
+        return [(value >> shift) & mask for shift, mask in self._segments]
+
+    def lookup(self, image, fingerprint):
+        """
+        Cari prediksi untuk gambar yang mirip dengan image ([H, W, C] input model)
+
+        Return: (hash, value, distance); value dan distance None jika tidak ada.
+        hash dipakai lagi untuk put() setelah inference.
+        """
+        start = time.perf_counter()
+        key = perceptual_hash(image)
+        hashed = time.perf_counter()
+        best, best_distance, checked = None, self.max_distance + 1, 0
+        with self._lock:
+            if (fingerprint, key) in self._entries:
+                best, best_distance, checked = key, 0, 1
+            else:
+                seen = set()
+                for table, segment in zip(self._tables, self._keys(key)):
+                    for candidate in table.get((fingerprint, segment), ()):
+                        if candidate in seen:
+                            continue
+                        seen.add(candidate)
+                        distance = (candidate ^ key).bit_count()
+                        if distance < best_distance:
+                            best, best_distance = candidate, distance
+                checked = len(seen)
+
+            self.candidates += checked
+            self.hash_seconds += hashed - start
+            self.lookup_seconds += time.perf_counter() - start
+            if best is None:
+                self.misses += 1
+                return key, None, None
+            self._entries.move_to_end((fingerprint, best))
+            self.hits += 1
+            self.exact_hits += best_distance == 0
+            self.hit_distances[best_distance] += 1
+            return key, self._entries[(fingerprint, best)], best_distance
+
+    def put(self, key, fingerprint, value):
+        with self._lock:
+            entry_key = (fingerprint, key)
+            if entry_key not in self._entries:
+                for table, segment in zip(self._tables, self._keys(key)):
+                    table.setdefault((fingerprint, segment), set()).add(key)
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(*evicted)
+                self.evictions += 1
+
+    def _unindex(self, fingerprint, key):
+        for table, segment in zip(self._tables, self._keys(key)):
+            bucket = table.get((fingerprint, segment))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[(fingerprint, segment)]
+
+    def discard(self, fingerprint):
+        """
+        Hapus semua entry satu versi model, setelah versi itu dibuang registry
+        """
+        with self._lock:
+            stale = [entry_key for entry_key in self._entries if entry_key[0] == fingerprint]
+            for entry_key in stale:
+                del self._entries[entry_key]
+                self._unindex(*entry_key)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for table in self._tables:
+                table.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'max_distance': self.max_distance,
+                'segments': len(self._segments),
+                'hits': self.hits,
+                'exact_hits': self.exact_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'hit_distances': list(self.hit_distances),
+                'candidates_per_lookup': round(self.candidates / lookups, 2) if lookups else 0.0,
+                'hash_seconds_avg': round(self.hash_seconds / lookups, 6) if lookups else 0.0,
+                'lookup_seconds_avg': round(self.lookup_seconds / lookups, 6) if lookups else 0.0,
+                'models': len({fingerprint for fingerprint, _ in self._entries}),
+            }
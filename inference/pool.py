@@ -0,0 +1,162 @@
+"""
+Thread-safe pool of TensorFlow Lite interpreters
+
+Satu interpreter TFLite tidak boleh dipakai bersamaan oleh beberapa thread
+(set_tensor/invoke/get_tensor akan saling menimpa). Pool ini menyimpan N
+interpreter yang dialokasikan terpisah; setiap request meminjam satu
+interpreter, memakainya, lalu mengembalikannya.
+
+Setiap anggota pool menyimpan satu interpreter per ukuran batch yang pernah
+diminta (1, bucket micro-batching, chunk /detect/batch). Satu interpreter
+yang di-resize bolak-balik harus allocate_tensors() ulang hampir di setiap
+peminjaman jika trafik campuran; interpreter per ukuran dibuat sekali dan
+tetap di ukurannya. Anggota pool tetap dipinjam utuh, jadi jumlah inference
+bersamaan tetap sama dengan size.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(RuntimeError):
+    """
+    Tidak ada interpreter yang tersedia dalam batas waktu tunggu
+    """
+
+
+def resize_input(interpreter, batch_size):
+    """
+    Resize input tensor pertama ke batch_size dan allocate_tensors() jika ukurannya berbeda
+    Return: True jika interpreter dialokasikan ulang
+    """
+    detail = interpreter.get_input_details()[0]
+    if detail['shape'][0] == batch_size:
+        return False
+    interpreter.resize_tensor_input(detail['index'], [batch_size, *detail['shape'][1:]])
+    interpreter.allocate_tensors()
+    return True
+
+
+class InterpreterPool:
+    """
+    Pool berisi N anggota, masing-masing interpreter yang sudah di-allocate_tensors()
+    per ukuran batch
+
+    factory: callable tanpa argumen yang mengembalikan interpreter baru
+    size: jumlah anggota (inference bersamaan) di dalam pool
+    """
+
+    def __init__(self, factory, size=1):
+        if size < 1:
+            raise ValueError(f"Interpreter pool size must be >= 1, got {size}")
+
+        self._factory = factory
+        self.size = size
+        self._available = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+        # Statistik pool
+        self._created_at = time.perf_counter()
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._busy_total = 0.0
+        self._batch_sizes = {}
+        self._reallocations = 0
+
+        # Interpreter ukuran asli model (batch 1), satu per anggota
+        self.interpreters = []
+        for _ in range(size):
+            interpreter = factory()
+            interpreter.allocate_tensors()
+            self.interpreters.append(interpreter)
+            # Anggota pool: ukuran batch -> interpreter, hanya diubah oleh peminjamnya
+            batch_size = int(interpreter.get_input_details()[0]['shape'][0])
+            self._batch_sizes[batch_size] = self._batch_sizes.get(batch_size, 0) + 1
+            self._available.put({None: interpreter, batch_size: interpreter})
+
+    def get_input_details(self):
+        return self.interpreters[0].get_input_details()
+
+    def get_output_details(self):
+        return self.interpreters[0].get_output_details()
+
+    def _sized(self, member, batch_size):
+        """
+        Interpreter anggota untuk batch_size, dibuat saat pertama kali diminta
+        """
+        interpreter = member.get(batch_size)
+        if interpreter is None:
+            interpreter = self._factory()
+            interpreter.allocate_tensors()
+            resize_input(interpreter, batch_size)
+            member[batch_size] = interpreter
+            with self._lock:
+                self._batch_sizes[batch_size] = self._batch_sizes.get(batch_size, 0) + 1
+        elif resize_input(interpreter, batch_size):
+            # Interpreter ini di-resize ke ukuran lain oleh peminjam sebelumnya
+            with self._lock:
+                self._reallocations += 1
+        return interpreter
+
+    @contextmanager
+    def acquire(self, timeout=None, batch_size=None):
+        """
+        Pinjam satu interpreter dari pool
+
+        batch_size: ukuran batch input yang akan di-invoke; interpreter yang
+            dipinjam sudah di-allocate untuk ukuran itu (default: ukuran asli model)
+
+        with pool.acquire(batch_size=len(batch)) as interpreter:
+            interpreter.set_tensor(...)
+            interpreter.invoke()
+        """
+        wait_start = time.perf_counter()
+        try:
+            member = self._available.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(f"No interpreter available after {timeout}s")
+
+        checkout_at = time.perf_counter()
+        waited = checkout_at - wait_start
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            yield self._sized(member, batch_size) if batch_size is not None else member[None]
+        finally:
+            busy = time.perf_counter() - checkout_at
+            with self._lock:
+                self._in_use -= 1
+                self._busy_total += busy
+            self._available.put(member)
+
+    def stats(self):
+        """
+        Snapshot statistik pool: wait time dan utilization
+        """
+        with self._lock:
+            elapsed = time.perf_counter() - self._created_at
+            checkouts = self._checkouts
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'available': self.size - self._in_use,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_avg': round(self._wait_total / checkouts, 6) if checkouts else 0.0,
+                'wait_seconds_max': round(self._wait_max, 6),
+                'utilization': round(self._busy_total / (elapsed * self.size), 4) if elapsed > 0 else 0.0,
+                'interpreters_by_batch_size': {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                'reallocations': self._reallocations,
+            }
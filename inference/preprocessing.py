@@ -0,0 +1,200 @@
+"""
+Fast image preprocessing untuk model TensorFlow Lite
+
+- JPEG di-downscale saat decode dengan Image.draft() (decoder DCT scaling),
+  jadi foto 12+ MP tidak pernah di-decode penuh.
+- Resampling dipilih secara eksplisit, dengan reducing_gap untuk PNG/WEBP besar.
+- Normalisasi ditulis langsung ke buffer input yang dipakai ulang, tanpa
+  salinan float32 kedua. Untuk model full-integer, pixel langsung
+  di-quantize sesuai scale/zero-point input model.
+"""
+
+import io
+import threading
+import time
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from .quantization import quantize_pixels_into
+
+RESAMPLE_FILTERS = {
+    'nearest': Image.Resampling.NEAREST,
+    'box': Image.Resampling.BOX,
+    'bilinear': Image.Resampling.BILINEAR,
+    'hamming': Image.Resampling.HAMMING,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+
+# Format Pillow yang diterima untuk upload gambar
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'BMP', 'WEBP')
+
+_local = threading.local()
+
+
+class ImageTooLarge(ValueError):
+    """
+    Dimensi gambar melebihi batas pixel (dicek dari header, sebelum decode)
+    """
+
+
+class UnsupportedImageFormat(ValueError):
+    """
+    Isi file bukan salah satu format gambar yang diterima
+    """
+
+
+def resample_filter(name):
+    """
+    Ambil konstanta Pillow dari nama filter resampling
+    """
+    try:
+        return RESAMPLE_FILTERS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown resample filter {name!r}, choose from: {', '.join(RESAMPLE_FILTERS)}")
+
+
+def input_buffer(shape, dtype=np.float32):
+    """
+    Buffer input per thread yang dipakai ulang antar request
+
+    Buffer hanya valid sampai preprocessing berikutnya di thread yang sama,
+    jadi pemanggil harus menyalinnya (set_tensor, np.stack) sebelum itu.
+    """
+    shape = tuple(int(d) for d in shape)
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+        buffer = np.empty(shape, dtype=dtype)
+        _local.buffer = buffer
+    return buffer
+
+
+def open_image(stream, max_pixels=None, formats=None):
+    """
+    Buka gambar dan validasi dari header saja (Image.open belum men-decode pixel)
+
+    max_pixels: batas width x height, lebih dari itu ImageTooLarge
+    formats: format Pillow yang diterima; plugin lain tidak dicoba sama sekali
+    """
+    try:
+        image = Image.open(stream, formats=formats)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+    except UnidentifiedImageError:
+        if formats:
+            raise UnsupportedImageFormat(f"Unsupported image format, supported formats: {', '.join(formats)}")
+        raise UnsupportedImageFormat('Cannot identify image file')
+
+    width, height = image.size
+    if max_pixels is not None and width * height > max_pixels:
+        raise ImageTooLarge(f"Image is {width}x{height} ({width * height} pixels), maximum is {max_pixels} pixels")
+    return image
+
+
+def decode_image(stream, size, resample=Image.Resampling.BICUBIC, draft=True, reducing_gap=None, trace=None,
+                 max_pixels=None, formats=None):
+    """
+    Decode gambar dan resize ke size (width, height) sebagai PIL Image RGB
+
+    trace: dict opsional, diisi durasi 'decode' dan 'resize' (detik) serta
+    'image_size' (ukuran asli gambar)
+    max_pixels / formats: lihat open_image
+    """
+    start = time.perf_counter()
+    image = open_image(stream, max_pixels=max_pixels, formats=formats)
+    if trace is not None:
+        trace['image_size'] = image.size
+
+    # JPEG: minta decoder langsung men-downscale (1/2, 1/4, 1/8) tapi tetap >= size
+    if draft and image.format == 'JPEG':
+        image.draft('RGB', size)
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif trace is not None:
+        # Decode dipaksa di sini supaya tidak ikut terhitung sebagai resize
+        image.load()
+
+    if trace is not None:
+        now = time.perf_counter()
+        trace['decode'] = now - start
+        start = now
+
+    if image.size != size:
+        image = image.resize(size, resample=resample, reducing_gap=reducing_gap)
+
+    if trace is not None:
+        trace['resize'] = time.perf_counter() - start
+
+    return image
+
+
+def normalize_into(image, out, quantization=None):
+    """
+    Tulis pixel image yang sudah dinormalisasi ke [0, 1] langsung ke out
+
+    quantization: (scale, zero_point) untuk input integer, None untuk float32
+    """
+    pixels = np.asarray(image)
+    if quantization is not None:
+        return quantize_pixels_into(pixels, out, *quantization)
+    np.divide(pixels, np.float32(255.0), out=out, dtype=np.float32)
+    return out
+
+
+def preprocess_into(stream, out, resample=Image.Resampling.BICUBIC, draft=True, reducing_gap=None,
+                    quantization=None, trace=None, max_pixels=None, formats=None):
+    """
+    Decode, resize dan normalisasi satu gambar ke out (shape [H, W, C])
+
+    trace: dict opsional untuk durasi per stage (decode, resize, normalize)
+    max_pixels / formats: lihat open_image
+    """
+    height, width = out.shape[0], out.shape[1]
+    image = decode_image(stream, (width, height), resample=resample, draft=draft, reducing_gap=reducing_gap,
+                         trace=trace, max_pixels=max_pixels, formats=formats)
+    if trace is None:
+        return normalize_into(image, out, quantization=quantization)
+    start = time.perf_counter()
+    normalize_into(image, out, quantization=quantization)
+    trace['normalize'] = time.perf_counter() - start
+    return out
+
+
+def image_into(image, out, resample=Image.Resampling.BICUBIC, reducing_gap=None, quantization=None):
+    """
+    Resize dan normalisasi PIL Image yang sudah dibuka ke out (shape [H, W, C])
+
+    Untuk pemanggil yang sudah memegang Image (misalnya Streamlit), tanpa encode ulang
+    """
+    height, width = out.shape[0], out.shape[1]
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.size != (width, height):
+        image = image.resize((width, height), resample=resample, reducing_gap=reducing_gap)
+    return normalize_into(image, out, quantization=quantization)
+
+
+def warmup_codecs(formats, size=(64, 64)):
+    """
+    Encode lalu decode gambar kecil di setiap format
+
+    Plugin Pillow di-import dan decoder diinisialisasi secara lazy saat
+    pertama dipakai; memanggil ini saat startup memindahkan biaya itu dari
+    request pertama. Return: {format: detik} atau pesan error per format.
+    """
+    image = Image.new('RGB', (size[0] * 2, size[1] * 2), (96, 128, 64))
+    out = np.empty((size[1], size[0], 3), dtype=np.float32)
+    results = {}
+    for fmt in formats:
+        start = time.perf_counter()
+        try:
+            buffer = io.BytesIO()
+            image.save(buffer, format=fmt)
+            buffer.seek(0)
+            preprocess_into(buffer, out)
+            results[fmt] = round(time.perf_counter() - start, 6)
+        except Exception as e:
+            results[fmt] = f"{type(e).__name__}: {e}"
+    return results
@@ -0,0 +1,505 @@
+"""
+Profiling on-demand untuk jalur /detect
+
+Satu capture window dinyalakan lewat endpoint admin, berjalan paling lama
+`duration` detik, lalu hasilnya diambil sebagai file:
+
+- mode 'sampling': thread sampler membaca stack (sys._current_frames) setiap
+  interval_ms dari thread request yang di-sample (atau semua thread).
+  Output: collapsed stack (flamegraph.pl / speedscope) atau JSON speedscope.
+- mode 'cprofile': cProfile per request yang di-sample, digabung menjadi satu
+  pstats. Output: file .prof (pstats / snakeviz) atau ringkasan teks.
+- tracemalloc (opsional): per pemanggilan preprocessing yang di-sample,
+  peak memori di atas awal pemanggilan dan alokasi yang masih tersisa per
+  baris kode. Array numpy (salinan float32) ikut tercatat; buffer decode
+  Pillow dialokasikan di C di luar allocator Python dan tidak terlihat.
+- op profile TFLite (opsional): API Python TFLite tidak punya profiler per
+  op, jadi dipakai binary benchmark_model (--enable_op_profiling) jika ada;
+  selain itu hanya daftar op per jenis.
+
+Hanya request yang di-sample (sample_rate) yang menanggung overhead; di luar
+capture window tidak ada biaya selain satu pengecekan atribut.
+"""
+
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+MODES = ('sampling', 'cprofile')
+THREADS = ('requests', 'all')
+FORMATS = {
+    'sampling': ('collapsed', 'speedscope', 'json'),
+    'cprofile': ('pstats', 'text', 'json'),
+}
+TOP_ALLOCATIONS = 20
+# Alokasi milik tracemalloc dan profiler sendiri tidak dilaporkan
+IGNORED_FILES = frozenset((tracemalloc.__file__, __file__))
+
+
+class ProfilingError(ValueError):
+    """
+    Parameter capture tidak valid atau tidak ada capture
+    """
+
+
+def op_inventory(interpreter):
+    """
+    Jumlah op per jenis di graph interpreter (selalu tersedia, tanpa timing)
+    """
+    try:
+        ops = interpreter._get_ops_details()
+    except AttributeError:
+        return {}
+    return dict(Counter(op['op_name'] for op in ops).most_common())
+
+
+def parse_node_type_summary(output):
+    """
+    Tabel 'Summary by node type' dari output benchmark_model --enable_op_profiling
+    """
+    rows = []
+    lines = iter(output.splitlines())
+    for line in lines:
+        if 'Summary by node type' in line:
+            break
+    for line in lines:
+        fields = [field.strip() for field in line.split('\t') if field.strip()]
+        if not fields:
+            if rows:
+                break
+            continue
+        if fields[0].startswith('[') or fields[0].startswith('='):
+            continue
+        try:
+            rows.append({
+                'node_type': fields[0],
+                'count': int(fields[1]),
+                'avg_ms': float(fields[2]),
+                'avg_percent': float(fields[3].rstrip('%')),
+            })
+        except (IndexError, ValueError):
+            break
+    return rows
+
+
+def op_profile(model_path, num_threads=1, xnnpack=True, runs=50, timeout=120.0):
+    """
+    Waktu per jenis op dari binary benchmark_model TFLite (TFLITE_BENCHMARK_MODEL atau PATH)
+    """
+    binary = os.environ.get('TFLITE_BENCHMARK_MODEL') or shutil.which('benchmark_model')
+    if not binary:
+        return {
+            'available': False,
+            'message': 'Per-op timing needs the TFLite benchmark_model binary (set TFLITE_BENCHMARK_MODEL)',
+        }
+    command = [
+        binary, f'--graph={model_path}', f'--num_threads={num_threads}', f'--num_runs={runs}',
+        f'--use_xnnpack={str(xnnpack).lower()}', '--enable_op_profiling=true',
+    ]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return {'available': False, 'message': f'{type(e).__name__}: {e}'}
+    rows = parse_node_type_summary(completed.stdout + '\n' + completed.stderr)
+    return {
+        'available': bool(rows),
+        'command': command,
+        'exit_code': completed.returncode,
+        'by_node_type': rows,
+    }
+
+
+class Capture:
+    """
+    Satu capture window dan data yang terkumpul
+    """
+
+    def __init__(self, mode, sample_rate, duration, interval, threads, tracemalloc_frames, op_profile):
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.interval = interval
+        self.threads = threads
+        self.tracemalloc_frames = tracemalloc_frames
+        self.op_profile = op_profile
+        self.started_at = time.time()
+        self.ended_at = None
+        self.closing = False
+        self.deadline = time.monotonic() + duration
+
+        self.requests_seen = 0
+        self.requests_sampled = 0
+        self.requests_skipped = 0
+        self.active = set()
+        self.samples = Counter()
+        self.ticks = 0
+        self.overhead_samples = 0
+        self.stats = None
+        self.allocations = {}
+        self.top_allocations = []
+        self.ops = {}
+        self.op_timing = None
+        self.started_tracemalloc = False
+
+    def summary(self):
+        return {
+            'mode': self.mode,
+            'sample_rate': self.sample_rate,
+            'duration': self.duration,
+            'interval_ms': self.interval * 1000,
+            'threads': self.threads,
+            'tracemalloc_frames': self.tracemalloc_frames,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+            'ended_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.ended_at)) if self.ended_at else None,
+            'running': self.ended_at is None,
+            'requests_seen': self.requests_seen,
+            'requests_sampled': self.requests_sampled,
+            'requests_skipped': self.requests_skipped,
+            'stack_samples': sum(self.samples.values()),
+            'overhead_samples': self.overhead_samples,
+            'ticks': self.ticks,
+        }
+
+
+class Profiler:
+    """
+    Capture window profiling yang dikontrol dari endpoint admin
+
+    root: direktori yang dipotong dari path file di label frame
+    max_duration: batas atas duration satu capture (detik)
+    op_profile_source: callable () -> (model_path, interpreter, num_threads, xnnpack)
+        untuk op profile TFLite
+    """
+
+    def __init__(self, root=None, max_duration=300.0, op_profile_source=None):
+        self.root = os.path.realpath(root) if root else None
+        self.max_duration = max_duration
+        self.op_profile_source = op_profile_source
+        self.capture = None
+        self.last = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    # Capture window
+
+    def start(self, mode='sampling', sample_rate=0.1, duration=60.0, interval_ms=5.0, threads='requests',
+              tracemalloc_frames=0, op_profile=False):
+        if mode not in MODES:
+            raise ProfilingError(f"mode must be one of: {', '.join(MODES)}")
+        if threads not in THREADS:
+            raise ProfilingError(f"threads must be one of: {', '.join(THREADS)}")
+        if not 0 < sample_rate <= 1:
+            raise ProfilingError('sample_rate must be in (0, 1]')
+        if not 0 < duration <= self.max_duration:
+            raise ProfilingError(f'duration must be in (0, {self.max_duration:g}] seconds')
+        if interval_ms < 1:
+            raise ProfilingError('interval_ms must be >= 1')
+
+        with self._lock:
+            if self.capture is not None:
+                raise ProfilingError('A capture is already running or finishing, stop it first')
+            capture = Capture(mode, sample_rate, duration, interval_ms / 1000.0, threads,
+                              int(tracemalloc_frames), op_profile)
+            if capture.tracemalloc_frames > 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(capture.tracemalloc_frames)
+                capture.started_tracemalloc = True
+            self._stop.clear()
+            self.capture = capture
+        self._thread = threading.Thread(target=self._run, args=(capture,), name='profiler', daemon=True)
+        self._thread.start()
+        return capture.summary()
+
+    def stop(self):
+        """
+        Hentikan capture yang berjalan (jika ada) dan kembalikan capture terakhir
+        """
+        thread = self._thread
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+        if self.last is None:
+            raise ProfilingError('No capture has been recorded, start one first')
+        return self.last
+
+    def _run(self, capture):
+        if capture.mode == 'sampling':
+            me = threading.get_ident()
+            while not self._stop.wait(capture.interval) and time.monotonic() < capture.deadline:
+                self._sample(capture, me)
+        else:
+            self._stop.wait(max(0.0, capture.deadline - time.monotonic()))
+        self._finish(capture)
+
+    def _finish(self, capture):
+        # Request baru tidak di-sample lagi; capture berikutnya baru bisa dimulai setelah selesai di sini
+        capture.closing = True
+        if tracemalloc.is_tracing() and capture.tracemalloc_frames > 0:
+            snapshot = self._snapshot()
+            capture.top_allocations = [
+                {'line': str(stat.traceback[0]), 'size_bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+            ]
+            if capture.started_tracemalloc:
+                tracemalloc.stop()
+        if self.op_profile_source is not None:
+            model_path, interpreter, num_threads, xnnpack = self.op_profile_source()
+            capture.ops = op_inventory(interpreter)
+            if capture.op_profile:
+                capture.op_timing = op_profile(model_path, num_threads, xnnpack)
+        capture.ended_at = time.time()
+        with self._lock:
+            self.last = capture
+            self.capture = None
+            self._thread = None
+
+    # Sampling
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            path = os.path.realpath(code.co_filename)
+            if self.root and path.startswith(self.root + os.sep):
+                path = os.path.relpath(path, self.root)
+            elif 'site-packages' in path:
+                path = path.split('site-packages' + os.sep, 1)[1]
+            label = self._labels[code] = (code.co_name, path, code.co_firstlineno)
+        return label
+
+    def _sample(self, capture, me):
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()} if capture.threads == 'all' else None
+        with self._lock:
+            targets = set(capture.active) if capture.threads == 'requests' else None
+        for ident, frame in frames.items():
+            if ident == me or (targets is not None and ident not in targets):
+                continue
+            stack = []
+            while frame is not None:
+                if frame.f_code.co_filename == __file__:
+                    # Thread sedang di pembukuan profiler (tracemalloc, cProfile), bukan kerja request
+                    stack = None
+                    break
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack is None:
+                capture.overhead_samples += 1
+                continue
+            stack.reverse()
+            if names is not None:
+                stack.insert(0, (names.get(ident, str(ident)), '', 0))
+            capture.samples[tuple(stack)] += 1
+        capture.ticks += 1
+
+    # Hook request
+
+    def begin_request(self):
+        """
+        Dipanggil di awal request; return token (untuk end_request) jika request ini di-sample
+        """
+        capture = self.capture
+        if capture is None:
+            return None
+        with self._lock:
+            capture.requests_seen += 1
+            if random.random() >= capture.sample_rate or capture.closing:
+                return None
+            capture.requests_sampled += 1
+            capture.active.add(threading.get_ident())
+        profile = None
+        if capture.mode == 'cprofile':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Profiler lain sudah aktif di interpreter ini (Python 3.12+ sys.monitoring)
+                profile = None
+                with self._lock:
+                    capture.requests_skipped += 1
+        return capture, profile
+
+    def end_request(self, token):
+        capture, profile = token
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            capture.active.discard(threading.get_ident())
+            if profile is not None:
+                if capture.stats is None:
+                    capture.stats = pstats.Stats(profile)
+                else:
+                    capture.stats.add(profile)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            *(tracemalloc.Filter(False, filename) for filename in IGNORED_FILES),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ])
+
+    @contextmanager
+    def allocations(self, label):
+        """
+        Catat peak dan alokasi per baris untuk blok ini jika thread ini sedang di-sample
+
+        Peak memakai tracemalloc.reset_peak() yang global, jadi dengan request
+        bersamaan angkanya bisa termasuk alokasi thread lain.
+        """
+        capture = self.capture
+        tracking = (
+            capture is not None and capture.tracemalloc_frames > 0 and tracemalloc.is_tracing()
+            and (capture.threads == 'all' or threading.get_ident() in capture.active)
+        )
+        if not tracking:
+            yield
+            return
+        # Snapshot tanpa filter_traces (mahal per request); baris milik profiler dibuang saat dicatat
+        before = tracemalloc.take_snapshot()
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            try:
+                size, peak = tracemalloc.get_traced_memory()
+                retained = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            except RuntimeError:
+                # Capture selesai (tracemalloc dimatikan) di tengah blok ini
+                return
+            with self._lock:
+                record = capture.allocations.setdefault(label, {
+                    'calls': 0, 'peak_bytes_total': 0, 'peak_bytes_max': 0,
+                    'retained_bytes_total': 0, 'lines': Counter(),
+                })
+                record['calls'] += 1
+                record['peak_bytes_total'] += peak - start_size
+                record['peak_bytes_max'] = max(record['peak_bytes_max'], peak - start_size)
+                record['retained_bytes_total'] += size - start_size
+                for stat in retained[:TOP_ALLOCATIONS]:
+                    if stat.size_diff > 0 and stat.traceback[0].filename not in IGNORED_FILES:
+                        record['lines'][str(stat.traceback[0])] += stat.size_diff
+
+    # Export
+
+    def status(self):
+        capture = self.capture
+        return {
+            'running': capture is not None,
+            'current': capture.summary() if capture is not None else None,
+            'last': self.last.summary() if self.last is not None else None,
+        }
+
+    def report(self, capture):
+        """
+        Ringkasan JSON: info capture, alokasi, op profile dan fungsi / stack teratas
+        """
+        report = {
+            **capture.summary(),
+            'allocations': {
+                label: {
+                    'calls': record['calls'],
+                    'peak_bytes_avg': record['peak_bytes_total'] // max(1, record['calls']),
+                    'peak_bytes_max': record['peak_bytes_max'],
+                    'retained_bytes_total': record['retained_bytes_total'],
+                    'top_lines': [
+                        {'line': line, 'size_bytes': size} for line, size in record['lines'].most_common(TOP_ALLOCATIONS)
+                    ],
+                }
+                for label, record in capture.allocations.items()
+            },
+            'top_allocations': capture.top_allocations,
+            'tflite_ops': capture.ops,
+            'tflite_op_profile': capture.op_timing,
+        }
+        if capture.mode == 'sampling':
+            self_time = Counter()
+            for stack, count in capture.samples.items():
+                self_time[stack[-1]] += count
+            report['top_self_samples'] = [
+                {'function': f'{name} ({path}:{line})', 'samples': count}
+                for (name, path, line), count in self_time.most_common(TOP_ALLOCATIONS)
+            ]
+        elif capture.stats is not None:
+            entries = sorted(capture.stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            report['top_cumulative'] = [
+                {'function': f'{name} ({path}:{line})', 'calls': nc, 'total_seconds': round(tt, 6),
+                 'cumulative_seconds': round(ct, 6)}
+                for (path, line, name), (cc, nc, tt, ct, callers) in entries[:TOP_ALLOCATIONS]
+            ]
+        return report
+
+    def export(self, capture, fmt):
+        """
+        Return (bytes, content_type, nama file) dalam format fmt (lihat FORMATS)
+        """
+        if fmt not in FORMATS[capture.mode]:
+            raise ProfilingError(f"format for {capture.mode} captures must be one of: {', '.join(FORMATS[capture.mode])}")
+        if fmt == 'json':
+            return json.dumps(self.report(capture), indent=2).encode('utf-8'), 'application/json', 'profile.json'
+        if fmt == 'collapsed':
+            lines = [
+                ';'.join(f'{name} ({path}:{line})' if path else name for name, path, line in stack) + f' {count}'
+                for stack, count in capture.samples.most_common()
+            ]
+            return ('\n'.join(lines) + '\n').encode('utf-8'), 'text/plain', 'profile.collapsed'
+        if fmt == 'speedscope':
+            return json.dumps(self.speedscope(capture)).encode('utf-8'), 'application/json', 'profile.speedscope.json'
+        if capture.stats is None:
+            raise ProfilingError('No request was sampled during the capture')
+        if fmt == 'pstats':
+            return marshal.dumps(capture.stats.stats), 'application/octet-stream', 'profile.prof'
+        buffer = io.StringIO()
+        capture.stats.stream = buffer
+        capture.stats.sort_stats('cumulative').print_stats(50)
+        return buffer.getvalue().encode('utf-8'), 'text/plain', 'profile.txt'
+
+    def speedscope(self, capture):
+        """
+        File format speedscope (https://www.speedscope.app/file-format-schema.json), satu profile per thread
+        """
+        frames, index = [], {}
+        profiles = {}
+        weight = capture.interval * 1000
+        for stack, count in capture.samples.items():
+            name = stack[0][0] if capture.threads == 'all' else 'requests'
+            body = stack[1:] if capture.threads == 'all' else stack
+            indices = []
+            for label in body:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({'name': label[0], 'file': label[1], 'line': label[2]})
+                indices.append(index[label])
+            profile = profiles.setdefault(name, {'samples': [], 'weights': []})
+            profile['samples'].append(indices)
+            profile['weights'].append(count * weight)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f"/detect {capture.mode} capture {capture.summary()['started_at']}",
+            'exporter': 'potato-disease-api',
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': name,
+                    'unit': 'milliseconds',
+                    'startValue': 0,
+                    'endValue': sum(profile['weights']),
+                    'samples': profile['samples'],
+                    'weights': profile['weights'],
+                }
+                for name, profile in profiles.items()
+            ],
+        }
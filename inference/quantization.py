@@ -0,0 +1,60 @@
+"""
+Helper untuk model TFLite terkuantisasi (full-integer int8/uint8)
+
+Model float32, float16 dan dynamic-range int8 tetap memakai input/output
+float32; hanya model full-integer yang butuh quantize input dan dequantize
+output memakai scale/zero-point dari get_input_details()/get_output_details().
+"""
+
+import numpy as np
+
+
+def quantization_params(detail):
+    """
+    (scale, zero_point) untuk tensor integer, atau None untuk tensor float
+    """
+    scale, zero_point = detail.get('quantization', (0.0, 0))
+    if np.issubdtype(detail['dtype'], np.floating) or not scale:
+        return None
+    return float(scale), int(zero_point)
+
+
+def quantize_pixels_into(pixels, out, scale, zero_point):
+    """
+    Quantize pixel uint8 (mewakili nilai pixels / 255) ke tensor integer out
+    """
+    info = np.iinfo(out.dtype)
+    if abs(scale * 255.0 - 1.0) < 1e-6:
+        # Kasus umum: scale = 1/255, cukup geser dengan zero_point
+        values = pixels.astype(np.int16)
+        values += zero_point
+    else:
+        values = np.rint(pixels * np.float32(1.0 / (255.0 * scale)))
+        values += zero_point
+    np.clip(values, info.min, info.max, out=values)
+    out[...] = values
+    return out
+
+
+def quantize_array(array, detail):
+    """
+    Quantize array float [0, 1] ke dtype input model (tanpa perubahan untuk model float)
+    """
+    params = quantization_params(detail)
+    if params is None:
+        return array.astype(detail['dtype'], copy=False)
+    scale, zero_point = params
+    info = np.iinfo(detail['dtype'])
+    values = np.rint(array / scale) + zero_point
+    return np.clip(values, info.min, info.max).astype(detail['dtype'])
+
+
+def dequantize_output(array, detail):
+    """
+    Ubah output integer kembali ke probabilitas float32
+    """
+    params = quantization_params(detail)
+    if params is None:
+        return array
+    scale, zero_point = params
+    return (array.astype(np.float32) - zero_point) * np.float32(scale)
@@ -0,0 +1,241 @@
+"""
+Model registry dengan hot reload dan rollback
+
+Setiap ModelVersion membawa interpreter pool, micro-batcher (opsional),
+labels dan hash sendiri. Request mengambil registry.active sekali di awal
+dan memakai versi itu sampai selesai, jadi swap ke versi baru tidak
+mengganggu request yang sedang berjalan. Versi sebelumnya disimpan untuk
+rollback instan.
+
+Versi baru dimuat dan di-warm-up di thread pemanggil (admin endpoint atau
+watcher), sementara versi aktif tetap melayani request.
+"""
+
+import os
+import threading
+import time
+
+from .cache import file_fingerprint
+from .quantization import quantization_params
+from .responses import ResponseTemplates
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+class ModelLoadInProgress(ModelLoadError):
+    pass
+
+
+class ModelVersion:
+    """
+    Satu versi model yang siap dipakai
+    """
+
+    def __init__(self, version, model_path, labels_path, model_content, labels, fingerprint):
+        self.version = version
+        self.model_path = model_path
+        self.labels_path = labels_path
+        self.model_content = model_content
+        self.labels = labels
+        self.fingerprint = fingerprint
+        self.responses = ResponseTemplates(labels, version, fingerprint)
+        self.loaded_at = time.time()
+        self.pool = None
+        self.batcher = None
+        self.input_details = None
+        self.output_details = None
+        self.input_quantization = None
+
+    def attach(self, pool, batcher=None):
+        """
+        Pasang interpreter pool (dan scheduler) untuk versi ini
+        Dipanggil ulang di worker setelah fork dan setelah autotune; scheduler
+        lama ditutup supaya thread dan interpreter-nya dilepas
+        """
+        if self.batcher is not None and self.batcher is not batcher:
+            self.batcher.close()
+        self.pool = pool
+        self.batcher = batcher
+        self.input_details = pool.get_input_details()
+        self.output_details = pool.get_output_details()
+        self.input_quantization = quantization_params(self.input_details[0])
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        # MappedModel: lepas fd dan mapping milik versi ini (interpreter punya mapping sendiri)
+        if hasattr(self.model_content, 'close'):
+            self.model_content.close()
+
+    def info(self):
+        return {
+            'version': self.version,
+            'hash': self.fingerprint,
+            'model_path': self.model_path,
+            'labels_path': self.labels_path,
+            'labels': len(self.labels),
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.loaded_at)),
+        }
+
+
+def default_version(model_path):
+    """
+    Nama versi dari mtime file model, sama di semua worker yang membaca file yang sama
+    """
+    return time.strftime('%Y%m%d%H%M%S', time.gmtime(os.stat(model_path).st_mtime))
+
+
+def file_signature(*paths):
+    """
+    (mtime, size) setiap file, murah untuk di-poll oleh watcher
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class ModelRegistry:
+    """
+    Versi aktif + versi sebelumnya, dengan swap atomik
+
+    loader(model_path, labels_path, version, fingerprint) -> ModelVersion dengan pool terpasang
+    warmup(model_version): opsional, dijalankan sebelum versi baru diaktifkan
+    retire_delay: detik sebelum scheduler versi yang dibuang ditutup,
+        supaya request yang masih memakainya sempat selesai
+    on_retire(model_version): opsional, dipanggil setelah versi yang dibuang ditutup
+    """
+
+    def __init__(self, loader, warmup=None, retire_delay=30.0, on_retire=None):
+        self.loader = loader
+        self.warmup = warmup
+        self.retire_delay = retire_delay
+        self.on_retire = on_retire
+        self.active = None
+        self.previous = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self.loads = 0
+        self.failures = 0
+        self.rollbacks = 0
+        self.last_error = None
+
+    def load(self, model_path, labels_path, version=None, force=False, warmup=True):
+        """
+        Muat, warm-up lalu aktifkan versi baru
+
+        Jika hash sama dengan versi aktif (dan force=False) tidak ada yang dimuat.
+        Gagal memuat tidak mengubah versi aktif (ModelLoadError).
+        warmup=False melewati warm-up, misalnya saat startup yang punya warm-up sendiri.
+        """
+        if not self._load_lock.acquire(blocking=False):
+            raise ModelLoadInProgress('Another model load is in progress')
+        try:
+            try:
+                fingerprint = file_fingerprint(model_path, labels_path)
+                if not force and self.active is not None and fingerprint == self.active.fingerprint:
+                    return self.active
+                candidate = self.loader(model_path, labels_path, version or default_version(model_path), fingerprint)
+                if warmup and self.warmup is not None:
+                    self.warmup(candidate)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise ModelLoadError(f"Failed to load model {model_path}: {self.last_error}") from e
+            self.loads += 1
+            self.last_error = None
+            self.activate(candidate)
+            return candidate
+        finally:
+            self._load_lock.release()
+
+    def activate(self, candidate):
+        with self._lock:
+            retired = self.previous
+            self.previous = self.active
+            self.active = candidate
+        if retired is not None and retired is not candidate:
+            self._retire(retired)
+
+    def rollback(self):
+        """
+        Tukar versi aktif dengan versi sebelumnya
+        """
+        with self._lock:
+            if self.previous is None:
+                raise ModelLoadError('No previous model version to roll back to')
+            self.active, self.previous = self.previous, self.active
+            self.rollbacks += 1
+            return self.active
+
+    def versions(self):
+        return [version for version in (self.active, self.previous) if version is not None]
+
+    def _retire(self, version):
+        timer = threading.Timer(self.retire_delay, self._close_retired, args=(version,))
+        timer.daemon = True
+        timer.start()
+
+    def _close_retired(self, version):
+        version.close()
+        if self.on_retire is not None:
+            self.on_retire(version)
+
+    def watch(self, model_path, labels_path, interval):
+        """
+        Poll file model dan labels; versi baru dimuat setelah file tidak
+        berubah selama satu interval (menghindari membaca file yang masih ditulis)
+        """
+        self.stop_watching()
+        self._stop_watching = threading.Event()
+        stop = self._stop_watching
+        # Signature awal diambil sebelum thread jalan, supaya perubahan tepat setelah watch() tidak terlewat
+        initial = file_signature(model_path, labels_path)
+
+        def run():
+            seen = initial
+            pending = None
+            while not stop.wait(interval):
+                current = file_signature(model_path, labels_path)
+                if current is None or current == seen:
+                    pending = None
+                    continue
+                if current != pending:
+                    pending = current
+                    continue
+                try:
+                    self.load(model_path, labels_path)
+                except ModelLoadInProgress:
+                    # Reload lain (admin) sedang berjalan, cek lagi di interval berikutnya
+                    continue
+                except ModelLoadError:
+                    # last_error sudah dicatat; dicoba lagi jika file berubah lagi
+                    pass
+                seen = current
+                pending = None
+
+        self._watcher = threading.Thread(target=run, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        self._watcher = None
+
+    def stats(self):
+        return {
+            'active': self.active.info() if self.active is not None else None,
+            'previous': self.previous.info() if self.previous is not None else None,
+            'loads': self.loads,
+            'failures': self.failures,
+            'rollbacks': self.rollbacks,
+            'last_error': self.last_error,
+            'watching': self._watcher is not None,
+        }
@@ -0,0 +1,181 @@
+"""
+Encoding response /detect: JSON, MessagePack (opsional) dan layout biner tetap
+
+Bagian response yang sama untuk setiap request (label yang sudah di-escape,
+versi dan hash model) disusun sekali per versi model di ResponseTemplates;
+per request hanya angka yang diformat. Top-k memakai argpartition, bukan
+argsort penuh atas vektor prediksi.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/msgpack'
+BINARY_TYPE = 'application/vnd.potato.scores'
+
+# Layout biner (little-endian):
+#   header       <4sBBHHf8s: magic b'PDS1', flags (bit 0 = detected, bit 1 = ada
+#                probabilitas penuh), reserved, kelas prediksi, k, confidence,
+#                8 byte pertama hash model
+#   top-k        k x <Hf: id kelas dan skor, urut dari skor tertinggi
+#   probabilitas (jika bit 1) <H jumlah kelas lalu float32 per kelas
+BINARY_MAGIC = b'PDS1'
+BINARY_HEADER = struct.Struct('<4sBBHHf8s')
+BINARY_COUNT = struct.Struct('<H')
+BINARY_ENTRY = np.dtype([('class_id', '<u2'), ('score', '<f4')])
+FLAG_DETECTED = 1
+FLAG_PROBABILITIES = 2
+
+DEFAULT_TOP_K = 3
+# Sama dengan output jsonify (compact)
+JSON_SEPARATORS = (',', ':')
+
+
+def top_k(predictions, k):
+    """
+    Index k skor tertinggi, urut menurun
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= len(predictions):
+        return np.argsort(predictions)[::-1]
+    indices = np.argpartition(predictions, -k)[-k:]
+    return indices[np.argsort(predictions[indices])[::-1]]
+
+
+def percentage(value):
+    return f"{value * 100:.2f}%"
+
+
+class ResponseTemplates:
+    """
+    Potongan response untuk satu versi model, dibuat sekali saat model dimuat
+    """
+
+    def __init__(self, labels, version, fingerprint):
+        self.labels = labels
+        self.model_fields = {'model_version': version, 'model_hash': fingerprint}
+        # Potongan JSON dengan urutan key yang sama seperti jsonify (sort_keys)
+        self.label_json = [json.dumps(label) for label in labels]
+        self.model_json = f'"model_hash":{json.dumps(fingerprint)},"model_version":{json.dumps(version)}'
+        self.hash_bytes = bytes.fromhex(fingerprint.ljust(16, '0')[:16])
+
+    def result(self, predicted_class, confidence, predictions, threshold, k=DEFAULT_TOP_K, full=False):
+        """
+        Response deteksi sebagai dict (format JSON/MessagePack)
+        """
+        if confidence < threshold:
+            result = {
+                'detected': False,
+                'message': 'Penyakit tidak terdeteksi',
+                'confidence': percentage(confidence),
+                **self.model_fields
+            }
+        else:
+            result = {
+                'detected': True,
+                'label': self.labels[predicted_class],
+                'percentage': percentage(confidence),
+                'confidence': confidence,
+                'top_predictions': [
+                    {'label': self.labels[i], 'confidence': percentage(predictions[i])}
+                    for i in top_k(predictions, k)
+                ],
+                **self.model_fields
+            }
+        if full:
+            result['probabilities'] = predictions.tolist()
+        return result
+
+    def encode_json(self, predicted_class, confidence, predictions, threshold, k=DEFAULT_TOP_K, full=False):
+        """
+        Sama persis dengan jsonify(result(...)), disusun dari potongan yang sudah jadi
+        """
+        probabilities = f',"probabilities":{json.dumps(predictions.tolist(), separators=JSON_SEPARATORS)}' if full else ''
+        if confidence < threshold:
+            body = (
+                f'{{"confidence":"{percentage(confidence)}","detected":false,'
+                f'"message":"Penyakit tidak terdeteksi",{self.model_json}{probabilities}}}\n'
+            )
+            return body.encode('utf-8')
+        entries = ','.join(
+            f'{{"confidence":"{percentage(predictions[i])}","label":{self.label_json[i]}}}'
+            for i in top_k(predictions, k)
+        )
+        body = (
+            f'{{"confidence":{json.dumps(confidence)},"detected":true,'
+            f'"label":{self.label_json[predicted_class]},{self.model_json},'
+            f'"percentage":"{percentage(confidence)}"{probabilities},"top_predictions":[{entries}]}}\n'
+        )
+        return body.encode('utf-8')
+
+    def encode_msgpack(self, predicted_class, confidence, predictions, threshold, k=DEFAULT_TOP_K, full=False):
+        return msgpack.packb(self.result(predicted_class, confidence, predictions, threshold, k, full))
+
+    def encode_binary(self, predicted_class, confidence, predictions, threshold, k=DEFAULT_TOP_K, full=False):
+        """
+        Layout biner tetap (lihat BINARY_HEADER), tanpa label dan tanpa string
+        """
+        indices = top_k(predictions, k)
+        flags = (FLAG_DETECTED if confidence >= threshold else 0) | (FLAG_PROBABILITIES if full else 0)
+        entries = np.empty(len(indices), dtype=BINARY_ENTRY)
+        entries['class_id'] = indices
+        entries['score'] = predictions[indices]
+        parts = [
+            BINARY_HEADER.pack(BINARY_MAGIC, flags, 0, int(predicted_class), len(indices),
+                               confidence, self.hash_bytes),
+            entries.tobytes(),
+        ]
+        if full:
+            parts.append(BINARY_COUNT.pack(len(predictions)))
+            parts.append(np.asarray(predictions, dtype='<f4').tobytes())
+        return b''.join(parts)
+
+    def encode(self, content_type, *args, **kwargs):
+        encoder = {
+            JSON_TYPE: self.encode_json,
+            MSGPACK_TYPE: self.encode_msgpack,
+            BINARY_TYPE: self.encode_binary,
+        }[content_type]
+        return encoder(*args, **kwargs)
+
+
+def response_types():
+    """
+    Content type yang bisa dipilih lewat header Accept (JSON pertama = default)
+    """
+    types = [JSON_TYPE, BINARY_TYPE]
+    if msgpack is not None:
+        types.append(MSGPACK_TYPE)
+    return types
+
+
+def decode_binary(data):
+    """
+    Kebalikan encode_binary, untuk client Python dan pengujian
+    """
+    magic, flags, _, predicted_class, k, confidence, hash_bytes = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError('Not a potato scores payload')
+    offset = BINARY_HEADER.size
+    entries = np.frombuffer(data, dtype=BINARY_ENTRY, count=k, offset=offset)
+    offset += entries.nbytes
+    result = {
+        'detected': bool(flags & FLAG_DETECTED),
+        'predicted_class': predicted_class,
+        'confidence': confidence,
+        'model_hash': hash_bytes.hex(),
+        'top_predictions': [(int(e['class_id']), float(e['score'])) for e in entries],
+    }
+    if flags & FLAG_PROBABILITIES:
+        (count,) = BINARY_COUNT.unpack_from(data, offset)
+        result['probabilities'] = np.frombuffer(data, dtype='<f4', count=count, offset=offset + BINARY_COUNT.size)
+    return result
@@ -0,0 +1,52 @@
+"""
+Helper statistik ringan untuk metrik latency
+"""
+
+import threading
+from collections import deque
+
+
+def percentile(sorted_values, q):
+    """
+    Percentile (0-100) dari list yang sudah diurutkan, dengan interpolasi linear
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class LatencyWindow:
+    """
+    Menyimpan N sampel terakhir untuk menghitung p50/p95/p99
+    """
+
+    def __init__(self, maxlen=2048):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def snapshot(self):
+        with self._lock:
+            values = sorted(self._samples)
+            count, total, maximum = self.count, self.total, self.max
+        return {
+            'count': count,
+            'avg': round(total / count, 6) if count else 0.0,
+            'max': round(maximum, 6),
+            'p50': round(percentile(values, 50), 6),
+            'p95': round(percentile(values, 95), 6),
+            'p99': round(percentile(values, 99), 6),
+        }
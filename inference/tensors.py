@@ -0,0 +1,106 @@
+"""
+Input tensor mentah untuk client yang sudah melakukan resize sendiri
+
+Body berisi tensor dengan shape input model ([H, W, C] atau [1, H, W, C]),
+sebagai bytes mentah (shape/dtype dari header) atau file .npy. Bytes dibaca
+dengan np.frombuffer tanpa salinan dan tidak pernah melewati Pillow.
+
+Arti nilai per dtype:
+- uint8: pixel RGB 0-255, sama seperti gambar setelah resize
+- float32: pixel yang sudah dinormalisasi ke [0, 1]
+- int8: nilai yang sudah di-quantize, hanya untuk model dengan input int8
+"""
+
+import io
+import math
+
+import numpy as np
+
+from .preprocessing import normalize_into
+from .quantization import quantize_array
+
+SUPPORTED_DTYPES = ('uint8', 'float32', 'int8')
+
+
+class InvalidTensor(ValueError):
+    pass
+
+
+def parse_shape(value):
+    """
+    Shape dari header, misalnya "1,224,224,3" atau "224x224x3"
+    """
+    try:
+        shape = tuple(int(d) for d in value.replace('x', ',').split(',') if d.strip())
+    except ValueError:
+        raise InvalidTensor(f"Invalid tensor shape {value!r}")
+    if not shape or any(d <= 0 for d in shape):
+        raise InvalidTensor(f"Invalid tensor shape {value!r}")
+    return shape
+
+
+def parse_dtype(value):
+    if value not in SUPPORTED_DTYPES:
+        raise InvalidTensor(f"Unsupported tensor dtype {value!r}, supported: {', '.join(SUPPORTED_DTYPES)}")
+    return np.dtype(value)
+
+
+def raw_tensor(data, shape, dtype, offset=0):
+    """
+    View array di atas data (bytes/memoryview) tanpa menyalin
+    """
+    dtype = np.dtype(dtype)
+    expected = math.prod(shape) * dtype.itemsize
+    if len(data) - offset != expected:
+        raise InvalidTensor(
+            f"Tensor body is {len(data) - offset} bytes, shape {list(shape)} with dtype {dtype.name} needs {expected}"
+        )
+    return np.frombuffer(data, dtype=dtype, offset=offset).reshape(shape)
+
+
+def npy_tensor(data):
+    """
+    Parse file .npy: hanya header yang dibaca, isi array tetap view ke data
+    """
+    stream = io.BytesIO(data)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise InvalidTensor(f"Invalid .npy file: {e}")
+    if fortran_order or dtype.hasobject:
+        raise InvalidTensor('Only C-ordered numeric .npy arrays are supported')
+    array = raw_tensor(data, shape, dtype, offset=stream.tell())
+    if not dtype.isnative:
+        array = array.astype(dtype.newbyteorder('='))
+    parse_dtype(array.dtype.name)
+    return array
+
+
+def model_input(array, input_detail, quantization=None, out=None):
+    """
+    Sesuaikan tensor dengan input model, hasilnya [1, H, W, C] dengan dtype model
+
+    Tensor yang dtype-nya sudah sama dengan input model dipakai langsung (view,
+    tanpa salinan); uint8 dinormalisasi/di-quantize ke out seperti gambar biasa.
+    """
+    shape = tuple(int(d) for d in input_detail['shape'])
+    if array.shape not in (shape, shape[1:]):
+        raise InvalidTensor(f"Tensor shape {list(array.shape)} does not match model input {list(shape)}")
+    model_dtype = np.dtype(input_detail['dtype'])
+
+    if array.dtype == np.uint8:
+        if out is None:
+            out = np.empty(shape, dtype=model_dtype)
+        normalize_into(array.reshape(shape[1:]), out[0], quantization=quantization)
+        return out
+    if array.dtype == np.float32:
+        if quantization is None:
+            return array.reshape(shape).astype(model_dtype, copy=False)
+        return quantize_array(array.reshape(shape), input_detail)
+    if array.dtype == model_dtype:
+        return array.reshape(shape)
+    raise InvalidTensor(f"Tensor dtype {array.dtype.name} does not match model input dtype {model_dtype.name}")
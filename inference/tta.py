@@ -0,0 +1,138 @@
+"""
+Test-time augmentation (TTA) untuk prediksi yang ragu
+
+Augmentasi (flip, rotasi, crop) dibuat dari gambar yang sudah di-preprocess
+dengan indexing numpy saja, jadi dtype input model (float32 atau integer
+terkuantisasi) tetap sama dan tidak ada decode/resize ulang. Semua augmentasi
+dijalankan dalam satu batched invoke(), hanya untuk gambar yang confidence
+first-pass-nya masuk band ketidakpastian.
+"""
+
+import threading
+
+import numpy as np
+
+TRANSFORMS = (
+    'hflip', 'vflip', 'rot90', 'rot180', 'rot270', 'transpose',
+    'crop_center', 'crop_tl', 'crop_tr', 'crop_bl', 'crop_br',
+)
+AGGREGATIONS = ('mean', 'vote')
+# Posisi crop relatif (baris, kolom): 0 = atas/kiri, 1 = bawah/kanan
+CROP_ANCHORS = {
+    'crop_center': (0.5, 0.5), 'crop_tl': (0.0, 0.0), 'crop_tr': (0.0, 1.0),
+    'crop_bl': (1.0, 0.0), 'crop_br': (1.0, 1.0),
+}
+
+
+def crop_indices(size, crop, offset):
+    """
+    Index nearest-neighbor untuk memperbesar potongan [offset, offset + crop) kembali ke size
+    """
+    return offset + np.minimum((np.arange(size) * crop) // size, crop - 1)
+
+
+class TestTimeAugmentation:
+    """
+    transforms: nama augmentasi dari TRANSFORMS (first pass tidak diulang)
+    band: (low, high) confidence first pass yang memicu TTA
+    aggregate: 'mean' (rata-rata probabilitas) atau 'vote' (suara argmax,
+        probabilitas = porsi suara, seri dipecah oleh rata-rata probabilitas)
+    crop_scale: sisi crop relatif terhadap sisi gambar
+    """
+
+    def __init__(self, transforms, band=(0.35, 0.65), aggregate='mean', crop_scale=0.875):
+        unknown = [name for name in transforms if name not in TRANSFORMS]
+        if unknown or not transforms:
+            raise ValueError(f"Unknown TTA transforms {unknown}, choose from: {', '.join(TRANSFORMS)}")
+        if aggregate not in AGGREGATIONS:
+            raise ValueError(f"Unknown TTA aggregation {aggregate!r}, choose from: {', '.join(AGGREGATIONS)}")
+        low, high = band
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"TTA band must satisfy 0 <= low <= high <= 1, got {band}")
+        self.transforms = tuple(transforms)
+        self.band = (float(low), float(high))
+        self.aggregation = aggregate
+        self.crop_scale = crop_scale
+        self._indices = {}
+        self._lock = threading.Lock()
+        self.applied = 0
+        self.changed = 0
+
+    def applies(self, confidence):
+        low, high = self.band
+        return low <= confidence <= high
+
+    def _crop(self, name, height, width):
+        """
+        Index (baris, kolom) untuk crop, dihitung sekali per ukuran input
+        """
+        key = (name, height, width)
+        indices = self._indices.get(key)
+        if indices is None:
+            crop_h, crop_w = max(1, round(height * self.crop_scale)), max(1, round(width * self.crop_scale))
+            anchor_y, anchor_x = CROP_ANCHORS[name]
+            top, left = int((height - crop_h) * anchor_y), int((width - crop_w) * anchor_x)
+            indices = (crop_indices(height, crop_h, top)[:, None], crop_indices(width, crop_w, left)[None, :])
+            with self._lock:
+                self._indices[key] = indices
+        return indices
+
+    def augment(self, image, out=None):
+        """
+        Semua augmentasi dari image [H, W, C] sebagai batch [N, H, W, C]
+        Rotasi 90/270 dan transpose hanya untuk input persegi.
+        """
+        height, width = image.shape[:2]
+        if out is None:
+            out = np.empty((len(self.transforms), *image.shape), dtype=image.dtype)
+        for i, name in enumerate(self.transforms):
+            if name in ('rot90', 'rot270', 'transpose') and height != width:
+                raise ValueError(f"TTA transform {name} needs a square input, got {height}x{width}")
+            if name == 'hflip':
+                out[i] = image[:, ::-1]
+            elif name == 'vflip':
+                out[i] = image[::-1]
+            elif name == 'rot90':
+                out[i] = np.rot90(image, 1)
+            elif name == 'rot180':
+                out[i] = image[::-1, ::-1]
+            elif name == 'rot270':
+                out[i] = np.rot90(image, 3)
+            elif name == 'transpose':
+                out[i] = image.transpose(1, 0, 2)
+            else:
+                rows, cols = self._crop(name, height, width)
+                out[i] = image[rows, cols]
+        return out
+
+    def aggregate(self, first, outputs):
+        """
+        Gabungkan prediksi first pass dengan prediksi augmentasi
+
+        Return: (predicted_class, confidence, predictions) seperti predict_disease
+        """
+        stacked = np.vstack([first[None, :], outputs]).astype(np.float32, copy=False)
+        mean = stacked.mean(axis=0)
+        if self.aggregation == 'mean':
+            predictions = mean
+            predicted_class = int(np.argmax(predictions))
+        else:
+            votes = np.bincount(stacked.argmax(axis=1), minlength=stacked.shape[1])
+            predictions = (votes / len(stacked)).astype(np.float32)
+            # Kelas dengan suara terbanyak; jika seri, rata-rata probabilitas tertinggi
+            predicted_class = int(np.lexsort((mean, votes))[-1])
+        with self._lock:
+            self.applied += 1
+            self.changed += int(predicted_class != int(np.argmax(first)))
+        return predicted_class, float(predictions[predicted_class]), predictions
+
+    def stats(self):
+        return {
+            'enabled': True,
+            'transforms': list(self.transforms),
+            'band': list(self.band),
+            'aggregate': self.aggregation,
+            'batch_size': len(self.transforms),
+            'applied': self.applied,
+            'changed_prediction': self.changed,
+        }
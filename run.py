@@ -2,38 +2,413 @@
 """
 Simple runner script for Potato Disease Detection API
 This script runs the Flask app directly without gunicorn
+
+Mode:
+    python run.py                 - development server (debug, satu proses)
+    python run.py --production    - production prefork server
+
+Production mode memuat model dan labels sekali di proses parent, lalu fork
+beberapa worker yang berbagi halaman memori model (file model yang di-mmap,
+atau buffer bytes secara copy-on-write jika MODEL_MMAP=0).
+Setiap worker membangun interpreter sendiri dengan jumlah thread yang
+disesuaikan dengan CPU yang dipin ke worker tersebut.
+
+Signals (production):
+    SIGTERM / SIGINT - graceful shutdown (request yang sedang jalan diselesaikan)
+    SIGHUP           - graceful reload: app.py dan model dimuat ulang, worker baru
+                       dinyalakan lalu worker lama di-drain
+    SIGTTIN / SIGTTOU - tambah / kurangi satu worker
 """
 
+import argparse
+import importlib
 import os
+import random
+import signal
+import socket
 import sys
+import threading
+import time
 
-if __name__ == "__main__":
+from werkzeug.wsgi import ClosingIterator
+
+from inference.autotune import settings_from_env
+from inference.config import env_int
+from inference.memory import MappedModel
+
+
+def check_model_files():
     # Check if model files exist
     model_path = os.path.join(os.path.dirname(__file__), 'model', 'model_unquant.tflite')
     labels_path = os.path.join(os.path.dirname(__file__), 'model', 'labels.txt')
-    
+
     if not os.path.exists(model_path):
         print(f"❌ Error: Model file not found at {model_path}")
         print("Please ensure the model file exists in the model/ directory")
         sys.exit(1)
-    
+
     if not os.path.exists(labels_path):
         print(f"❌ Error: Labels file not found at {labels_path}")
         print("Please ensure the labels file exists in the model/ directory")
         sys.exit(1)
-    
-    print("🥔 Starting Potato Disease Detection API...")
-    print("📁 Model files verified ✅")
-    
+
+
+def load_app_module(module=None):
+    """
+    Import (atau reload) app.py di proses master
+
+    Master hanya butuh satu interpreter untuk membaca input/output details;
+    pool sebenarnya dibangun di setiap worker setelah fork. Warm-up dan
+    watcher model juga dilewati di master (thread tidak boleh berjalan saat
+    fork) dan dijalankan oleh init_worker di setiap worker. Autotune dijalankan oleh
+    PreforkServer.autotune dengan CPU satu worker, bukan semua CPU master.
+    """
+    overrides = {'INTERPRETER_POOL_SIZE': '1', 'WARMUP_ENABLED': '0', 'AUTOTUNE_ENABLED': '0',
+                 'MODEL_WATCH_INTERVAL': '0'}
+    saved = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        if module is None:
+            return importlib.import_module('app')
+        return importlib.reload(module)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
+
+
+class WorkerApp:
+    """
+    WSGI middleware di worker: hitung request dan request yang sedang berjalan
+
+    Setelah max_requests tercapai, on_limit dipanggil sekali supaya worker
+    berhenti dengan graceful dan diganti worker baru oleh parent.
+    Request dihitung selesai saat server memanggil close() pada response,
+    yaitu setelah body-nya selesai ditulis ke socket.
+    """
+
+    def __init__(self, app, max_requests, on_limit):
+        self.app = app
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.handled = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._limit_reached = False
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.handled += 1
+            self.in_flight += 1
+            trigger = (
+                self.max_requests > 0
+                and self.handled >= self.max_requests
+                and not self._limit_reached
+            )
+            if trigger:
+                self._limit_reached = True
+
+        def finished():
+            with self._lock:
+                self.in_flight -= 1
+            if trigger:
+                self.on_limit()
+
+        try:
+            response = self.app(environ, start_response)
+        except BaseException:
+            finished()
+            raise
+        return ClosingIterator(response, finished)
+
+
+class PreforkServer:
+    """
+    Master proses: satu listening socket, N worker hasil fork
+
+    Worker yang mati dengan error sebelum min_uptime detik dihitung sebagai
+    gagal cepat: slot-nya di-respawn dengan backoff eksponensial, dan master
+    berhenti (exit 1) setelah max_failures kegagalan cepat berturut-turut
+    pada slot yang sama, misalnya model rusak atau OOM di init_worker.
+    """
+
+    backoff_base = 0.5
+    backoff_max = 30.0
+
+    def __init__(self, app_module, host, port, workers, max_requests=0, max_requests_jitter=0,
+                 pin_cpus=True, graceful_timeout=30.0, backlog=2048, max_failures=5, min_uptime=10.0):
+        self.app_module = app_module
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.pin_cpus = pin_cpus and hasattr(os, 'sched_setaffinity')
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.max_failures = max_failures
+        self.min_uptime = min_uptime
+
+        self.socket = None
+        self.children = {}  # pid -> (slot, generation)
+        self.started = {}  # pid -> waktu spawn
+        self.failures = {}  # slot -> kegagalan cepat berturut-turut
+        self.respawn_at = {}  # slot -> waktu paling awal spawn berikutnya
+        self.exit_code = 0
+        self.stopping = False
+        self.reload_requested = False
+        self.generation = 0
+
+    # --- Master ---------------------------------------------------------
+
+    def cpu_plan(self, slot):
+        """
+        CPU yang dipin ke worker pada slot ini
+        """
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+        per_worker = max(1, len(cpus) // self.workers)
+        start = (slot * per_worker) % len(cpus)
+        return cpus[start:start + per_worker] or cpus[:per_worker]
+
+    def autotune(self):
+        """
+        Jalankan autotuner (AUTOTUNE_ENABLED) di master sebelum worker di-fork
+
+        Master dipin sementara ke CPU worker slot 0 supaya benchmark melihat
+        core yang sama dengan satu worker. Hasilnya (engine.tuning) diwarisi
+        worker lewat fork; dari profile yang tersimpan tidak ada benchmark.
+        """
+        engine = self.app_module.engine
+        engine.autotune = settings_from_env()
+        if engine.autotune is None:
+            return
+        cpus = self.cpu_plan(0)
+        original = os.sched_getaffinity(0) if self.pin_cpus else None
+        try:
+            if original is not None:
+                os.sched_setaffinity(0, cpus)
+            tuning = engine.tune(cpus=len(cpus), apply=False)
+        except Exception as e:
+            print(f"⚠️ Autotune failed, using INTERPRETER_POOL_SIZE / INTERPRETER_NUM_THREADS: {e}", file=sys.stderr)
+            engine.tuning = None
+            return
+        finally:
+            if original is not None:
+                os.sched_setaffinity(0, original)
+        config = tuning['config']
+        print(f"🎛️ Autotune ({tuning['source']}): {config['pool_size']} interpreter(s) x {config['num_threads']} "
+              f"thread(s), xnnpack={config['xnnpack']} per worker ({len(cpus)} CPU)")
+
+    def run(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(self.backlog)
+        self.socket.set_inheritable(True)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        signal.signal(signal.SIGTTIN, self._handle_scale)
+        signal.signal(signal.SIGTTOU, self._handle_scale)
+
+        self.autotune()
+        print(f"🚀 Prefork server on http://{self.host}:{self.port} with {self.workers} worker(s) (master pid {os.getpid()})")
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        while not self.stopping:
+            self.reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            self.maintain()
+            time.sleep(0.2)
+
+        self.shutdown()
+        if self.exit_code:
+            sys.exit(self.exit_code)
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.worker_main(slot)
+            except Exception as e:
+                print(f"❌ Worker {os.getpid()} crashed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = (slot, self.generation)
+        self.started[pid] = time.monotonic()
+        return pid
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot, _ = self.children.pop(pid, (None, None))
+            started = self.started.pop(pid, None)
+            if slot is not None and not self.stopping:
+                code = os.waitstatus_to_exitcode(status)
+                reason = 'recycled' if code == 0 else f'exited with {code}'
+                print(f"♻️  Worker {pid} (slot {slot}) {reason}")
+                if code != 0 and time.monotonic() - started < self.min_uptime:
+                    self.failed(slot)
+                else:
+                    self.failures.pop(slot, None)
+                    self.respawn_at.pop(slot, None)
+
+    def failed(self, slot):
+        """
+        Catat kegagalan cepat worker pada slot; tunda respawn atau hentikan master
+        """
+        failures = self.failures.get(slot, 0) + 1
+        self.failures[slot] = failures
+        if failures >= self.max_failures:
+            print(f"❌ Worker slot {slot} failed {failures} times within {self.min_uptime:g}s of starting, "
+                  f"shutting down", file=sys.stderr)
+            self.exit_code = 1
+            self.stopping = True
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        self.respawn_at[slot] = time.monotonic() + delay
+        print(f"⏳ Respawning worker slot {slot} in {delay:g}s (failure {failures}/{self.max_failures})",
+              file=sys.stderr)
+
+    def maintain(self):
+        # Pastikan setiap slot generasi sekarang punya worker
+        if self.stopping:
+            return
+        active = {slot for slot, generation in self.children.values() if generation == self.generation}
+        now = time.monotonic()
+        for slot in range(self.workers):
+            if slot not in active and now >= self.respawn_at.get(slot, 0.0):
+                self.spawn(slot)
+        # Kurangi worker jika jumlah slot diturunkan
+        for pid, (slot, generation) in list(self.children.items()):
+            if generation == self.generation and slot >= self.workers:
+                os.kill(pid, signal.SIGTERM)
+                self.children[pid] = (slot, -1)
+
+    def reload(self):
+        """
+        Graceful reload: muat ulang app di parent, nyalakan worker baru,
+        lalu drain worker lama
+        """
+        print("🔄 Reloading application and model...")
+        try:
+            self.app_module = load_app_module(self.app_module)
+        except Exception as e:
+            print(f"❌ Reload failed, keeping current workers: {e}", file=sys.stderr)
+            return
+        self.autotune()
+
+        old_pids = list(self.children)
+        self.generation += 1
+        for slot in range(self.workers):
+            self.spawn(slot)
+        for pid in old_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def shutdown(self):
+        print("🛑 Shutting down workers...")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.socket.close()
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def _handle_scale(self, signum, frame):
+        if signum == signal.SIGTTIN:
+            self.workers += 1
+        elif self.workers > 1:
+            self.workers -= 1
+
+    # --- Worker ---------------------------------------------------------
+
+    def worker_main(self, slot):
+        from werkzeug.serving import make_server
+
+        for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        # Pin CPU dan sesuaikan thread interpreter supaya tidak oversubscribe
+        cpus = self.cpu_plan(slot)
+        if self.pin_cpus:
+            os.sched_setaffinity(0, cpus)
+        tuning = self.app_module.engine.tuning
+        if tuning is not None:
+            worker_pool_size, worker_num_threads = tuning['config']['pool_size'], tuning['config']['num_threads']
+        else:
+            worker_pool_size = env_int('INTERPRETER_POOL_SIZE', 1)
+            worker_num_threads = env_int('INTERPRETER_NUM_THREADS', max(1, len(cpus) // worker_pool_size))
+        self.app_module.init_worker(worker_pool_size, worker_num_threads)
+
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+
+        server = None
+        stop_once = threading.Event()
+
+        def stop():
+            # shutdown() harus dipanggil dari thread lain selain serve_forever()
+            if not stop_once.is_set():
+                stop_once.set()
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+        wsgi_app = WorkerApp(self.app_module.app, max_requests, stop)
+        server = make_server(self.host, self.port, wsgi_app, threaded=True, fd=self.socket.fileno())
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop())
+
+        print(f"👷 Worker {os.getpid()} (slot {slot}) ready: cpus={cpus if self.pin_cpus else 'all'}, "
+              f"interpreters={worker_pool_size} x {worker_num_threads} thread(s)")
+        server.serve_forever()
+
+        # Tunggu request yang sedang berjalan selesai
+        deadline = time.monotonic() + self.graceful_timeout
+        while wsgi_app.in_flight > 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        server.server_close()
+
+
+def run_development(port):
     # Import and run the app
     from app import app
-    
-    port = int(os.environ.get('PORT', 8000))
+
     print(f"🚀 Starting server on http://localhost:{port}")
-    print("🔍 Health check: http://localhost:{port}/health")
-    print("📋 API documentation: http://localhost:{port}")
+    print(f"🔍 Health check: http://localhost:{port}/health")
+    print(f"📋 API documentation: http://localhost:{port}")
     print("\nPress Ctrl+C to stop the server")
-    
+
     try:
         app.run(debug=True, host='0.0.0.0', port=port)
     except KeyboardInterrupt:
@@ -41,3 +416,57 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"❌ Error starting server: {e}")
         sys.exit(1)
+
+
+def run_production(args):
+    if not hasattr(os, 'fork'):
+        print("❌ Production mode requires a POSIX system (os.fork)")
+        sys.exit(1)
+
+    app_module = load_app_module()
+
+    model = app_module.model_registry.active
+    sharing = 'mmap, shared page cache' if isinstance(model.model_content, MappedModel) else 'shared copy-on-write'
+    print(f"📦 Model and labels loaded in master ({len(model.model_content) / 1024:.0f} KB {sharing})")
+
+    PreforkServer(
+        app_module,
+        host='0.0.0.0',
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        pin_cpus=not args.no_pin_cpus,
+        graceful_timeout=args.graceful_timeout,
+        max_failures=args.max_worker_failures
+    ).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run Potato Disease Detection API')
+    parser.add_argument('--production', action='store_true',
+                        help='Jalankan prefork server multi-proses')
+    parser.add_argument('--port', type=int, default=env_int('PORT', 8000))
+    parser.add_argument('--workers', type=int, default=env_int('WEB_CONCURRENCY', os.cpu_count() or 1),
+                        help='Jumlah worker (env WEB_CONCURRENCY)')
+    parser.add_argument('--max-requests', type=int, default=env_int('MAX_REQUESTS', 0),
+                        help='Recycle worker setelah N request, 0 = nonaktif (env MAX_REQUESTS)')
+    parser.add_argument('--max-requests-jitter', type=int, default=env_int('MAX_REQUESTS_JITTER', 0),
+                        help='Tambahan acak untuk max-requests (env MAX_REQUESTS_JITTER)')
+    parser.add_argument('--graceful-timeout', type=float, default=float(env_int('GRACEFUL_TIMEOUT', 30)),
+                        help='Detik menunggu request selesai saat stop/reload (env GRACEFUL_TIMEOUT)')
+    parser.add_argument('--max-worker-failures', type=int, default=env_int('MAX_WORKER_FAILURES', 5),
+                        help='Hentikan master setelah N kegagalan cepat berturut-turut di satu slot '
+                             '(env MAX_WORKER_FAILURES)')
+    parser.add_argument('--no-pin-cpus', action='store_true', help='Jangan pin worker ke CPU tertentu')
+    args = parser.parse_args()
+
+    check_model_files()
+
+    print("🥔 Starting Potato Disease Detection API...")
+    print("📁 Model files verified ✅")
+
+    if args.production:
+        run_production(args)
+    else:
+        run_development(args.port)
@@ -1,9 +1,10 @@
 import streamlit as st
-import tensorflow as tf
-import numpy as np
-from PIL import Image
 import os
 
+from inference import InferenceEngine, PoolTimeoutError
+from inference.cache import content_hash
+from inference.config import env_int
+
 # Page config
 st.set_page_config(
     page_title="Potato Disease Detection",
@@ -11,165 +12,180 @@ st.set_page_config(
     layout="wide"
 )
 
+# Hasil prediksi di-memoize per isi file (st.cache_data), jadi rerun karena
+# widget berubah tidak men-decode dan meng-infer ulang gambar yang sama
+# STREAMLIT_RESULT_CACHE_SIZE: jumlah upload (atau kumpulan upload) yang disimpan
+# STREAMLIT_GRID_COLUMNS: jumlah kolom grid hasil untuk upload banyak gambar
+result_cache_size = env_int('STREAMLIT_RESULT_CACHE_SIZE', 256)
+grid_columns = env_int('STREAMLIT_GRID_COLUMNS', 4)
+
 # Load model dan labels
 @st.cache_resource
-def load_model_and_labels():
+def load_engine():
+    """
+    Inference engine yang sama dengan app.py (inference/engine.py), satu per proses Streamlit
+
+    Dipakai bersama semua session, tapi satu interpreter tidak pernah dipakai dua
+    session sekaligus: setiap inference meminjam interpreter dari pool
+    (INTERPRETER_POOL_SIZE) secara eksklusif dan menunggu jika semuanya sedang dipakai
+    """
     model_path = os.path.join(os.path.dirname(__file__), 'model', 'model_unquant.tflite')
     labels_path = os.path.join(os.path.dirname(__file__), 'model', 'labels.txt')
-    
-    # Load TensorFlow Lite model
-    interpreter = tf.lite.Interpreter(model_path=model_path)
-    interpreter.allocate_tensors()
-    
-    # Get input and output tensors
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-    
-    # Load labels
-    with open(labels_path, 'r') as f:
-        labels = [line.strip().split(' ', 1)[1] for line in f.readlines()]
-    
-    return interpreter, input_details, output_details, labels
-
-def preprocess_image(image, input_details):
+    engine = InferenceEngine.from_env(model_path, labels_path, threshold=0.5)
+    engine.load()
+    return engine
+
+def summarize(result):
     """
-    Preprocess image untuk model TensorFlow Lite
+    Result (atau error preprocessing) sebagai dict yang bisa disimpan st.cache_data
     """
-    try:
-        # Convert ke RGB jika perlu
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize sesuai input model
-        input_shape = input_details[0]['shape']
-        height, width = input_shape[1], input_shape[2]
-        image = image.resize((width, height))
-        
-        # Convert ke numpy array dan normalize
-        image_array = np.array(image, dtype=np.float32)
-        image_array = image_array / 255.0  # Normalize ke range [0, 1]
-        
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
-        
-        return image_array
-    except Exception as e:
-        st.error(f"Error preprocessing image: {str(e)}")
-        return None
+    if isinstance(result, Exception):
+        return {'error': str(result)}
+    return {
+        'label': result.label,
+        'confidence': result.confidence,
+        'detected': result.detected,
+        'top': result.top(3),
+    }
 
-def predict_disease(image_array, interpreter, input_details, output_details):
+@st.cache_data(max_entries=result_cache_size, show_spinner=False)
+def score_images(digests, fingerprint, _payloads):
     """
-    Prediksi penyakit menggunakan model TensorFlow Lite
+    Prediksi semua gambar sebagai satu batch (batched invoke())
+
+    Key cache: hash isi setiap file + hash model; _payloads tidak ikut di-hash.
+    Jika kumpulan file berubah, gambar yang sudah pernah diskor diambil dari
+    prediction cache engine, jadi hanya gambar baru yang di-decode dan di-infer.
     """
-    try:
-        # Set input tensor
-        interpreter.set_tensor(input_details[0]['index'], image_array)
-        
-        # Run inference
-        interpreter.invoke()
-        
-        # Get output
-        output_data = interpreter.get_tensor(output_details[0]['index'])
-        predictions = output_data[0]
-        
-        # Get predicted class dan confidence
-        predicted_class = np.argmax(predictions)
-        confidence = float(predictions[predicted_class])
-        
-        return predicted_class, confidence, predictions
-    except Exception as e:
-        st.error(f"Error during prediction: {str(e)}")
-        return None, None, None
+    results = load_engine().predict_batch(list(_payloads), return_exceptions=True)
+    return [summarize(result) for result in results]
+
+def render_result(result):
+    """
+    Hasil satu gambar: label, confidence dan top 3 prediksi
+    """
+    if 'error' in result:
+        st.error(f"Error preprocessing image: {result['error']}")
+    elif not result['detected']:
+        st.warning("⚠️ **Penyakit tidak terdeteksi**")
+        st.write(f"Confidence: {result['confidence'] * 100:.2f}%")
+    else:
+        percentage = f"{result['confidence'] * 100:.2f}%"
+
+        st.success(f"✅ **Penyakit terdeteksi: {result['label']}**")
+        st.write(f"**Confidence:** {percentage}")
+
+        # Progress bar untuk confidence
+        st.progress(result['confidence'])
+
+        # Top 3 predictions
+        st.subheader("📊 Top 3 Prediksi")
+        for i, (label, score) in enumerate(result['top']):
+            st.write(f"{i+1}. **{label}**: {score * 100:.2f}%")
+            st.progress(score)
+
+def render_grid(uploaded_files, payloads, results):
+    """
+    Ringkasan tabel lalu grid thumbnail + hasil untuk banyak gambar
+    """
+    st.subheader(f"🔍 Hasil Deteksi ({len(results)} gambar)")
+    st.dataframe(
+        [
+            {
+                'File': uploaded_file.name,
+                'Hasil': result.get('error') or (result['label'] if result['detected'] else 'Tidak terdeteksi'),
+                'Confidence': f"{result['confidence'] * 100:.2f}%" if 'confidence' in result else '-',
+            }
+            for uploaded_file, result in zip(uploaded_files, results)
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    for start in range(0, len(results), grid_columns):
+        for column, i in zip(st.columns(grid_columns), range(start, min(start + grid_columns, len(results)))):
+            with column:
+                # Bytes langsung ke browser, tidak di-decode ulang di server
+                st.image(payloads[i], caption=uploaded_files[i].name, use_column_width=True)
+                result = results[i]
+                if 'error' in result:
+                    st.error(result['error'])
+                elif result['detected']:
+                    st.success(f"{result['label']} ({result['confidence'] * 100:.2f}%)")
+                else:
+                    st.warning(f"Tidak terdeteksi ({result['confidence'] * 100:.2f}%)")
+
+def render_sidebar(labels):
+    with st.sidebar:
+        st.header("ℹ️ Informasi")
+        st.write("**Penyakit yang dapat dideteksi:**")
+        if labels is None:
+            st.write("Model belum dimuat")
+        else:
+            for i, label in enumerate(labels):
+                st.write(f"{i+1}. {label}")
+
+        st.write("---")
+        st.write("**Cara Penggunaan:**")
+        st.write("1. Upload satu atau beberapa gambar daun kentang")
+        st.write("2. Tunggu proses deteksi")
+        st.write("3. Lihat hasil prediksi")
+
+        st.write("---")
+        st.write("**Format yang didukung:**")
+        st.write("PNG, JPG, JPEG, GIF, BMP, WEBP")
 
 # Main app
 def main():
     st.title("🥔 Potato Disease Detection")
     st.write("Upload gambar daun kentang untuk mendeteksi penyakit")
-    
+
     # Load model
     try:
-        interpreter, input_details, output_details, labels = load_model_and_labels()
+        engine = load_engine()
         st.success("✅ Model berhasil dimuat!")
     except Exception as e:
+        render_sidebar(None)
         st.error(f"❌ Error loading model: {str(e)}")
         return
-    
+
+    model = engine.model
+    render_sidebar(model.labels)
+
     # File uploader
-    uploaded_file = st.file_uploader(
+    uploaded_files = st.file_uploader(
         "Pilih gambar daun kentang",
         type=['png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'],
+        accept_multiple_files=True,
         help="Format yang didukung: PNG, JPG, JPEG, GIF, BMP, WEBP"
     )
-    
-    if uploaded_file is not None:
-        # Display image
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("📷 Gambar Input")
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Gambar yang diupload", use_column_width=True)
-        
-        with col2:
-            st.subheader("🔍 Hasil Deteksi")
-            
-            # Preprocess image
-            with st.spinner("Memproses gambar..."):
-                image_array = preprocess_image(image, input_details)
-            
-            if image_array is not None:
-                # Predict
-                with st.spinner("Mendeteksi penyakit..."):
-                    predicted_class, confidence, all_predictions = predict_disease(
-                        image_array, interpreter, input_details, output_details
-                    )
-                
-                if predicted_class is not None:
-                    # Set threshold
-                    threshold = 0.5
-                    
-                    if confidence < threshold:
-                        st.warning("⚠️ **Penyakit tidak terdeteksi**")
-                        st.write(f"Confidence: {confidence * 100:.2f}%")
-                    else:
-                        label = labels[predicted_class]
-                        percentage = f"{confidence * 100:.2f}%"
-                        
-                        st.success(f"✅ **Penyakit terdeteksi: {label}**")
-                        st.write(f"**Confidence:** {percentage}")
-                        
-                        # Progress bar untuk confidence
-                        st.progress(confidence)
-                        
-                        # Top 3 predictions
-                        st.subheader("📊 Top 3 Prediksi")
-                        top_3_indices = np.argsort(all_predictions)[-3:][::-1]
-                        
-                        for i, idx in enumerate(top_3_indices):
-                            conf = all_predictions[idx] * 100
-                            st.write(f"{i+1}. **{labels[idx]}**: {conf:.2f}%")
-                            st.progress(all_predictions[idx])
-    
-    # Sidebar info
-    with st.sidebar:
-        st.header("ℹ️ Informasi")
-        st.write("**Penyakit yang dapat dideteksi:**")
-        try:
-            interpreter, input_details, output_details, labels = load_model_and_labels()
-            for i, label in enumerate(labels):
-                st.write(f"{i+1}. {label}")
-        except:
-            st.write("Model belum dimuat")
-        
-        st.write("---")
-        st.write("**Cara Penggunaan:**")
-        st.write("1. Upload gambar daun kentang")
-        st.write("2. Tunggu proses deteksi")
-        st.write("3. Lihat hasil prediksi")
-        
-        st.write("---")
-        st.write("**Format yang didukung:**")
-        st.write("PNG, JPG, JPEG, GIF, BMP, WEBP")
+
+    if not uploaded_files:
+        return
+
+    payloads = [uploaded_file.getvalue() for uploaded_file in uploaded_files]
+    digests = tuple(content_hash(payload) for payload in payloads)
+    try:
+        with st.spinner("Mendeteksi penyakit..."):
+            results = score_images(digests, model.fingerprint, payloads)
+    except (ValueError, PoolTimeoutError) as e:
+        st.error(f"Error during prediction: {str(e)}")
+        return
+
+    if len(uploaded_files) > 1:
+        render_grid(uploaded_files, payloads, results)
+        return
+
+    # Display image
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("📷 Gambar Input")
+        st.image(payloads[0], caption="Gambar yang diupload", use_column_width=True)
+
+    with col2:
+        st.subheader("🔍 Hasil Deteksi")
+        render_result(results[0])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,9 @@
+"""
+Test dijalankan dari root repo; app.py diimport tanpa thread warm-up
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('WARMUP_ENABLED', '0')
@@ -0,0 +1,195 @@
+"""
+AdmissionController: slot, antrean prioritas, shedding, token bucket dan deadline
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from inference.admission import (
+    AdmissionController, DeadlineExceeded, QueueFull, QueueTimeout, RateLimited, Shed, TokenBucket,
+)
+
+
+def test_grants_up_to_max_concurrent_then_queues():
+    controller = AdmissionController(max_concurrent=2, max_queue=4)
+    first = controller.enter('a')
+    second = controller.enter('b')
+    third = controller.enter('c')
+    assert first.admitted and second.admitted
+    assert third.state == 'waiting'
+    assert controller.in_flight == 2
+
+    controller.release(first)
+    assert third.admitted
+    assert controller.in_flight == 2
+    controller.release(second)
+    controller.release(third)
+    assert controller.in_flight == 0
+
+
+def test_release_is_idempotent():
+    controller = AdmissionController(max_concurrent=1)
+    ticket = controller.enter(None)
+    controller.release(ticket)
+    controller.release(ticket)
+    assert controller.in_flight == 0
+
+
+def test_free_slot_goes_to_highest_priority_first():
+    controller = AdmissionController(max_concurrent=1, max_queue=8)
+    running = controller.enter(None)
+    bulk = controller.enter(None, 'bulk')
+    interactive = controller.enter(None, 'interactive')
+
+    controller.release(running)
+    assert interactive.admitted
+    assert bulk.state == 'waiting'
+    controller.release(interactive)
+    assert bulk.admitted
+
+
+def test_full_queue_sheds_newest_lower_priority_request():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, bulk_queue_share=1.0)
+    controller.enter(None)
+    older = controller.enter(None, 'bulk')
+    newer = controller.enter(None, 'bulk')
+
+    interactive = controller.enter(None, 'interactive')
+    assert interactive.state == 'waiting'
+    assert newer.state == 'rejected' and isinstance(newer.error, Shed)
+    assert older.state == 'waiting'
+
+    controller.enter(None, 'interactive')
+    assert isinstance(older.error, Shed)
+    with pytest.raises(QueueFull):
+        controller.enter(None, 'interactive')
+
+
+def test_bulk_requests_limited_to_their_share_of_the_queue():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, bulk_queue_share=0.5)
+    controller.enter(None)
+    controller.enter(None, 'bulk')
+    controller.enter(None, 'bulk')
+    with pytest.raises(QueueFull):
+        controller.enter(None, 'bulk')
+    assert controller.enter(None, 'interactive').state == 'waiting'
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2.0, burst=2.0, now=0.0)
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0.0
+
+
+def test_rate_limit_is_per_client():
+    controller = AdmissionController(max_concurrent=8, rate=1.0, burst=1.0)
+    controller.release(controller.enter('a'))
+    with pytest.raises(RateLimited) as excinfo:
+        controller.enter('a')
+    assert excinfo.value.status == 429
+    assert excinfo.value.retry_after > 0
+    controller.release(controller.enter('b'))
+    controller.release(controller.enter(None))
+
+
+def test_expired_deadline_rejected_on_enter():
+    controller = AdmissionController(max_concurrent=1)
+    with pytest.raises(DeadlineExceeded):
+        controller.enter(None, deadline=time.monotonic() - 1)
+    assert controller.in_flight == 0
+
+
+def test_deadline_passed_while_queued_rejected_on_dispatch():
+    controller = AdmissionController(max_concurrent=1)
+    running = controller.enter(None)
+    queued = controller.enter(None, deadline=time.monotonic() + 0.01)
+    time.sleep(0.02)
+    controller.release(running)
+    assert queued.state == 'rejected'
+    assert isinstance(queued.error, DeadlineExceeded)
+    assert controller.in_flight == 0
+
+
+def test_check_deadline_before_decode():
+    controller = AdmissionController(max_concurrent=1)
+    ticket = controller.enter(None, deadline=time.monotonic() + 0.01)
+    assert ticket.admitted
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        controller.check_deadline(ticket)
+    controller.release(ticket)
+    assert controller.in_flight == 0
+    assert controller.stats()['rejected']['deadline']['interactive'] == 1
+
+
+def test_wait_times_out_and_leaves_queue():
+    controller = AdmissionController(max_concurrent=1, queue_timeout=0.02)
+    running = controller.enter(None)
+    with pytest.raises(QueueTimeout):
+        controller.wait(controller.enter(None))
+    assert controller.stats()['queue_depth']['interactive'] == 0
+    controller.release(running)
+    assert controller.in_flight == 0
+
+
+def test_wait_blocks_until_slot_released():
+    controller = AdmissionController(max_concurrent=1, queue_timeout=5.0)
+    running = controller.enter(None)
+    timer = threading.Timer(0.02, controller.release, (running,))
+    timer.start()
+    ticket = controller.wait(controller.enter(None))
+    timer.join()
+    assert ticket.admitted
+    controller.release(ticket)
+    assert controller.in_flight == 0
+
+
+def test_wait_async_admitted_when_slot_released():
+    controller = AdmissionController(max_concurrent=1, queue_timeout=5.0)
+
+    async def scenario():
+        running = controller.enter(None)
+        asyncio.get_running_loop().call_later(0.02, controller.release, running)
+        ticket = await controller.wait_async(controller.enter(None))
+        assert ticket.admitted
+        controller.release(ticket)
+
+    asyncio.run(scenario())
+    assert controller.in_flight == 0
+
+
+def test_cancelled_wait_async_does_not_leak_slot():
+    controller = AdmissionController(max_concurrent=1, queue_timeout=5.0)
+
+    async def scenario():
+        running = controller.enter(None)
+        waiter = asyncio.create_task(controller.wait_async(controller.enter(None)))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.stats()['queue_depth']['interactive'] == 0
+        controller.release(running)
+
+    asyncio.run(scenario())
+    assert controller.in_flight == 0
+    # Slot yang sama masih bisa dipakai request berikutnya
+    ticket = controller.enter(None)
+    assert ticket.admitted
+    controller.release(ticket)
+
+
+def test_cancel_after_grant_returns_slot():
+    controller = AdmissionController(max_concurrent=1, queue_timeout=5.0)
+    running = controller.enter(None)
+    queued = controller.enter(None)
+    controller.release(running)
+    assert queued.admitted
+    # Slot diberikan tepat sebelum task yang menunggu dibatalkan
+    controller.cancel(queued)
+    assert controller.in_flight == 0
@@ -0,0 +1,166 @@
+"""
+Kontrak HTTP /detect di app.py, asgi_app.py dan flask_app.py: negosiasi format,
+status code penolakan yang sama di setiap front end, dan deadline sebelum decode
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+from flask import jsonify
+from PIL import Image
+
+import app as api
+import asgi_app
+import flask_app
+from inference.admission import AdmissionController
+from inference.responses import BINARY_TYPE, decode_binary
+
+
+def image_bytes(fmt='PNG', size=(300, 300), color=(90, 140, 60)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def post_image(module, data, filename='daun.png', **kwargs):
+    return module.app.test_client().post('/detect', data={'file': (io.BytesIO(data), filename)}, **kwargs)
+
+
+def asgi_request(data, filename='daun.png', headers=()):
+    """
+    Kirim satu upload multipart ke asgi_app.app; return (status, headers, body)
+    """
+    boundary = 'potato-boundary'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    scope = {
+        'type': 'http', 'path': '/detect', 'method': 'POST', 'query_string': b'', 'client': ('10.0.0.1', 40000),
+        'headers': [
+            (b'content-type', f'multipart/form-data; boundary={boundary}'.encode()),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+    }
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app.app(scope, receive, send))
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+def test_detect_json_matches_jsonify():
+    response = post_image(api, image_bytes())
+    assert response.status_code == 200
+    result = api.engine.predict(image_bytes())
+    with api.app.app_context():
+        assert response.get_data() == jsonify(result.to_dict()).get_data()
+
+
+def test_asgi_and_flask_return_identical_json():
+    data = image_bytes(color=(40, 160, 30))
+    status, headers, body = asgi_request(data)
+    response = post_image(api, data)
+    assert status == response.status_code == 200
+    assert body == response.get_data()
+    assert headers[b'content-type'] == b'application/json'
+
+
+def test_binary_response_negotiated_from_accept():
+    response = post_image(api, image_bytes(), headers={'Accept': BINARY_TYPE})
+    assert response.status_code == 200
+    assert response.mimetype == BINARY_TYPE
+    assert 'Accept' in response.headers['Vary']
+    decoded = decode_binary(response.get_data())
+    assert decoded['model_hash'] == api.model_registry.active.fingerprint
+
+
+def test_k_and_full_parameters():
+    response = api.app.test_client().post(
+        '/detect?k=5&full=1', data={'file': (io.BytesIO(image_bytes()), 'daun.png')}, headers={'Accept': 'application/json'}
+    )
+    body = json.loads(response.get_data())
+    assert len(body['probabilities']) == len(api.model_registry.active.labels)
+    if body['detected']:
+        assert len(body['top_predictions']) == 5
+
+
+def test_unacceptable_accept_header_is_406():
+    response = post_image(api, image_bytes(), headers={'Accept': 'text/html'})
+    assert response.status_code == 406
+    assert response.get_json()['supported_types'][0] == 'application/json'
+
+
+@pytest.mark.parametrize('k', ['-1', 'abc', '999'])
+def test_invalid_k_is_400(k):
+    response = api.app.test_client().post(f'/detect?k={k}', data={'file': (io.BytesIO(image_bytes()), 'daun.png')})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid parameter'
+
+
+@pytest.fixture
+def small_max_pixels(monkeypatch):
+    for engine in (api.engine, flask_app.engine):
+        monkeypatch.setattr(engine, 'max_pixels', 10_000)
+
+
+@pytest.mark.parametrize('data, status', [
+    # Warna yang tidak dipakai test lain, supaya tidak dijawab dari prediction cache
+    (image_bytes(size=(300, 300), color=(7, 7, 7)), 413),
+    (image_bytes(fmt='TIFF', size=(30, 30), color=(8, 8, 8)), 415),
+])
+def test_rejected_images_same_status_on_every_front_end(small_max_pixels, data, status):
+    responses = [post_image(api, data), post_image(flask_app, data)]
+    assert [response.status_code for response in responses] == [status, status]
+    assert responses[0].get_data() == responses[1].get_data()
+    asgi_status, _, asgi_body = asgi_request(data)
+    assert asgi_status == status
+    assert asgi_body == responses[0].get_data()
+
+
+class SlowGrant(AdmissionController):
+    """
+    Slot langsung diberikan, tapi pemanggil baru melanjutkan setelah deadline lewat
+    """
+
+    def wait(self, ticket):
+        ticket = super().wait(ticket)
+        asyncio.run(asyncio.sleep(0.05))
+        return ticket
+
+    async def wait_async(self, ticket):
+        ticket = await super().wait_async(ticket)
+        await asyncio.sleep(0.05)
+        return ticket
+
+
+def test_deadline_rechecked_before_decode(monkeypatch):
+    controller = SlowGrant(max_concurrent=1)
+    monkeypatch.setattr(api, 'admission', controller)
+    decoded = []
+    monkeypatch.setattr(api.engine, 'preprocess', lambda *args, **kwargs: decoded.append(1))
+
+    response = post_image(api, image_bytes(), headers={'X-Request-Timeout-Ms': '20'})
+    status, _, body = asgi_request(image_bytes(), headers=[(b'x-request-timeout-ms', b'20')])
+    assert response.status_code == status == 504
+    assert json.loads(body)['error'] == 'Deadline exceeded'
+    assert not decoded
+    assert controller.in_flight == 0
+    assert controller.stats()['rejected']['deadline']['interactive'] == 2
+
+
+def test_asgi_releases_slot_after_request(monkeypatch):
+    controller = AdmissionController(max_concurrent=1)
+    monkeypatch.setattr(api, 'admission', controller)
+    for _ in range(3):
+        assert asgi_request(image_bytes())[0] == 200
+    assert controller.in_flight == 0
+    assert sum(controller.stats()['admitted'].values()) == 3
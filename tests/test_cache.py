@@ -0,0 +1,118 @@
+"""
+PredictionCache: key fingerprint model, LRU, TTL dan layer disk
+"""
+
+import io
+import os
+
+import numpy as np
+import pytest
+
+from inference import cache as cache_module
+from inference.cache import PredictionCache, content_hash, stream_content_hash
+
+
+def value(seed):
+    predictions = np.random.default_rng(seed).random(4).astype(np.float32)
+    return int(np.argmax(predictions)), float(predictions.max()), predictions
+
+
+def assert_same(actual, expected):
+    assert actual[:2] == expected[:2]
+    np.testing.assert_array_equal(actual[2], expected[2])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    return now
+
+
+def test_entries_keyed_by_model_fingerprint():
+    cache = PredictionCache(max_entries=8)
+    cache.put('k', 'old', value(0))
+    assert cache.get('k', 'new') is None
+    cache.put('k', 'new', value(1))
+    assert_same(cache.get('k', 'old'), value(0))
+    assert_same(cache.get('k', 'new'), value(1))
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 'fp', value(0))
+    cache.put('b', 'fp', value(1))
+    cache.get('a', 'fp')
+    cache.put('c', 'fp', value(2))
+    assert cache.get('b', 'fp') is None
+    assert cache.get('a', 'fp') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expires_entries(clock):
+    cache = PredictionCache(ttl=10)
+    cache.put('k', 'fp', value(0))
+    clock[0] += 9
+    assert cache.get('k', 'fp') is not None
+    clock[0] += 2
+    assert cache.get('k', 'fp') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0
+
+
+def test_disk_layer_shared_across_instances(tmp_path):
+    PredictionCache(disk_dir=str(tmp_path)).put('k', 'fp', value(0))
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    assert_same(cache.get('k', 'fp'), value(0))
+    assert cache.stats()['disk_hits'] == 1
+    # Hit berikutnya dari memori
+    cache.get('k', 'fp')
+    assert cache.stats()['hits'] == 1
+
+
+def test_expired_disk_entry_removed(tmp_path, clock):
+    PredictionCache(ttl=10, disk_dir=str(tmp_path)).put('k', 'fp', value(0))
+    clock[0] += 11
+    cache = PredictionCache(ttl=10, disk_dir=str(tmp_path))
+    assert cache.get('k', 'fp') is None
+    assert not os.path.exists(cache._disk_path('fp', 'k'))
+
+
+def test_disk_pruned_to_max_bytes(tmp_path):
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    cache.put('probe', 'fp', value(0))
+    entry_size = cache.stats()['disk_bytes']
+
+    cache = PredictionCache(max_entries=1, disk_dir=str(tmp_path / 'capped'), disk_max_bytes=entry_size * 5)
+    for i in range(20):
+        path = cache._disk_path('fp', f'key{i:02d}')
+        cache.put(f'key{i:02d}', 'fp', value(0))
+        os.utime(path, (i, i))
+    stats = cache.stats()
+    assert stats['disk_bytes'] <= entry_size * 5
+    assert stats['disk_evictions'] > 0
+    # File paling lama yang dihapus, yang terbaru masih ada
+    assert os.path.exists(cache._disk_path('fp', 'key19'))
+    assert not os.path.exists(cache._disk_path('fp', 'key00'))
+
+
+def test_discard_removes_only_that_fingerprint(tmp_path):
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    cache.put('k', 'old', value(0))
+    cache.put('k', 'new', value(1))
+    cache.discard('old')
+    assert not (tmp_path / 'old').exists()
+    assert cache.get('k', 'old') is None
+    assert_same(cache.get('k', 'new'), value(1))
+
+    cache.clear()
+    assert_same(cache.get('k', 'new'), value(1))
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_stream_content_hash_matches_and_rewinds():
+    data = os.urandom(200_000)
+    stream = io.BytesIO(data)
+    stream.seek(10)
+    assert stream_content_hash(stream, chunk_size=4096) == (content_hash(data[10:]), len(data) - 10)
+    assert stream.tell() == 10
@@ -0,0 +1,194 @@
+"""
+Parity numerik InferenceEngine dengan jalur preprocessing + invoke lama
+
+Referensi adalah jalur flask_app.py / streamlit_app.py sebelum inference/engine.py
+(Image.open, convert RGB, resize bicubic, / 255, satu interpreter, batch 1).
+Engine dijalankan tanpa draft JPEG dan reducing_gap supaya pixel input sama
+persis; dengan konfigurasi itu predict, predict_batch (batched invoke),
+micro-batching dan predict_tensor harus menghasilkan probabilitas yang sama.
+"""
+
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inference.backends import load_backend
+from inference.engine import InferenceEngine
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model')
+MODEL_PATH = os.path.join(MODEL_DIR, 'model_unquant.tflite')
+LABELS_PATH = os.path.join(MODEL_DIR, 'labels.txt')
+
+# Batched invoke memakai kernel yang sama per baris, selisih hanya dari urutan akumulasi float
+ATOL = 1e-5
+
+# (format, mode, ukuran): termasuk RGBA, grayscale dan JPEG besar
+CASES = [
+    ('PNG', 'RGB', (320, 240)), ('JPEG', 'RGB', (224, 224)), ('JPEG', 'RGB', (1600, 1200)),
+    ('PNG', 'RGBA', (500, 500)), ('WEBP', 'RGB', (300, 400)), ('BMP', 'L', (256, 256)),
+]
+
+
+def synthetic_image(fmt, mode, size, seed):
+    width, height = size
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, size=(height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.Resampling.BILINEAR).convert(mode)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class Reference:
+    """
+    Preprocessing + invoke lama, satu gambar per invoke()
+    """
+
+    def __init__(self):
+        _, interpreter_class = load_backend(os.environ.get('INTERPRETER_BACKEND'))
+        self.interpreter = interpreter_class(model_path=MODEL_PATH)
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.height, self.width = (int(d) for d in self.input_detail['shape'][1:3])
+
+    def pixels(self, data):
+        image = Image.open(io.BytesIO(data))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return np.array(image.resize((self.width, self.height)), dtype=np.uint8)
+
+    def invoke(self, image_array):
+        self.interpreter.set_tensor(self.input_detail['index'], np.expand_dims(image_array, axis=0))
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_detail['index'])[0].copy()
+
+    def predict(self, data):
+        return self.invoke(self.pixels(data).astype(np.float32) / 255.0)
+
+
+def create_engine(**overrides):
+    config = {
+        'pool_size': 1, 'num_threads': 1, 'draft': False, 'reducing_gap': None,
+        'microbatch': None, 'tta': None, 'cache': None, 'near_duplicates': None, 'autotune': None,
+    }
+    config.update(overrides)
+    engine = InferenceEngine.from_env(MODEL_PATH, LABELS_PATH, **config)
+    engine.load(warmup=False)
+    return engine
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return Reference()
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return create_engine()
+
+
+@pytest.fixture(scope='module')
+def images():
+    return [synthetic_image(fmt, mode, size, seed) for seed, (fmt, mode, size) in enumerate(CASES)]
+
+
+@pytest.mark.parametrize('source', ['bytes', 'stream', 'image', 'ndarray'])
+def test_predict_matches_reference(engine, reference, images, source):
+    for data in images:
+        expected = reference.predict(data)
+        if source == 'bytes':
+            result = engine.predict(data)
+        elif source == 'stream':
+            result = engine.predict(io.BytesIO(data))
+        elif source == 'image':
+            result = engine.predict(Image.open(io.BytesIO(data)))
+        else:
+            result = engine.predict(reference.pixels(data))
+        np.testing.assert_allclose(result.predictions, expected, atol=ATOL)
+        assert result.predicted_class == int(np.argmax(expected))
+
+
+def test_predict_batch_matches_reference(engine, reference, images):
+    results = engine.predict_batch(images)
+    assert len(results) == len(images)
+    for data, result in zip(images, results):
+        np.testing.assert_allclose(result.predictions, reference.predict(data), atol=ATOL)
+
+
+def test_predict_batch_reports_errors_in_place(engine, reference, images):
+    results = engine.predict_batch([images[0], b'not an image', images[1]], return_exceptions=True)
+    assert isinstance(results[1], Exception)
+    np.testing.assert_allclose(results[0].predictions, reference.predict(images[0]), atol=ATOL)
+    np.testing.assert_allclose(results[2].predictions, reference.predict(images[1]), atol=ATOL)
+
+
+def test_mixed_batch_sizes_do_not_reallocate(engine, images):
+    for _ in range(3):
+        engine.predict(images[0])
+        engine.predict_batch(images[:3])
+        engine.predict_batch(images)
+    assert engine.model.pool.stats()['reallocations'] == 0
+
+
+def test_microbatched_predict_matches_reference(reference, images):
+    engine = create_engine(microbatch={'max_batch_size': 4, 'max_wait_ms': 1.0})
+    try:
+        for data in images:
+            np.testing.assert_allclose(engine.predict(data).predictions, reference.predict(data), atol=ATOL)
+    finally:
+        engine.model.batcher.close()
+
+
+def test_predict_tensor_matches_reference(engine, reference, images):
+    shape = ','.join(str(int(d)) for d in engine.model.input_details[0]['shape'])
+    for data in images:
+        pixels = reference.pixels(data)
+        expected = reference.invoke(pixels.astype(np.float32) / 255.0)
+
+        raw = engine.predict_tensor(pixels.tobytes(), 'raw', shape=shape, dtype='uint8')
+        np.testing.assert_allclose(raw.predictions, expected, atol=ATOL)
+
+        normalized = (pixels.astype(np.float32) / 255.0)
+        as_float = engine.predict_tensor(normalized.tobytes(), 'raw', shape=shape, dtype='float32')
+        np.testing.assert_allclose(as_float.predictions, expected, atol=ATOL)
+
+        buffer = io.BytesIO()
+        np.save(buffer, pixels)
+        npy = engine.predict_tensor(buffer.getvalue(), 'npy')
+        np.testing.assert_allclose(npy.predictions, expected, atol=ATOL)
+
+
+def legacy_response(predictions, labels, threshold=0.5):
+    """
+    Response dict lama flask_app.py
+    """
+    predicted_class = int(np.argmax(predictions))
+    confidence = float(predictions[predicted_class])
+    if confidence < threshold:
+        return {
+            'detected': False,
+            'message': 'Penyakit tidak terdeteksi',
+            'confidence': f"{confidence * 100:.2f}%"
+        }
+    return {
+        'detected': True,
+        'label': labels[predicted_class],
+        'percentage': f"{confidence * 100:.2f}%",
+        'confidence': confidence,
+        'top_predictions': [
+            {'label': labels[idx], 'confidence': f"{predictions[idx] * 100:.2f}%"}
+            for idx in np.argsort(predictions)[-3:][::-1]
+        ]
+    }
+
+
+def test_result_dict_matches_legacy_format(engine, reference, images):
+    for data in images:
+        result = engine.predict(data)
+        response = {key: value for key, value in result.to_dict().items() if key not in ('model_version', 'model_hash')}
+        # Probabilitas yang sama (lihat test di atas) harus menghasilkan response yang sama persis
+        assert response == legacy_response(result.predictions, engine.model.labels, engine.threshold)
@@ -0,0 +1,105 @@
+"""
+NearDuplicateCache: pHash, recall multi-index hashing dan key fingerprint model
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inference import near_duplicates
+from inference.near_duplicates import HASH_BITS, NearDuplicateCache, perceptual_hash
+
+
+def leaf(seed, size=224):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, size=(size // 16, size // 16, 3), dtype=np.uint8)
+    return Image.fromarray(base).resize((size, size), Image.Resampling.BICUBIC)
+
+
+def model_input(image, size=224):
+    return np.asarray(image.convert('RGB').resize((size, size)), dtype=np.float32) / 255.0
+
+
+def flip_bits(value, bits):
+    for bit in bits:
+        value ^= 1 << int(bit)
+    return value
+
+
+def test_hash_stable_under_resize_and_recompression():
+    image = leaf(0)
+    original = perceptual_hash(model_input(image))
+    resized = perceptual_hash(model_input(image.resize((400, 400))))
+    assert (original ^ resized).bit_count() <= 2
+    assert (original ^ perceptual_hash(model_input(leaf(1)))).bit_count() > 6
+
+
+def test_hash_same_for_quantized_input():
+    image = model_input(leaf(2))
+    quantized = np.round(image * 255).astype(np.uint8)
+    assert (perceptual_hash(image) ^ perceptual_hash(quantized)).bit_count() <= 2
+
+
+@pytest.mark.parametrize('max_distance', [0, 3, 6])
+def test_lookup_finds_every_hash_within_max_distance(monkeypatch, max_distance):
+    cache = NearDuplicateCache(max_entries=1024, max_distance=max_distance)
+    rng = np.random.default_rng(max_distance)
+    stored = int(rng.integers(0, 2 ** 63)) << 1 | 1
+    cache.put(stored, 'fp', 'stored')
+
+    def search(key):
+        # lookup() dengan hash yang sudah jadi, tanpa menghitung pHash dari gambar
+        monkeypatch.setattr(near_duplicates, 'perceptual_hash', lambda image: key)
+        return cache.lookup(None, 'fp')
+
+    # Pigeonhole: setiap hash dengan jarak <= max_distance harus ditemukan, di posisi bit manapun
+    for _ in range(200):
+        distance = int(rng.integers(0, max_distance + 1))
+        _, value, found_distance = search(flip_bits(stored, rng.choice(HASH_BITS, size=distance, replace=False)))
+        assert value == 'stored'
+        assert found_distance == distance
+
+    assert search(flip_bits(stored, range(max_distance + 1)))[1] is None
+
+
+def test_put_then_lookup_similar_image():
+    cache = NearDuplicateCache(max_entries=16, max_distance=6)
+    image = leaf(3)
+    key, value, _ = cache.lookup(model_input(image), 'fp')
+    assert value is None
+    cache.put(key, 'fp', 'prediction')
+
+    _, value, distance = cache.lookup(model_input(image.resize((300, 300))), 'fp')
+    assert value == 'prediction'
+    assert distance <= 2
+    assert cache.lookup(model_input(leaf(4)), 'fp')[1] is None
+
+
+def test_entries_keyed_by_fingerprint():
+    cache = NearDuplicateCache(max_entries=16, max_distance=6)
+    image = model_input(leaf(5))
+    key, _, _ = cache.lookup(image, 'old')
+    cache.put(key, 'old', 'old prediction')
+    assert cache.lookup(image, 'new')[1] is None
+    cache.put(key, 'new', 'new prediction')
+
+    # Versi lama dan baru bergantian (hot reload) tanpa saling menghapus
+    assert cache.lookup(image, 'old')[1] == 'old prediction'
+    assert cache.lookup(image, 'new')[1] == 'new prediction'
+    assert cache.stats()['models'] == 2
+
+    cache.discard('old')
+    assert cache.lookup(image, 'old')[1] is None
+    assert cache.lookup(image, 'new')[1] == 'new prediction'
+    assert all(fingerprint == 'new' for table in cache._tables for fingerprint, _ in table)
+
+
+def test_lru_eviction_removes_index_entries():
+    cache = NearDuplicateCache(max_entries=2, max_distance=3)
+    for seed in range(3):
+        key, _, _ = cache.lookup(model_input(leaf(10 + seed)), 'fp')
+        cache.put(key, 'fp', seed)
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 1
+    indexed = {key for table in cache._tables for bucket in table.values() for key in bucket}
+    assert indexed == {key for _, key in cache._entries}
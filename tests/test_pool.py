@@ -0,0 +1,97 @@
+"""
+InterpreterPool: peminjaman eksklusif dan interpreter per ukuran batch
+"""
+
+import threading
+
+import pytest
+
+from inference.pool import InterpreterPool, PoolTimeoutError
+
+
+class FakeInterpreter:
+    """
+    Cukup untuk pool: input details, resize_tensor_input dan allocate_tensors
+    """
+
+    def __init__(self):
+        self.shape = [1, 4, 4, 3]
+        self.allocations = 0
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': list(self.shape)}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = list(shape)
+
+    def allocate_tensors(self):
+        self.allocations += 1
+
+
+def test_members_are_borrowed_exclusively():
+    pool = InterpreterPool(FakeInterpreter, size=2)
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is not second
+        assert pool.stats()['in_use'] == 2
+        with pytest.raises(PoolTimeoutError):
+            with pool.acquire(timeout=0.01):
+                pass
+    assert pool.stats()['available'] == 2
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_one_interpreter_per_batch_size():
+    pool = InterpreterPool(FakeInterpreter, size=1)
+    with pool.acquire(batch_size=1) as single:
+        assert single.shape[0] == 1
+    with pool.acquire(batch_size=8) as batched:
+        assert batched.shape[0] == 8
+        assert batched is not single
+
+    # Trafik campuran: setiap ukuran kembali ke interpreter yang sama tanpa allocate ulang
+    for _ in range(10):
+        for size, expected in ((1, single), (8, batched)):
+            with pool.acquire(batch_size=size) as interpreter:
+                assert interpreter is expected
+    assert single.allocations == 1
+    assert batched.allocations == 2
+    stats = pool.stats()
+    assert stats['interpreters_by_batch_size'] == {'1': 1, '8': 1}
+    assert stats['reallocations'] == 0
+
+
+def test_resized_interpreter_counted_as_reallocation():
+    pool = InterpreterPool(FakeInterpreter, size=1)
+    with pool.acquire() as interpreter:
+        # Peminjam tanpa batch_size me-resize interpreter batch 1 sendiri
+        interpreter.resize_tensor_input(0, [4, 4, 4, 3])
+    with pool.acquire(batch_size=1) as again:
+        assert again is interpreter
+        assert again.shape[0] == 1
+    assert pool.stats()['reallocations'] == 1
+
+
+def test_concurrent_checkouts_never_share_a_member():
+    pool = InterpreterPool(FakeInterpreter, size=2)
+    active = set()
+    lock = threading.Lock()
+    errors = []
+
+    def client(batch_size):
+        for _ in range(200):
+            with pool.acquire(timeout=5, batch_size=batch_size) as interpreter:
+                with lock:
+                    if interpreter in active:
+                        errors.append(interpreter)
+                    active.add(interpreter)
+                with lock:
+                    active.discard(interpreter)
+
+    threads = [threading.Thread(target=client, args=(size,)) for size in (1, 2, 4, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert pool.stats()['reallocations'] == 0
+    assert pool.stats()['in_use'] == 0
@@ -0,0 +1,149 @@
+"""
+ModelRegistry: reload berdasarkan hash, kegagalan load, rollback, retire dan watcher
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from inference.registry import ModelLoadError, ModelRegistry, ModelVersion
+
+LABELS = ['Early Blight', 'Late Blight', 'Healthy']
+
+
+class FakeVersion(ModelVersion):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeLoader:
+    """
+    Loader tanpa interpreter; fail=True membuat load berikutnya gagal
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, model_path, labels_path, version, fingerprint):
+        self.calls += 1
+        if self.fail:
+            raise ValueError('corrupt model')
+        return FakeVersion(version, model_path, labels_path, b'', LABELS, fingerprint)
+
+
+@pytest.fixture
+def files(tmp_path):
+    model_path, labels_path = tmp_path / 'model.tflite', tmp_path / 'labels.txt'
+    model_path.write_bytes(b'model v1')
+    labels_path.write_text('\n'.join(LABELS))
+    return str(model_path), str(labels_path)
+
+
+def write_model(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+    # mtime berbeda walaupun ditulis dalam detik yang sama
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_same_fingerprint_is_not_reloaded(files):
+    loader = FakeLoader()
+    registry = ModelRegistry(loader)
+    first = registry.load(*files)
+    assert registry.load(*files) is first
+    assert loader.calls == 1
+
+    forced = registry.load(*files, force=True)
+    assert forced is not first and forced.fingerprint == first.fingerprint
+    assert registry.previous is first
+
+
+def test_new_version_activated_after_warmup(files):
+    warmed = []
+    registry = ModelRegistry(FakeLoader(), warmup=lambda version: warmed.append(registry.active))
+    first = registry.load(*files)
+    write_model(files[0], b'model v2')
+    second = registry.load(*files, version='v2')
+    # Warm-up berjalan saat versi lama masih aktif
+    assert warmed == [None, first]
+    assert registry.active is second and registry.previous is first
+    assert second.version == 'v2' and second.fingerprint != first.fingerprint
+
+
+def test_failed_load_keeps_active_version(files):
+    loader = FakeLoader()
+    registry = ModelRegistry(loader)
+    first = registry.load(*files)
+    write_model(files[0], b'model v2')
+    loader.fail = True
+    with pytest.raises(ModelLoadError, match='corrupt model'):
+        registry.load(*files)
+    assert registry.active is first
+    stats = registry.stats()
+    assert stats['failures'] == 1 and stats['last_error'] == 'ValueError: corrupt model'
+
+
+def test_failed_warmup_keeps_active_version(files):
+    registry = ModelRegistry(FakeLoader())
+    first = registry.load(*files)
+    registry.warmup = lambda version: 1 / 0
+    write_model(files[0], b'model v2')
+    with pytest.raises(ModelLoadError):
+        registry.load(*files)
+    assert registry.active is first
+    # warmup=False melewati warm-up yang gagal
+    assert registry.load(*files, warmup=False) is registry.active is not first
+
+
+def test_rollback_swaps_active_and_previous(files):
+    registry = ModelRegistry(FakeLoader())
+    with pytest.raises(ModelLoadError):
+        registry.rollback()
+    first = registry.load(*files)
+    second = registry.load(*files, force=True)
+    assert registry.rollback() is first
+    assert registry.active is first and registry.previous is second
+    assert registry.rollback() is second
+    assert registry.stats()['rollbacks'] == 2
+
+
+def test_third_version_retires_oldest(files):
+    retired = []
+    done = threading.Event()
+
+    def on_retire(version):
+        retired.append(version)
+        done.set()
+
+    registry = ModelRegistry(FakeLoader(), retire_delay=0, on_retire=on_retire)
+    first = registry.load(*files)
+    second = registry.load(*files, force=True)
+    registry.load(*files, force=True)
+    assert done.wait(5)
+    assert retired == [first]
+    assert first.closed and not second.closed
+    assert registry.versions() == [registry.active, second]
+
+
+def test_watch_loads_changed_file(files):
+    registry = ModelRegistry(FakeLoader())
+    first = registry.load(*files)
+    registry.watch(*files, interval=0.02)
+    try:
+        write_model(files[0], b'model v2')
+        deadline = time.monotonic() + 5
+        while registry.active is first and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert registry.active is not first
+        assert registry.stats()['watching']
+    finally:
+        registry.stop_watching()
+    assert not registry.stats()['watching']
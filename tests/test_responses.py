@@ -0,0 +1,114 @@
+"""
+Encoding response /detect: JSON byte-for-byte sama dengan jsonify, layout biner dan MessagePack
+"""
+
+import numpy as np
+import pytest
+from flask import Flask, jsonify
+
+from inference import responses
+from inference.responses import (
+    BINARY_HEADER, BINARY_TYPE, JSON_TYPE, MSGPACK_TYPE, ResponseTemplates, decode_binary, response_types, top_k,
+)
+
+# Termasuk label dengan karakter yang harus di-escape di JSON
+LABELS = ['Early Blight', 'Late Blight', 'Healthy', 'Daun "kuning"', 'Bercak\\hitam', 'Hama — ulat', 'Layu']
+FINGERPRINT = 'b0f76b62cb2cf948'
+THRESHOLD = 0.5
+
+
+@pytest.fixture(scope='module')
+def templates():
+    return ResponseTemplates(LABELS, '20250810145323', FINGERPRINT)
+
+
+@pytest.fixture(scope='module')
+def flask_app():
+    return Flask(__name__)
+
+
+def prediction(seed, peak):
+    rng = np.random.default_rng(seed)
+    predictions = rng.random(len(LABELS)).astype(np.float32)
+    predictions[seed % len(LABELS)] = 0
+    predictions = predictions / predictions.sum() * (1 - peak)
+    predictions[seed % len(LABELS)] = peak
+    predicted_class = int(np.argmax(predictions))
+    return predicted_class, float(predictions[predicted_class]), predictions
+
+
+CASES = [prediction(seed, peak) for seed, peak in enumerate((0.97, 0.5, 0.49999, 0.2, 0.731, 1.0))]
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('k', [0, 1, 3, len(LABELS)])
+@pytest.mark.parametrize('full', [False, True])
+def test_json_matches_jsonify_byte_for_byte(templates, flask_app, case, k, full):
+    expected = templates.result(*case, THRESHOLD, k=k, full=full)
+    with flask_app.app_context():
+        reference = jsonify(expected).get_data()
+    assert templates.encode_json(*case, THRESHOLD, k=k, full=full) == reference
+
+
+def test_result_dict_format(templates):
+    predicted_class, confidence, predictions = CASES[0]
+    result = templates.result(predicted_class, confidence, predictions, THRESHOLD)
+    assert result['detected'] is True
+    assert result['label'] == LABELS[predicted_class]
+    assert result['percentage'] == f'{confidence * 100:.2f}%'
+    assert [entry['label'] for entry in result['top_predictions']] == [LABELS[i] for i in np.argsort(predictions)[-3:][::-1]]
+    assert result['model_hash'] == FINGERPRINT
+
+    result = templates.result(*CASES[3], THRESHOLD)
+    assert result == {
+        'detected': False,
+        'message': 'Penyakit tidak terdeteksi',
+        'confidence': f'{CASES[3][1] * 100:.2f}%',
+        'model_version': '20250810145323',
+        'model_hash': FINGERPRINT,
+    }
+
+
+@pytest.mark.parametrize('k', [0, 1, 3, 7, 10])
+def test_top_k_matches_full_sort(k):
+    predictions = np.random.default_rng(k).random(7).astype(np.float32)
+    assert list(top_k(predictions, k)) == list(np.argsort(predictions)[::-1][:k])
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('full', [False, True])
+def test_binary_layout_round_trip(templates, case, full):
+    predicted_class, confidence, predictions = case
+    payload = templates.encode_binary(*case, THRESHOLD, k=3, full=full)
+    expected_size = BINARY_HEADER.size + 3 * 6 + (2 + 4 * len(LABELS) if full else 0)
+    assert len(payload) == expected_size
+    assert payload[:4] == b'PDS1'
+
+    decoded = decode_binary(payload)
+    assert decoded['detected'] == (confidence >= THRESHOLD)
+    assert decoded['predicted_class'] == predicted_class
+    assert decoded['confidence'] == pytest.approx(confidence)
+    assert decoded['model_hash'] == FINGERPRINT
+    assert [class_id for class_id, _ in decoded['top_predictions']] == list(top_k(predictions, 3))
+    if full:
+        np.testing.assert_array_equal(decoded['probabilities'], predictions)
+    else:
+        assert 'probabilities' not in decoded
+
+
+def test_decode_binary_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_binary(b'XXXX' + bytes(BINARY_HEADER.size))
+
+
+def test_msgpack_matches_result_dict(templates):
+    msgpack = pytest.importorskip('msgpack')
+    case = CASES[0]
+    payload = templates.encode(MSGPACK_TYPE, *case, THRESHOLD, k=3, full=True)
+    assert msgpack.unpackb(payload) == templates.result(*case, THRESHOLD, k=3, full=True)
+
+
+def test_response_types_follow_msgpack_availability():
+    types = response_types()
+    assert types[:2] == [JSON_TYPE, BINARY_TYPE]
+    assert (MSGPACK_TYPE in types) == (responses.msgpack is not None)
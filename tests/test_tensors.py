@@ -0,0 +1,110 @@
+"""
+Input tensor mentah: parsing header, validasi shape/dtype dan view tanpa salinan
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from inference.tensors import InvalidTensor, model_input, npy_tensor, parse_dtype, parse_shape, raw_tensor
+
+FLOAT_INPUT = {'shape': np.array([1, 4, 4, 3]), 'dtype': np.float32, 'quantization': (0.0, 0)}
+UINT8_INPUT = {'shape': np.array([1, 4, 4, 3]), 'dtype': np.uint8, 'quantization': (1 / 255, 0)}
+
+
+def npy_bytes(array, **kwargs):
+    buffer = io.BytesIO()
+    np.save(buffer, array, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('value, shape', [
+    ('1,224,224,3', (1, 224, 224, 3)),
+    ('224x224x3', (224, 224, 3)),
+    ('224, 224, 3,', (224, 224, 3)),
+])
+def test_parse_shape(value, shape):
+    assert parse_shape(value) == shape
+
+
+@pytest.mark.parametrize('value', ['', 'abc', '224,0,3', '224,-1,3', '1.5,2'])
+def test_parse_shape_rejects_invalid(value):
+    with pytest.raises(InvalidTensor):
+        parse_shape(value)
+
+
+def test_parse_dtype():
+    assert parse_dtype('uint8') == np.uint8
+    with pytest.raises(InvalidTensor):
+        parse_dtype('float64')
+
+
+def test_raw_tensor_is_view_without_copy():
+    data = bytearray(np.arange(48, dtype=np.uint8).tobytes())
+    array = raw_tensor(data, (4, 4, 3), np.uint8)
+    assert array.shape == (4, 4, 3)
+    data[0] = 200
+    assert array[0, 0, 0] == 200
+
+
+def test_raw_tensor_size_mismatch():
+    with pytest.raises(InvalidTensor, match='needs 192'):
+        raw_tensor(bytes(48), (4, 4, 3), np.float32)
+
+
+def test_npy_tensor_round_trip():
+    array = np.random.default_rng(0).random((4, 4, 3), dtype=np.float32)
+    np.testing.assert_array_equal(npy_tensor(npy_bytes(array)), array)
+
+
+def test_npy_tensor_converts_big_endian():
+    array = np.arange(48, dtype='>f4').reshape(4, 4, 3)
+    parsed = npy_tensor(npy_bytes(array))
+    assert parsed.dtype == np.float32 and parsed.dtype.isnative
+    np.testing.assert_array_equal(parsed, array)
+
+
+@pytest.mark.parametrize('data', [
+    npy_bytes(np.asfortranarray(np.zeros((4, 4, 3), dtype=np.float32))),
+    npy_bytes(np.array([None, 1], dtype=object), allow_pickle=True),
+    b'not a npy file',
+])
+def test_npy_tensor_rejects_unsupported(data):
+    with pytest.raises(InvalidTensor):
+        npy_tensor(data)
+
+
+def test_npy_tensor_rejects_unsupported_dtype():
+    with pytest.raises(InvalidTensor, match='float64'):
+        npy_tensor(npy_bytes(np.zeros((4, 4, 3))))
+
+
+@pytest.mark.parametrize('shape', [(4, 4, 3), (1, 4, 4, 3)])
+def test_model_input_normalizes_uint8(shape):
+    pixels = np.random.default_rng(1).integers(0, 256, size=shape, dtype=np.uint8)
+    result = model_input(pixels, FLOAT_INPUT)
+    assert result.shape == (1, 4, 4, 3) and result.dtype == np.float32
+    np.testing.assert_allclose(result, pixels.reshape(1, 4, 4, 3) / 255.0, rtol=1e-6)
+
+
+def test_model_input_float32_used_without_copy():
+    array = np.random.default_rng(2).random((1, 4, 4, 3), dtype=np.float32)
+    assert np.shares_memory(model_input(array, FLOAT_INPUT), array)
+
+
+def test_model_input_quantizes_float32_for_integer_model():
+    array = np.full((4, 4, 3), 0.4, dtype=np.float32)
+    result = model_input(array, UINT8_INPUT, quantization=(1 / 255, 0))
+    assert result.dtype == np.uint8
+    assert (result == 102).all()
+
+
+def test_model_input_shape_mismatch():
+    with pytest.raises(InvalidTensor, match='does not match model input'):
+        model_input(np.zeros((3, 4, 4), dtype=np.float32), FLOAT_INPUT)
+
+
+def test_model_input_int8_needs_int8_model():
+    with pytest.raises(InvalidTensor, match='dtype int8'):
+        model_input(np.zeros((4, 4, 3), dtype=np.int8), FLOAT_INPUT)
@@ -0,0 +1,85 @@
+"""
+TestTimeAugmentation: augmentasi dengan indexing numpy, band ketidakpastian dan agregasi
+"""
+
+import numpy as np
+import pytest
+
+from inference.tta import TRANSFORMS
+from inference.tta import TestTimeAugmentation as Augmentation  # nama Test* akan dikoleksi pytest
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).random((8, 8, 3), dtype=np.float32)
+
+
+def test_augment_matches_numpy(image):
+    tta = Augmentation(['hflip', 'vflip', 'rot90', 'rot180', 'rot270', 'transpose'])
+    batch = tta.augment(image)
+    expected = [
+        np.fliplr(image), np.flipud(image), np.rot90(image, 1), np.rot90(image, 2), np.rot90(image, 3),
+        image.transpose(1, 0, 2),
+    ]
+    assert batch.shape == (6, 8, 8, 3) and batch.dtype == image.dtype
+    for augmented, reference in zip(batch, expected):
+        np.testing.assert_array_equal(augmented, reference)
+
+
+def test_augment_keeps_quantized_dtype():
+    image = np.random.default_rng(1).integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    tta = Augmentation(TRANSFORMS)
+    assert tta.augment(image).dtype == np.uint8
+
+
+def test_crops_keep_input_shape(image):
+    tta = Augmentation(['crop_center', 'crop_tl', 'crop_br'], crop_scale=0.5)
+    batch = tta.augment(image)
+    assert batch.shape == (3, 8, 8, 3)
+    # Crop 4x4 di pojok kiri atas, diperbesar 2x dengan nearest neighbor
+    np.testing.assert_array_equal(batch[1], image[:4, :4].repeat(2, axis=0).repeat(2, axis=1))
+    np.testing.assert_array_equal(batch[2], image[4:, 4:].repeat(2, axis=0).repeat(2, axis=1))
+
+
+def test_rotation_needs_square_input():
+    with pytest.raises(ValueError, match='square'):
+        Augmentation(['rot90']).augment(np.zeros((8, 6, 3), dtype=np.float32))
+    assert Augmentation(['hflip', 'crop_center']).augment(np.zeros((8, 6, 3))).shape == (2, 8, 6, 3)
+
+
+def test_applies_within_band():
+    tta = Augmentation(['hflip'], band=(0.4, 0.6))
+    assert [tta.applies(c) for c in (0.39, 0.4, 0.5, 0.6, 0.61)] == [False, True, True, True, False]
+
+
+def test_mean_aggregation():
+    tta = Augmentation(['hflip', 'vflip'])
+    first = np.array([0.5, 0.4, 0.1], dtype=np.float32)
+    outputs = np.array([[0.2, 0.7, 0.1], [0.3, 0.6, 0.1]], dtype=np.float32)
+    predicted_class, confidence, predictions = tta.aggregate(first, outputs)
+    np.testing.assert_allclose(predictions, [1 / 3, 17 / 30, 0.1], rtol=1e-6)
+    assert predicted_class == 1
+    assert confidence == pytest.approx(17 / 30)
+    assert tta.stats()['changed_prediction'] == 1
+
+
+def test_vote_aggregation_breaks_ties_by_mean():
+    tta = Augmentation(['hflip', 'vflip', 'rot180'], aggregate='vote')
+    first = np.array([0.5, 0.45, 0.05], dtype=np.float32)
+    outputs = np.array([[0.4, 0.55, 0.05], [0.1, 0.9, 0.0], [0.6, 0.35, 0.05]], dtype=np.float32)
+    predicted_class, confidence, predictions = tta.aggregate(first, outputs)
+    # Suara 2-2, kelas 1 menang karena rata-rata probabilitasnya lebih tinggi
+    np.testing.assert_array_equal(predictions, [0.5, 0.5, 0.0])
+    assert predicted_class == 1
+    assert confidence == 0.5
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'transforms': []},
+    {'transforms': ['mirror']},
+    {'transforms': ['hflip'], 'aggregate': 'median'},
+    {'transforms': ['hflip'], 'band': (0.7, 0.3)},
+])
+def test_invalid_config(kwargs):
+    with pytest.raises(ValueError):
+        Augmentation(**kwargs)
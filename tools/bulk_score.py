@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Bulk scoring untuk arsip gambar daun (tanpa HTTP API)
+
+Pipeline dengan antrean berukuran tetap supaya memori tetap datar:
+    1. N proses decode/resize (preprocess_into, konfigurasi sama dengan app.py)
+    2. batched invoke() di proses utama (invoke_batch + dequantize_output)
+    3. writer inkremental CSV, JSONL atau Parquet
+
+Checkpoint (<output>.checkpoint.jsonl) mencatat file yang hasilnya sudah
+tertulis; --resume melanjutkan dari sana tanpa hasil ganda. Ctrl+C menulis
+hasil yang sudah selesai lalu berhenti, jadi bisa langsung di-resume.
+
+Usage:
+    python tools/bulk_score.py --images arsip/ --output scores.csv
+    python tools/bulk_score.py --manifest files.txt --output scores.jsonl --workers 8 --batch-size 32
+    python tools/bulk_score.py --images arsip/ --output scores.parquet --probabilities --resume
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inference.backends import load_backend  # noqa: E402
+from inference.batching import batch_buckets, bucket_for, invoke_batch  # noqa: E402
+from inference.cache import file_fingerprint  # noqa: E402
+from inference.config import env_bool, env_float, env_int  # noqa: E402
+from inference.preprocessing import IMAGE_FORMATS, preprocess_into, resample_filter  # noqa: E402
+from inference.quantization import dequantize_output, quantization_params  # noqa: E402
+from inference.registry import default_version  # noqa: E402
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model')
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+# Sama dengan DETECTION_THRESHOLD di app.py
+DETECTION_THRESHOLD = 0.5
+
+
+def load_labels(path):
+    with open(path, 'r') as f:
+        return [line.strip().split(' ', 1)[1] for line in f.readlines()]
+
+
+def walk_images(directory):
+    """
+    Semua gambar di bawah directory (rekursif, urutan stabil)
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+def read_manifest(path):
+    """
+    Path gambar dari manifest: .txt (satu path per baris), .csv (kolom 'path'
+    atau kolom pertama) atau .jsonl (field 'path'). Path relatif dihitung dari
+    folder manifest.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.reader(f)
+            header = next(reader, None)
+            column = header.index('path') if header and 'path' in header else 0
+            if header and 'path' not in header:
+                yield os.path.join(base, header[column])
+            entries = (row[column] for row in reader if row)
+        elif path.endswith('.jsonl'):
+            entries = (json.loads(line)['path'] for line in f if line.strip())
+        else:
+            entries = (line.strip() for line in f if line.strip() and not line.startswith('#'))
+        for entry in entries:
+            yield os.path.join(base, entry)
+
+
+def decode_worker(tasks, results, shape, dtype, quantization, options):
+    """
+    Proses decode: ambil path dari tasks, kirim (path, array, error) ke results
+    """
+    # Ctrl+C ditangani proses utama (commit checkpoint lalu terminate)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        path = tasks.get()
+        if path is None:
+            results.put(None)
+            return
+        out = np.empty(shape, dtype=dtype)
+        try:
+            with open(path, 'rb') as f:
+                preprocess_into(f, out, quantization=quantization, formats=IMAGE_FORMATS, **options)
+            results.put((path, out, None))
+        except Exception as e:
+            results.put((path, None, f"{type(e).__name__}: {e}"))
+
+
+def preprocess_options():
+    """
+    Konfigurasi preprocessing dari environment yang sama dengan app.py
+    """
+    return {
+        'resample': resample_filter(os.environ.get('PREPROCESS_RESAMPLE', 'bicubic')),
+        'draft': env_bool('PREPROCESS_DRAFT', True),
+        'reducing_gap': env_float('PREPROCESS_REDUCING_GAP', 3.0) or None,
+        'max_pixels': env_int('MAX_IMAGE_PIXELS', 50_000_000),
+    }
+
+
+class CsvWriter:
+    """
+    Append ke satu file; token checkpoint = offset file setelah flush
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=columns, extrasaction='ignore')
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def restore(path, token):
+        """
+        Potong baris yang ditulis setelah checkpoint terakhir
+        """
+        if os.path.exists(path):
+            with open(path, 'r+b') as f:
+                f.truncate(token or 0)
+
+
+class JsonlWriter(CsvWriter):
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.file = open(path, 'a')
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row) + '\n')
+
+
+class ParquetWriter:
+    """
+    Satu file part per checkpoint di folder output (dataset Parquet);
+    token checkpoint = nama file part. Butuh pyarrow.
+    """
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise SystemExit(f"Parquet output needs pyarrow (pip install pyarrow): {e}")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.columns = columns
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        self.part = len([name for name in os.listdir(path) if name.endswith('.parquet')])
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+    def flush(self):
+        if not self.rows:
+            return None
+        name = f'part-{self.part:05d}.parquet'
+        table = self.pa.Table.from_pylist(self.rows)
+        self.pq.write_table(table, os.path.join(self.path, name + '.tmp'))
+        os.replace(os.path.join(self.path, name + '.tmp'), os.path.join(self.path, name))
+        self.part += 1
+        self.rows = []
+        return name
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def restore(path, token):
+        """
+        Hapus file part yang tidak tercatat di checkpoint
+        """
+        if not os.path.isdir(path):
+            return
+        keep = set(token or [])
+        for name in os.listdir(path):
+            if name not in keep:
+                os.remove(os.path.join(path, name))
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+
+def output_format(path, name=None):
+    if name:
+        return name
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension not in WRITERS:
+        raise SystemExit(f"Cannot infer output format from {path!r}, use --format {'/'.join(WRITERS)}")
+    return extension
+
+
+class Checkpoint:
+    """
+    JSONL: satu baris per flush berisi path yang selesai dan token writer
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def load(self):
+        """
+        Return: (set path selesai, token writer terakhir)
+        """
+        done, token, parts = set(), None, []
+        if not os.path.exists(self.path):
+            return done, token
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Baris terakhir terpotong (proses mati saat menulis)
+                    break
+                done.update(record['paths'])
+                if record.get('part'):
+                    parts.append(record['part'])
+                    token = parts
+                else:
+                    token = record.get('offset', token)
+        return done, token
+
+    def record(self, paths, token):
+        if self.file is None:
+            self.file = open(self.path, 'a')
+        key = 'part' if isinstance(token, str) else 'offset'
+        self.file.write(json.dumps({key: token, 'paths': paths}) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class Progress:
+    """
+    Laporan images/sec berkala ke stderr
+    """
+
+    def __init__(self, total, interval):
+        self.total = total
+        self.interval = interval
+        self.start = self.last_time = time.perf_counter()
+        self.done = self.last_done = self.errors = 0
+
+    def update(self, count, errors=0, force=False):
+        self.done += count
+        self.errors += errors
+        now = time.perf_counter()
+        if not force and now - self.last_time < self.interval:
+            return
+        rate = (self.done - self.last_done) / max(now - self.last_time, 1e-9)
+        overall = self.done / max(now - self.start, 1e-9)
+        remaining = (self.total - self.done) / overall if overall > 0 else 0.0
+        print(
+            f"[{self.done}/{self.total}] {rate:.1f} img/s (avg {overall:.1f}), "
+            f"errors {self.errors}, eta {remaining:.0f}s",
+            file=sys.stderr, flush=True
+        )
+        self.last_time, self.last_done = now, self.done
+
+
+def build_rows(batch, predictions, labels, model_fields, probabilities):
+    rows = []
+    for (path, _, error), prediction in zip(batch, predictions):
+        row = {'path': path, 'detected': None, 'label': None, 'confidence': None, 'error': error, **model_fields}
+        if prediction is not None:
+            predicted_class = int(np.argmax(prediction))
+            confidence = float(prediction[predicted_class])
+            row.update(detected=confidence >= DETECTION_THRESHOLD, label=labels[predicted_class], confidence=confidence)
+            if probabilities:
+                row.update({f'p_{label}': float(p) for label, p in zip(labels, prediction)})
+        rows.append(row)
+    return rows
+
+
+def score(args):
+    labels = load_labels(args.labels)
+    model_fields = {
+        'model_version': default_version(args.model),
+        'model_hash': file_fingerprint(args.model, args.labels),
+    }
+    columns = ['path', 'detected', 'label', 'confidence', 'error', 'model_version', 'model_hash']
+    if args.probabilities:
+        columns += [f'p_{label}' for label in labels]
+
+    fmt = output_format(args.output, args.format)
+    writer_class = WRITERS[fmt]
+    checkpoint = Checkpoint(args.checkpoint or args.output + '.checkpoint.jsonl')
+    if args.resume:
+        done, token = checkpoint.load()
+        writer_class.restore(args.output, token)
+    else:
+        if os.path.exists(args.output) or os.path.exists(checkpoint.path):
+            raise SystemExit(f"{args.output} already exists, use --resume to continue or remove it")
+        done = set()
+
+    paths = list(read_manifest(args.manifest) if args.manifest else walk_images(args.images))
+    pending = [path for path in paths if path not in done]
+    print(f"{len(paths)} images, {len(paths) - len(pending)} already scored, {len(pending)} to go", file=sys.stderr)
+    if not pending:
+        return
+
+    # Decode di proses spawn: interpreter (dan thread-nya) tidak ikut di-fork
+    _, Interpreter = load_backend(os.environ.get('INTERPRETER_BACKEND'))
+    interpreter = Interpreter(model_path=args.model, num_threads=args.num_threads)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    shape = tuple(int(d) for d in input_detail['shape'][1:])
+
+    context = multiprocessing.get_context('spawn')
+    tasks = context.Queue(maxsize=args.workers * 4)
+    results = context.Queue(maxsize=args.batch_size * 4)
+    workers = [
+        context.Process(
+            target=decode_worker,
+            args=(tasks, results, shape, input_detail['dtype'], quantization_params(input_detail), preprocess_options()),
+            daemon=True
+        )
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    stop = threading.Event()
+
+    def feed():
+        for path in pending:
+            while not stop.is_set():
+                try:
+                    tasks.put(path, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                break
+        for _ in workers:
+            tasks.put(None)
+
+    feeder = threading.Thread(target=feed, name='bulk-feeder', daemon=True)
+    feeder.start()
+
+    writer = writer_class(args.output, columns)
+    progress = Progress(len(pending), args.progress_interval)
+    buckets = batch_buckets(args.batch_size)
+    unflushed = []
+    finished_workers = 0
+
+    def run_batch(batch):
+        valid = [item for item in batch if item[1] is not None]
+        outputs = iter(())
+        if valid:
+            inputs = np.zeros((bucket_for(len(valid), buckets), *shape), dtype=input_detail['dtype'])
+            for i, (_, array, _) in enumerate(valid):
+                inputs[i] = array
+            output = invoke_batch(interpreter, input_detail['index'], output_detail['index'], inputs)
+            outputs = iter(dequantize_output(output[:len(valid)], output_detail))
+        predictions = [next(outputs) if item[1] is not None else None for item in batch]
+        writer.write(build_rows(batch, predictions, labels, model_fields, args.probabilities))
+        unflushed.extend(item[0] for item in batch)
+        progress.update(len(batch), errors=len(batch) - len(valid))
+
+    def commit():
+        if unflushed:
+            checkpoint.record(list(unflushed), writer.flush())
+            unflushed.clear()
+
+    try:
+        batch = []
+        while finished_workers < len(workers):
+            try:
+                item = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    raise RuntimeError('All decode workers exited unexpectedly')
+                continue
+            if item is None:
+                finished_workers += 1
+                continue
+            batch.append(item)
+            if len(batch) >= args.batch_size:
+                run_batch(batch)
+                batch = []
+                if len(unflushed) >= args.checkpoint_every:
+                    commit()
+        if batch:
+            run_batch(batch)
+        commit()
+        progress.update(0, force=True)
+    except (KeyboardInterrupt, RuntimeError) as e:
+        # Hasil yang sudah di-invoke tetap ditulis supaya bisa di-resume
+        stop.set()
+        commit()
+        for worker in workers:
+            worker.terminate()
+        reason = 'Interrupted' if isinstance(e, KeyboardInterrupt) else str(e)
+        print(f'{reason}, run again with --resume to continue', file=sys.stderr)
+        raise SystemExit(130 if isinstance(e, KeyboardInterrupt) else 1)
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    for worker in workers:
+        worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a directory or manifest of leaf images in bulk')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--images', help='Folder gambar (dibaca rekursif)')
+    source.add_argument('--manifest', help='Daftar gambar: .txt, .csv (kolom path) atau .jsonl')
+    parser.add_argument('--output', required=True, help='File .csv/.jsonl, atau folder .parquet')
+    parser.add_argument('--format', choices=sorted(WRITERS), help='Default: dari ekstensi --output')
+    parser.add_argument('--model', default=os.path.join(MODEL_DIR, 'model_unquant.tflite'))
+    parser.add_argument('--labels', default=os.path.join(MODEL_DIR, 'labels.txt'))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Jumlah proses decode')
+    parser.add_argument('--batch-size', type=int, default=32, help='Gambar per invoke()')
+    parser.add_argument('--num-threads', type=int, default=os.cpu_count() or 1, help='num_threads interpreter')
+    parser.add_argument('--probabilities', action='store_true', help='Tambahkan kolom probabilitas per label')
+    parser.add_argument('--checkpoint', help='File checkpoint (default: <output>.checkpoint.jsonl)')
+    parser.add_argument('--checkpoint-every', type=int, default=1024, help='Flush + checkpoint setiap N gambar')
+    parser.add_argument('--resume', action='store_true', help='Lanjutkan dari checkpoint')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Detik antar laporan progress')
+    score(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
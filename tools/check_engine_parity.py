@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Cek parity numerik InferenceEngine dengan implementasi lama
+
+Implementasi referensi di sini adalah salinan jalur preprocessing + predict
+flask_app.py / streamlit_app.py sebelum keduanya memakai inference/engine.py
+(Image.open, convert RGB, resize bicubic, / 255, satu interpreter). Gambar
+sintetis (atau --images) diprediksi oleh referensi dan oleh engine lewat
+semua jenis input (bytes, stream, PIL Image, ndarray uint8), lalu dibandingkan:
+
+- engine dengan draft=False, reducing_gap=None: probabilitas harus sama persis
+  (selisih <= --atol) dan response dict sama dengan format lama
+- engine dengan konfigurasi default app.py (draft JPEG, reducing_gap=3.0):
+  hanya dilaporkan, karena downscale saat decode sengaja mengubah pixel
+
+Usage:
+    python tools/check_engine_parity.py
+    python tools/check_engine_parity.py --images dataset/ --atol 1e-6
+Exit code 1 jika ada yang tidak sama.
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inference.backends import load_backend  # noqa: E402
+from inference.engine import InferenceEngine  # noqa: E402
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model')
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+
+
+class Reference:
+    """
+    Jalur preprocessing + predict lama (flask_app.py / streamlit_app.py)
+    """
+
+    def __init__(self, model_path, labels_path):
+        _, Interpreter = load_backend(os.environ.get('INTERPRETER_BACKEND'))
+        self.interpreter = Interpreter(model_path=model_path)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        with open(labels_path, 'r') as f:
+            self.labels = [line.strip().split(' ', 1)[1] for line in f.readlines()]
+
+    def preprocess(self, data):
+        image = Image.open(io.BytesIO(data))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        height, width = self.input_details[0]['shape'][1], self.input_details[0]['shape'][2]
+        image = image.resize((width, height))
+        image_array = np.array(image, dtype=np.float32) / 255.0
+        return np.expand_dims(image_array, axis=0)
+
+    def predict(self, data):
+        self.interpreter.set_tensor(self.input_details[0]['index'], self.preprocess(data))
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_details[0]['index'])[0]
+
+    def response(self, predictions, threshold=0.5):
+        predicted_class = np.argmax(predictions)
+        confidence = float(predictions[predicted_class])
+        if confidence < threshold:
+            return {
+                'detected': False,
+                'message': 'Penyakit tidak terdeteksi',
+                'confidence': f"{confidence * 100:.2f}%"
+            }
+        return {
+            'detected': True,
+            'label': self.labels[predicted_class],
+            'percentage': f"{confidence * 100:.2f}%",
+            'confidence': confidence,
+            'top_predictions': [
+                {'label': self.labels[idx], 'confidence': f"{predictions[idx] * 100:.2f}%"}
+                for idx in np.argsort(predictions)[-3:][::-1]
+            ]
+        }
+
+
+def synthetic_images(count, seed=0):
+    """
+    Gambar bertekstur dalam beberapa format, mode dan ukuran (termasuk JPEG besar
+    yang memicu draft)
+    """
+    rng = np.random.default_rng(seed)
+    cases = [
+        ('PNG', 'RGB', (320, 240)), ('JPEG', 'RGB', (224, 224)), ('JPEG', 'RGB', (1600, 1200)),
+        ('PNG', 'RGBA', (500, 500)), ('WEBP', 'RGB', (300, 400)), ('BMP', 'L', (256, 256)),
+    ]
+    for n in range(count):
+        fmt, mode, (width, height) = cases[n % len(cases)]
+        base = rng.integers(0, 256, size=(height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+        image = Image.fromarray(base).resize((width, height), Image.Resampling.BILINEAR).convert(mode)
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt)
+        yield f'synthetic_{n}.{fmt.lower()}', buffer.getvalue()
+
+
+def folder_images(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+                with open(os.path.join(root, name), 'rb') as f:
+                    yield os.path.relpath(os.path.join(root, name), directory), f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check numerical parity of InferenceEngine with the legacy code paths')
+    parser.add_argument('--model', default=os.path.join(MODEL_DIR, 'model_unquant.tflite'))
+    parser.add_argument('--labels', default=os.path.join(MODEL_DIR, 'labels.txt'))
+    parser.add_argument('--images', help='Folder gambar (default: gambar sintetis)')
+    parser.add_argument('--count', type=int, default=12, help='Jumlah gambar sintetis')
+    parser.add_argument('--atol', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    reference = Reference(args.model, args.labels)
+    exact = InferenceEngine.from_env(args.model, args.labels, pool_size=1, draft=False, reducing_gap=None,
+                                     microbatch=None, tta=None, cache=None)
+    exact.load(warmup=False)
+    default = InferenceEngine.from_env(args.model, args.labels, pool_size=1, microbatch=None, tta=None, cache=None)
+    default.load(warmup=False)
+
+    images = folder_images(args.images) if args.images else synthetic_images(args.count)
+    failures = 0
+    checked = 0
+    for name, data in images:
+        checked += 1
+        expected = reference.predict(data)
+        input_shape = tuple(exact.model.input_details[0]['shape'][1:3])
+        pixels = np.asarray(Image.open(io.BytesIO(data)).convert('RGB').resize(input_shape[::-1]))
+        results = {
+            'bytes': exact.predict(data),
+            'stream': exact.predict(io.BytesIO(data)),
+            'image': exact.predict(Image.open(io.BytesIO(data))),
+            'ndarray': exact.predict(pixels),
+        }
+        problems = []
+        for source, result in results.items():
+            diff = float(np.max(np.abs(result.predictions - expected)))
+            if diff > args.atol:
+                problems.append(f'{source}: max |diff| {diff:.3g}')
+            legacy = reference.response(expected)
+            current = {key: value for key, value in result.to_dict().items() if key not in ('model_version', 'model_hash')}
+            if current != legacy:
+                problems.append(f'{source}: response {current} != {legacy}')
+
+        default_result = default.predict(data)
+        default_diff = float(np.max(np.abs(default_result.predictions - expected)))
+        agrees = default_result.predicted_class == int(np.argmax(expected))
+        status = 'FAIL' if problems else 'ok'
+        print(f'{status:4} {name}: default config max |diff| {default_diff:.3g}, '
+              f'same class {agrees}', file=sys.stderr)
+        for problem in problems:
+            print(f'     {problem}', file=sys.stderr)
+        failures += bool(problems)
+
+    print(f'{checked - failures}/{checked} images match the legacy implementation', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Laporan akurasi vs latency untuk varian model (unquant, dynamic_int8, int8, float16)
+
+Dataset lokal berlabel disusun per folder, nama folder sama dengan label di
+labels.txt (atau index label-nya):
+
+    dataset/
+        Bercak Kering/*.jpg
+        Busuk daun/*.jpg
+        ...
+
+Usage:
+    python tools/compare_models.py --images dataset/
+    python tools/compare_models.py --images dataset/ --models model/model_unquant.tflite,model/model_int8.tflite \\
+        --output model/quantization_report
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inference.backends import load_backend  # noqa: E402
+from inference.preprocessing import preprocess_into  # noqa: E402
+from inference.quantization import dequantize_output, quantization_params  # noqa: E402
+from inference.stats import percentile  # noqa: E402
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model')
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+
+
+def load_labels(path):
+    with open(path, 'r') as f:
+        return [line.strip().split(' ', 1)[1] for line in f.readlines()]
+
+
+def load_dataset(directory, labels):
+    """
+    List (path, label_index) dari folder per label
+    """
+    lookup = {label.strip().lower(): i for i, label in enumerate(labels)}
+    samples = []
+    for folder in sorted(os.listdir(directory)):
+        folder_path = os.path.join(directory, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        key = folder.strip().lower()
+        if key.isdigit():
+            label_index = int(key)
+        elif key in lookup:
+            label_index = lookup[key]
+        else:
+            print(f"Skipping folder {folder!r}: not a known label")
+            continue
+        for name in sorted(os.listdir(folder_path)):
+            if name.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+                samples.append((os.path.join(folder_path, name), label_index))
+    return samples
+
+
+def evaluate(model_path, samples, num_threads):
+    _, Interpreter = load_backend(os.environ.get('INTERPRETER_BACKEND'))
+    interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    quantization = quantization_params(input_detail)
+    buffer = np.empty(tuple(input_detail['shape']), dtype=input_detail['dtype'])
+
+    # Warm-up supaya inisialisasi kernel tidak masuk ke latency
+    interpreter.set_tensor(input_detail['index'], buffer)
+    interpreter.invoke()
+
+    latencies = []
+    outputs = []
+    correct = 0
+    for path, label_index in samples:
+        with open(path, 'rb') as f:
+            preprocess_into(f, buffer[0], quantization=quantization)
+        start = time.perf_counter()
+        interpreter.set_tensor(input_detail['index'], buffer)
+        interpreter.invoke()
+        output = interpreter.get_tensor(output_detail['index'])[0]
+        latencies.append(time.perf_counter() - start)
+        predictions = dequantize_output(output, output_detail)
+        outputs.append(predictions)
+        correct += int(np.argmax(predictions) == label_index)
+
+    latencies.sort()
+    return {
+        'model': os.path.basename(model_path),
+        'size_kb': round(os.path.getsize(model_path) / 1024, 1),
+        'input_dtype': np.dtype(input_detail['dtype']).name,
+        'accuracy': round(correct / len(samples), 4) if samples else 0.0,
+        'latency_ms_p50': round(percentile(latencies, 50) * 1000, 3),
+        'latency_ms_p95': round(percentile(latencies, 95) * 1000, 3),
+        'latency_ms_mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }, np.array(outputs)
+
+
+def markdown_report(results, sample_count):
+    lines = [
+        '# Model variant comparison',
+        '',
+        f'Images: {sample_count}',
+        '',
+        '| Model | Size (KB) | Input | Accuracy | Top-1 agreement | Mean abs prob diff | p50 (ms) | p95 (ms) |',
+        '|---|---|---|---|---|---|---|---|',
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['model']} | {r['size_kb']} | {r['input_dtype']} | {r['accuracy'] * 100:.2f}% | "
+            f"{r['top1_agreement'] * 100:.2f}% | {r['mean_abs_prob_diff']:.5f} | "
+            f"{r['latency_ms_p50']} | {r['latency_ms_p95']} |"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare accuracy and latency of model variants')
+    parser.add_argument('--images', required=True, help='Folder dataset berlabel')
+    parser.add_argument('--models', help='File model dipisah koma (default: semua model/model_*.tflite)')
+    parser.add_argument('--labels', default=os.path.join(MODEL_DIR, 'labels.txt'))
+    parser.add_argument('--num-threads', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(MODEL_DIR, 'quantization_report'),
+                        help='Prefix file output (.json dan .md)')
+    args = parser.parse_args()
+
+    if args.models:
+        models = [m.strip() for m in args.models.split(',') if m.strip()]
+    else:
+        models = sorted(
+            os.path.join(MODEL_DIR, name) for name in os.listdir(MODEL_DIR)
+            if name.startswith('model_') and name.endswith('.tflite')
+        )
+        # Model unquant selalu jadi baseline
+        models.sort(key=lambda path: not path.endswith('model_unquant.tflite'))
+
+    samples = load_dataset(args.images, load_labels(args.labels))
+    if not samples:
+        raise SystemExit(f"No labelled images found in {args.images}")
+
+    results = []
+    baseline = None
+    for model_path in models:
+        print(f"Evaluating {model_path} on {len(samples)} images...")
+        result, outputs = evaluate(model_path, samples, args.num_threads)
+        if baseline is None:
+            baseline = outputs
+        result['top1_agreement'] = round(float(np.mean(np.argmax(outputs, axis=1) == np.argmax(baseline, axis=1))), 4)
+        result['mean_abs_prob_diff'] = round(float(np.mean(np.abs(outputs - baseline))), 6)
+        results.append(result)
+        print(f"  accuracy {result['accuracy'] * 100:.2f}%  p50 {result['latency_ms_p50']} ms")
+
+    with open(args.output + '.json', 'w') as f:
+        json.dump({'images': len(samples), 'baseline': results[0]['model'], 'results': results}, f, indent=2)
+    with open(args.output + '.md', 'w') as f:
+        f.write(markdown_report(results, len(samples)))
+    print(f"Report written to {args.output}.json and {args.output}.md")
+
+
+if __name__ == '__main__':
+    main()
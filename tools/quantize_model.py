@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Buat varian model terkuantisasi dari model sumber Keras/SavedModel
+
+TFLiteConverter tidak bisa mengkuantisasi ulang file .tflite, jadi script ini
+butuh model sumber yang sama dengan model_unquant.tflite (misalnya
+keras_model.h5 dari export Teachable Machine, atau direktori SavedModel).
+
+Varian yang dihasilkan (di folder model/):
+    model_dynamic_int8.tflite  - dynamic-range int8 (bobot int8, aktivasi float)
+    model_int8.tflite          - full-integer int8 (butuh --representative-dir)
+    model_float16.tflite       - bobot float16
+
+Usage:
+    python tools/quantize_model.py --keras-model keras_model.h5
+    python tools/quantize_model.py --saved-model saved_model/ --representative-dir dataset/ --variants int8
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inference.preprocessing import preprocess_into  # noqa: E402
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model')
+VARIANTS = ('dynamic_int8', 'int8', 'float16')
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+
+
+def find_images(directory, limit=None):
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    paths.sort()
+    return paths[:limit] if limit else paths
+
+
+def representative_dataset(paths, height, width):
+    """
+    Generator input float [0, 1] untuk kalibrasi full-integer quantization
+    """
+    def generator():
+        buffer = np.empty((1, height, width, 3), dtype=np.float32)
+        for path in paths:
+            with open(path, 'rb') as f:
+                preprocess_into(f, buffer[0])
+            yield [buffer]
+    return generator
+
+
+def build_converter(tf, args):
+    if args.keras_model:
+        model = tf.keras.models.load_model(args.keras_model, compile=False)
+        return tf.lite.TFLiteConverter.from_keras_model(model), model.input_shape
+    converter = tf.lite.TFLiteConverter.from_saved_model(args.saved_model)
+    return converter, None
+
+
+def convert(tf, args, variant, input_shape):
+    converter, _ = build_converter(tf, args)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        height, width = input_shape[1], input_shape[2]
+        paths = find_images(args.representative_dir, args.representative_samples)
+        if not paths:
+            raise SystemExit(f"No images found in {args.representative_dir}")
+        converter.representative_dataset = representative_dataset(paths, height, width)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8 if args.uint8_io else tf.int8
+        converter.inference_output_type = tf.uint8 if args.uint8_io else tf.int8
+
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate quantized TFLite model variants')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--keras-model', help='File model Keras (.h5/.keras)')
+    source.add_argument('--saved-model', help='Direktori SavedModel')
+    parser.add_argument('--variants', default=','.join(VARIANTS),
+                        help=f'Varian yang dibuat, dipisah koma ({", ".join(VARIANTS)})')
+    parser.add_argument('--representative-dir', help='Folder gambar untuk kalibrasi full-integer int8')
+    parser.add_argument('--representative-samples', type=int, default=200)
+    parser.add_argument('--input-size', default='224x224', help='Ukuran input WxH untuk SavedModel')
+    parser.add_argument('--uint8-io', action='store_true', help='Pakai uint8 (bukan int8) untuk input/output int8')
+    parser.add_argument('--output-dir', default=MODEL_DIR)
+    args = parser.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(',') if v.strip()]
+    for variant in variants:
+        if variant not in VARIANTS:
+            parser.error(f"Unknown variant {variant!r}")
+    if 'int8' in variants and not args.representative_dir:
+        parser.error('--representative-dir is required for the int8 variant')
+
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    import tensorflow as tf
+
+    _, input_shape = build_converter(tf, args)
+    if input_shape is None:
+        width, height = (int(v) for v in args.input_size.lower().split('x'))
+        input_shape = (None, height, width, 3)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for variant in variants:
+        print(f"Converting {variant}...")
+        model_content = convert(tf, args, variant, input_shape)
+        path = os.path.join(args.output_dir, f'model_{variant}.tflite')
+        with open(path, 'wb') as f:
+            f.write(model_content)
+        print(f"  {path} ({len(model_content) / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()